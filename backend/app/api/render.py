@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.scene import Scene
 from app.models.project import Project
-from app.workers.render_worker import render_scene_task, get_task_status
+from app.workers.render_worker import render_scene_task, render_scenes_task, get_task_status
+from app.services.render_manager import concurrent_generations
 from pydantic import BaseModel
 from typing import List
 
@@ -106,29 +107,29 @@ async def render_all_scenes(
         render_settings = project.get_render_settings()
         logger.info(f"Using render settings: {render_settings}")
         
-        # Queue render tasks for all scenes with delays to avoid browser conflicts
-        # IMPORTANT: Each scene needs its own browser instance, so we space them out
+        # Queue the scenes in batches that one worker generates at once in a single
+        # browser session (see RenderManager.render_scenes)
+        batch_size = concurrent_generations(render_settings)
         task_ids = []
-        for idx, scene in enumerate(scenes):
+        for idx, start in enumerate(range(0, len(scenes), batch_size)):
+            batch = scenes[start:start + batch_size]
             # Update scene status to pending (in case it wasn't)
-            scene.status = "pending"
+            for scene in batch:
+                scene.status = "pending"
             db.commit()
             
-            # Queue render task with increasing delays between tasks
-            # Start with 10 seconds delay for scene 1 (idx=0), then 15s, 20s, etc.
-            # This ensures each browser instance has time to initialize properly
-            if idx == 0:
-                # First scene: start immediately but with a small delay to ensure DB commit
-                countdown = 2  # 2 second delay to ensure DB is committed
-                task = render_scene_task.apply_async(args=[scene.id, project_id], countdown=countdown)
-            else:
-                # Subsequent scenes: longer delays (10s + 10s per scene)
-                # This prevents browser conflicts and ensures each scene gets a fresh browser instance
-                countdown = 10 + (idx * 10)  # 10s, 20s, 30s, etc.
-                task = render_scene_task.apply_async(args=[scene.id, project_id], countdown=countdown)
+            # Small delay on the first batch so the DB commit lands; later batches are
+            # spaced out so workers picking them up don't launch browsers all at once
+            countdown = 2 if idx == 0 else 10 + (idx * 10)
+            task = render_scenes_task.apply_async(
+                args=[[scene.id for scene in batch], project_id], countdown=countdown
+            )
             
             task_ids.append(task.id)
-            logger.info(f"Queued render task {task.id} for scene {scene.id} (Scene {scene.number}) with {countdown}s delay")
+            logger.info(
+                f"Queued render task {task.id} for scenes "
+                f"{', '.join(str(scene.number) for scene in batch)} with {countdown}s delay"
+            )
         
         return {
             "task_ids": task_ids,
@@ -523,6 +523,17 @@ async def open_flow_tab(profile_id: str) -> dict:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/profiles/{profile_id}/open-login-tabs")
+async def open_login_tabs(profile_id: str) -> dict:
+    """Open Gmail and Flow login tabs together"""
+    try:
+        result = await guided_login_service.open_login_tabs(profile_id)
+        return result
+    except Exception as e:
+        logger.error(f"Failed to open login tabs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/profiles/{profile_id}/login-status")
 async def get_login_status(profile_id: str) -> dict:
     """Check login status for profile"""
@@ -40,6 +40,10 @@ class Settings(BaseSettings):
     
     # Browser
     BROWSER_HEADLESS: bool = Field(default=True, description="Run browser in headless mode")
+    DEBUG_SCREENSHOTS: bool = Field(
+        default=False,
+        description="Save failure screenshots even when debug logging is off"
+    )
     CHROME_PROFILE_PATH: str = Field(
         default="./chromedata",
         description="Chrome profile path"
@@ -11,7 +11,7 @@ import os
 import subprocess
 import time
 import uuid
-from typing import Optional
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +26,10 @@ class BrowserManager:
         self._initialized = False
         self.worker_id = worker_id or str(uuid.uuid4())[:8]
         self.profile_path = None
+        # Set when running a standalone browser restored from storage state; lets
+        # new_context() hand out extra isolated contexts with the same session
+        self._state_file: Optional[Path] = None
+        self._context_options: dict = {}
     
     def _cleanup_chrome_processes(self, profile_path: Path | str) -> None:
         """Kill any existing Chrome processes using this profile"""
@@ -69,8 +73,36 @@ class BrowserManager:
                 except Exception as e:
                     logger.debug(f"Could not remove {lock_file.name}: {e}")
     
-    async def initialize_with_profile_path(self, profile_path: Path) -> None:
-        """Initialize browser with specific profile path"""
+    async def _launch_with_storage_state(self, state_file: Path, launch_options: dict) -> None:
+        """Launch a fresh browser and restore a saved storage_state() snapshot into a new context"""
+        browser_options = {
+            key: launch_options[key] for key in ("headless", "args", "channel") if key in launch_options
+        }
+        context_options = {
+            key: value for key, value in launch_options.items() if key not in browser_options
+        }
+        self.browser = await self.playwright.chromium.launch(**browser_options)
+        try:
+            self.context = await self.browser.new_context(
+                storage_state=str(state_file),
+                **context_options
+            )
+        except Exception:
+            await self.browser.close()
+            self.browser = None
+            raise
+        self._state_file = state_file
+        self._context_options = context_options
+    
+    async def initialize_with_profile_path(self, profile_path: Path, use_storage_state: bool = False) -> None:
+        """
+        Initialize browser with specific profile path.
+        
+        use_storage_state restores the profile's storage_state() snapshot into a fresh
+        browser instead of opening the profile directory. Only read-only jobs such as
+        renders should ask for it: cookies refreshed in that browser are written back
+        to the snapshot on close, never to the profile itself.
+        """
         if self._initialized:
             logger.info("Browser manager already initialized, skipping...")
             return
@@ -182,13 +214,26 @@ class BrowserManager:
             except Exception:
                 pass
             
-            # Launch persistent context
+            # Jobs prefer the small storage_state() snapshot saved at login; it restores the
+            # session without Chrome loading the whole user-data directory
+            from app.services.profile_manager import STORAGE_STATE_FILE
+            state_file = profile_path / STORAGE_STATE_FILE
+            if use_storage_state and state_file.exists():
+                try:
+                    await self._launch_with_storage_state(state_file, launch_options)
+                    logger.info(f"✓ Browser context restored from storage state: {state_file}")
+                except Exception as state_error:
+                    logger.warning(f"Could not restore storage state ({state_error}), using persistent profile")
+                    self.context = None
+            
+            # Launch persistent context (legacy profiles, or if the snapshot failed)
             max_retries = 3
             retry_count = 0
             last_error = None
             
-            logger.info(f"Launching browser with persistent context: {user_data_dir_str}")
-            while retry_count < max_retries:
+            if self.context is None:
+                logger.info(f"Launching browser with persistent context: {user_data_dir_str}")
+            while self.context is None and retry_count < max_retries:
                 try:
                     self.context = await self.playwright.chromium.launch_persistent_context(
                         user_data_dir_str,
@@ -272,6 +317,7 @@ class BrowserManager:
             self._initialized = False
             self.context = None
             self.browser = None
+            self._state_file = None
             
             raise Exception(f"Profile loading failed: {error_type}: {error_msg}")
     
@@ -443,6 +489,64 @@ class BrowserManager:
         
         return await self.context.new_page()
     
+    async def new_context(self) -> BrowserContext:
+        """
+        Context for one isolated job (e.g. a scene render).
+        
+        With a browser restored from storage state this is a fresh context carrying
+        the saved session - far cheaper than a new browser, and the caller closes it.
+        A persistent profile allows only its single context, so that shared context
+        is returned instead; callers must not close it (compare with self.context).
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        if self.browser and self._state_file and self._state_file.exists():
+            return await self.browser.new_context(
+                storage_state=str(self._state_file),
+                **self._context_options
+            )
+        return self.context
+    
+    async def ensure_ready_and_new_page(
+        self,
+        profile_path: Path,
+        context: Optional[BrowserContext] = None
+    ) -> Tuple[Page, BrowserContext]:
+        """
+        Fast path for job pages: initialize on profile_path if needed, check the
+        browser is usable, and open a page - all in one call.
+        
+        `context` is the job's context from an earlier attempt (see new_context);
+        one is created when it is None or stale. Returns (page, context). Raises
+        when the browser is not usable so the caller can fall back to probing it.
+        """
+        if not self._initialized:
+            await self.initialize_with_profile_path(profile_path, use_storage_state=True)
+            context = None
+        if self.context is None:
+            raise Exception("Browser context is None")
+        if self.browser is not None and not self.browser.is_connected():
+            raise Exception("Browser is not connected")
+        
+        if context is None:
+            context = await self.new_context()
+        return await context.new_page(), context
+    
+    async def save_storage_state(self, context: Optional[BrowserContext] = None) -> None:
+        """
+        Write context's cookies and storage back to the snapshot it was restored from,
+        so sessions Google refreshed during a job outlive it. No-op for persistent
+        profiles, which keep their own state on disk.
+        """
+        context = context or self.context
+        if context is None or not self.browser or not self._state_file:
+            return
+        try:
+            await context.storage_state(path=str(self._state_file))
+        except Exception as e:
+            logger.warning(f"Could not save storage state to {self._state_file}: {e}")
+    
     async def ensure_logged_in(self) -> bool:
         """
         Check if user is logged in to Google Flow.
@@ -475,6 +579,8 @@ class BrowserManager:
     async def close(self) -> None:
         """Close browser and cleanup resources"""
         try:
+            await self.save_storage_state()
+            
             # Close all pages first
             if self.context:
                 pages = self.context.pages
@@ -491,7 +597,8 @@ class BrowserManager:
                     await self.context.close()
                 except:
                     pass
-            elif self.browser:
+            # A context restored from storage state runs in a browser of its own
+            if self.browser:
                 try:
                     await self.browser.close()
                 except:
@@ -511,6 +618,7 @@ class BrowserManager:
             self._initialized = False
             self.context = None
             self.browser = None
+            self._state_file = None
             logger.info("Browser manager closed")
         except Exception as e:
             logger.error(f"Error closing browser manager: {e}")
@@ -518,4 +626,5 @@ class BrowserManager:
             self._initialized = False
             self.context = None
             self.browser = None
+            self._state_file = None
 
@@ -3,6 +3,7 @@ Cookie Extractor Service - Extracts and saves cookies from browser
 """
 
 import logging
+import re
 from pathlib import Path
 from typing import List, Dict, Optional
 from playwright.async_api import BrowserContext, Page
@@ -12,6 +13,10 @@ from app.config import config_manager, settings
 
 logger = logging.getLogger(__name__)
 
+# Flow lives under labs.google(.com)/fx/, optionally with a locale segment:
+# /fx/tools/flow, /fx/vi/tools/flow, ...
+FLOW_URL_RE = re.compile(r"labs\.google(?:\.com)?/fx/(?:[^?#]*/)?tools/flow")
+
 
 class CookieExtractor:
     """Extracts cookies from browser and verifies login status"""
@@ -64,16 +69,8 @@ class CookieExtractor:
                 logger.info("On Google sign-in page - not logged in")
                 return False
             
-            # More flexible Flow URL check - Flow can be on different paths
-            # Flow URLs can be:
-            # - https://labs.google/fx/tools/flow
-            # - https://labs.google/fx/vi/tools/flow (with "vi" variant)
-            # - https://labs.google.com/fx/tools/flow
-            is_flow_url = (
-                ("labs.google.com" in current_url or "labs.google" in current_url) and 
-                ("/fx/" in current_url and "/tools/flow" in current_url) and
-                "accounts.google.com" not in current_url
-            )
+            # More flexible Flow URL check - Flow can be on different paths (see FLOW_URL_RE)
+            is_flow_url = bool(FLOW_URL_RE.search(current_url)) and "accounts.google.com" not in current_url
             
             if is_flow_url:
                 logger.info("On Flow page - checking login indicators...")
@@ -2,16 +2,772 @@
 Flow Controller Service - Handles Google Flow UI automation
 """
 
-from playwright.async_api import Page
+from playwright.async_api import Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 from app.config import config_manager, settings, FLOW_URL, FLOW_SELECTORS, POLLING_INTERVAL_MS, IMAGES_PATH
 import asyncio
+import httpx
 import logging
 import os
+import re
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Tries every "make the prompt input visible" strategy in a single round trip:
+# scroll into view, click the nearest clickable ancestor, click a New/Create/Start
+# button, then force the element's styles. Uses offsetParent as the visibility test
+# since it does not force a style recalculation like getComputedStyle does.
+_JS_REVEAL = """
+    el => {
+        const isShown = () => el.offsetParent !== null;
+        try { el.scrollIntoView({block: 'center'}); } catch (e) {}
+        if (isShown()) return true;
+
+        let node = el.parentElement;
+        for (let depth = 0; node && depth < 5; depth++, node = node.parentElement) {
+            if (node.tagName === 'BUTTON' || node.getAttribute('role') === 'button') {
+                try { node.click(); } catch (e) {}
+                break;
+            }
+        }
+        if (isShown()) return true;
+
+        const createRe = /^(New|Create|Start)\b/i;
+        const createBtn = Array.prototype.find.call(document.getElementsByTagName('button'), b =>
+            createRe.test((b.innerText || '').trim()) ||
+            /New|Create/.test(b.getAttribute('aria-label') || '')
+        );
+        if (createBtn) {
+            try { createBtn.click(); } catch (e) {}
+        }
+        if (isShown()) return true;
+
+        el.style.display = 'block';
+        el.style.visibility = 'visible';
+        el.style.opacity = '1';
+        el.removeAttribute('hidden');
+        el.removeAttribute('aria-hidden');
+        return isShown();
+    }
+"""
+
+# Reads the current prompt text of an input, textarea or contenteditable
+_JS_READ_VALUE = """
+    el => (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT')
+        ? el.value
+        : (el.textContent || el.innerText || '')
+"""
+
+# Sets the prompt, fires input/change and returns the resulting text in one round
+# trip. Inputs go through the native value setter so React's value tracker sees
+# the change and actually fires onChange.
+_JS_SET_AND_VERIFY = """
+    (el, prompt) => {
+        try { el.focus(); } catch (e) {}
+        const isInput = el.tagName === 'TEXTAREA' || el.tagName === 'INPUT';
+        if (isInput) {
+            const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+            Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, prompt);
+        } else {
+            el.textContent = prompt;
+        }
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        return isInput ? el.value : (el.textContent || el.innerText || '');
+    }
+"""
+
+# Wait conditions used by inject_prompt (argument is the input's element handle)
+_JS_HAS_FOCUS = "el => el && (document.activeElement === el || el.contains(document.activeElement))"
+_JS_HAS_VALUE = "el => el && (el.value || el.textContent || '').length > 0"
+
+# True once any textarea, contenteditable or text input is rendered
+_JS_ANY_VISIBLE_INPUT = """
+    () => Array.from(document.querySelectorAll("textarea, [contenteditable], input[type='text']"))
+        .some(el => el.offsetParent !== null)
+"""
+
+# Counts rendered textareas, contenteditables and text inputs
+_JS_COUNT_VISIBLE_INPUTS = """
+    () => {
+        let count = 0;
+        document.querySelectorAll('textarea, [contenteditable], input[type="text"]').forEach(el => {
+            if (el.offsetParent !== null) count++;
+        });
+        return {found: count > 0, count: count};
+    }
+"""
+
+# Writes the prompt into the first visible textarea, then contenteditable. The prompt is
+# passed as an evaluate argument so Playwright serializes it instead of us escaping it.
+_JS_SET_VISIBLE_PROMPT = """
+    (prompt) => {
+        let success = false;
+        
+        // Try textareas first
+        const textareas = document.getElementsByTagName('textarea');
+        for (let i = 0; i < textareas.length && !success; i++) {
+            const el = textareas[i];
+            if (el.offsetParent !== null) {
+                try {
+                    el.focus();
+                    el.value = prompt;
+                    el.dispatchEvent(new Event('input', { bubbles: true }));
+                    el.dispatchEvent(new Event('change', { bubbles: true }));
+                    success = true;
+                } catch(e) {
+                    console.log('Textarea error:', e);
+                }
+            }
+        }
+        
+        // Try contenteditables if textarea didn't work
+        if (!success) {
+            document.querySelectorAll('[contenteditable]').forEach(el => {
+                if (el.offsetParent !== null && !success) {
+                    try {
+                        el.focus();
+                        el.innerText = prompt;
+                        el.textContent = prompt;
+                        el.dispatchEvent(new Event('input', { bubbles: true }));
+                        success = true;
+                    } catch(e) {
+                        console.log('Contenteditable error:', e);
+                    }
+                }
+            });
+        }
+        
+        return success;
+    }
+"""
+
+# True once a rendered textarea/contenteditable holds more than a few characters
+_JS_VISIBLE_PROMPT_SET = """
+    () => {
+        let found = false;
+        document.querySelectorAll('textarea, [contenteditable]').forEach(el => {
+            if (el.offsetParent !== null) {
+                const val = el.value || el.innerText || el.textContent || '';
+                if (val.length > 10) {
+                    found = true;
+                }
+            }
+        });
+        return found;
+    }
+"""
+
+# Indices of the elements matching a selector that are rendered (offsetParent set),
+# so callers get every visible candidate without an is_visible() round trip each
+_JS_VISIBLE_INDICES = """
+    sel => Array.from(document.querySelectorAll(sel))
+        .map((el, i) => el.offsetParent !== null ? i : -1)
+        .filter(i => i >= 0)
+"""
+
+# Input kinds tried by inject_prompt's final fallback, in priority order
+_FALLBACK_INPUT_KINDS = ("textarea", "[contenteditable]", "input[type='text']")
+
+# Tag and current text of the page's prompt input (first textarea/contenteditable),
+# or null when there is none
+_JS_PROMPT_STATE = """
+    () => {
+        const el = document.querySelector('textarea, [contenteditable]');
+        if (!el) return null;
+        return {
+            tag: el.tagName,
+            value: el.tagName === 'TEXTAREA' ? el.value : (el.textContent || '')
+        };
+    }
+"""
+
+# Signs that a generation has started, checked by _wait_for_render_start.
+# Loading indicators
+_LOADING_SELECTORS = (
+    '.loading',
+    '[aria-busy="true"]',
+    '.spinner',
+    '[class*="loading"]',
+    '[class*="Loading"]',
+    '[class*="spinner"]',
+    '[class*="Spinner"]',
+    'svg[class*="spinner"]',
+    'div[class*="progress"]',
+)
+
+# Render/video area
+_RENDER_SELECTORS = (
+    '.render-area',
+    '.video-preview',
+    '[class*="render"]',
+    '[class*="Render"]',
+    '[class*="video-preview"]',
+    '[class*="VideoPreview"]',
+    'video',
+    'canvas',
+)
+
+# Generation status text
+_RENDER_STATUS_TEXTS = (
+    "Generating",
+    "Creating",
+    "Processing",
+    "Đang tạo",  # Vietnamese "Creating"
+    "Đang xử lý",  # Vietnamese "Processing"
+)
+
+# Joined once at import
+_LOADING_UNION = ", ".join(_LOADING_SELECTORS)
+_RENDER_UNION = ", ".join(_RENDER_SELECTORS)
+
+# Checks every render-start signal in one pass and names the first that is present:
+# a visible loading indicator or render area, a locked prompt input, or status text.
+# Argument is [loading union, render union, status texts]; false while none is there.
+_JS_RENDER_STARTED = """
+    ([loadingUnion, renderUnion, statusTexts]) => {
+        const anyVisible = sel => Array.from(document.querySelectorAll(sel))
+            .some(el => el.offsetParent !== null);
+        if (anyVisible(loadingUnion)) return 'loading indicator';
+        if (anyVisible(renderUnion)) return 'render area';
+        const input = document.querySelector('textarea, [contenteditable]');
+        if (input && (input.disabled || input.readOnly || input.hasAttribute('readonly')
+                || input.getAttribute('aria-disabled') === 'true')) {
+            return 'textarea disabled/readonly';
+        }
+        const text = document.body ? document.body.innerText.toLowerCase() : '';
+        const status = statusTexts.find(t => text.includes(t.toLowerCase()));
+        return status ? `generation status: ${status}` : false;
+    }
+"""
+
+# True once the UI reacted to a submit: the prompt text changed (Flow clears it) or a
+# loading indicator became visible. Argument is [prompt text before, loading union].
+_JS_SUBMIT_ACKNOWLEDGED = """
+    ([before, loadingUnion]) => {
+        const el = document.querySelector('textarea, [contenteditable]');
+        const value = el ? (el.tagName === 'TEXTAREA' ? el.value : (el.textContent || '')) : '';
+        if (value !== before) return true;
+        return Array.from(document.querySelectorAll(loadingUnion)).some(e => e.offsetParent !== null);
+    }
+"""
+
+# src of the first visible <video> once it has one, false until then
+_JS_VIDEO_SRC_READY = """
+    () => {
+        const video = document.getElementsByTagName('video')[0];
+        if (video && video.offsetParent !== null && (video.src || video.currentSrc)) {
+            return video.src || video.currentSrc;
+        }
+        return false;
+    }
+"""
+
+# Arrow/circular generate-button fallback: records every visible button for logging
+# and clicks the first arrow-icon or circular-near-input match, in one traversal
+_JS_ARROW_BUTTON_CLICK = r"""
+    () => {
+        // Right-pointing arrow paths (common pattern), compiled once per scan
+        const ARROW_RE = /M[\d.]+ [\d.]+ L[\d.]+ [\d.]+/;
+        const buttons = document.getElementsByTagName('button');
+        const textarea = document.querySelector('textarea, [contenteditable]');
+        const textareaRect = textarea ? textarea.getBoundingClientRect() : null;
+        const candidates = [];
+
+        for (let i = 0; i < buttons.length; i++) {
+            const btn = buttons[i];
+            // Cheap checks first - layout is only read for buttons still in play
+            if (!btn.offsetParent) continue; // Skip hidden buttons
+            const svg = btn.querySelector('svg');
+            const paths = svg ? svg.getElementsByTagName('path') : [];
+            const info = {
+                text: btn.textContent?.trim() || '',
+                ariaLabel: btn.getAttribute('aria-label') || '',
+                enabled: !btn.disabled,
+                isCircular: false,
+                isNearTextarea: false,
+                hasArrow: paths.length > 0
+            };
+            candidates.push(info);
+            if (btn.disabled) continue;
+
+            // Look for buttons with arrow icons (usually the generate button)
+            let type = null;
+            for (const path of paths) {
+                const d = path.getAttribute('d') || '';
+                // Arrow paths typically have M and L commands pointing right
+                // Arrow paths are usually longer, so test the cheap length check
+                // before the regex
+                if (d.includes('M') && (d.includes('L') || d.includes('l')) &&
+                    (d.length > 20 || ARROW_RE.test(d))) {
+                    type = 'arrow_icon';
+                    break;
+                }
+            }
+
+            // Also accept circular buttons near textarea (usually generate button)
+            const btnRect = btn.getBoundingClientRect();
+            if (!type) {
+                // Check if it's circular (width ≈ height)
+                info.isCircular = Math.abs(btnRect.width - btnRect.height) < 10 && btnRect.width > 30;
+                // Check if button is to the right and near the textarea
+                info.isNearTextarea = !!textareaRect &&
+                    btnRect.left > textareaRect.right - 100 && 
+                    btnRect.top > textareaRect.top - 50 &&
+                    btnRect.bottom < textareaRect.bottom + 50;
+                if (info.isNearTextarea && info.isCircular) {
+                    type = 'circular_near_input';
+                }
+            }
+
+            if (type) {
+                info.position = {x: btnRect.x, y: btnRect.y, width: btnRect.width, height: btnRect.height};
+                btn.scrollIntoView({behavior: 'smooth', block: 'center'});
+                btn.click();
+                return {success: true, type: type, buttonInfo: info, candidates: candidates};
+            }
+        }
+
+        return {success: false, candidates: candidates};
+    }
+"""
+
+# Describes the first 20 buttons and every arrow-icon button for the failure log
+_JS_BUTTON_DEBUG_INFO = """
+    () => {
+        const describe = btn => {
+            const rect = btn.getBoundingClientRect();
+            return {
+                text: btn.textContent?.trim() || '',
+                ariaLabel: btn.getAttribute('aria-label') || '',
+                visible: btn.offsetParent !== null,
+                enabled: !btn.disabled,
+                x: rect.x,
+                y: rect.y
+            };
+        };
+        const hasArrow = btn => {
+            const svg = btn.querySelector('svg');
+            if (!svg) return false;
+            for (const path of svg.getElementsByTagName('path')) {
+                const d = path.getAttribute('d') || '';
+                if (d.includes('arrow') || d.includes('M') && d.includes('L')) {
+                    return true;
+                }
+            }
+            return false;
+        };
+        const buttons = Array.from(document.getElementsByTagName('button'));
+        return {
+            buttons: buttons.slice(0, 20).map(describe),
+            arrowButtons: buttons.filter(hasArrow).map(describe)
+        };
+    }
+"""
+
+# Flow messages that mean the generation failed (error strategy 1)
+_SPECIFIC_ERROR_MESSAGES = (
+    "Something went wrong",
+    "You need more AI credits",
+    "Không tải được số tín dụng",  # Vietnamese "Could not load credits"
+    "Rất tiếc, đã xảy ra lỗi!",  # Vietnamese "Unfortunately, an error occurred!"
+    "Unfortunately, an error occurred!",
+    "Generation failed",
+    "Failed to generate",
+    "Error generating video",
+    "Unable to generate",
+)
+
+# (container, text) pairs for error dialogs/toasts (error strategy 2); a container
+# only counts when its text also has one of _ERROR_DIALOG_KEYWORDS
+_ERROR_DIALOG_CHECKS = (
+    ('[role="dialog"]', "Rất tiếc"),  # Google account popup error
+    ('[role="alertdialog"]', "Rất tiếc"),
+    ('[role="dialog"]', "error"),
+    ('[role="alert"]', "failed"),
+    ('[role="alert"]', "error"),
+    ('[aria-live="assertive"]', "error"),
+    ('[aria-live="assertive"]', "failed"),
+)
+_ERROR_DIALOG_KEYWORDS = ("error", "failed", "wrong", "lỗi", "tiếc")
+
+# Known Flow error patterns (lower case) and their category. The body-text scan
+# (error strategy 4) acts on google_popup/credits/insufficient; any match at all makes
+# a detected error text count as a real error.
+_KNOWN_ERROR_PATTERNS = {
+    "rất tiếc, đã xảy ra lỗi": "google_popup",
+    "unfortunately, an error occurred": "google_popup",
+    "không tải được số tín dụng": "credits",
+    "could not load your credits": "generic",
+    "you need more ai credits": "insufficient",
+    "cần thêm tín dụng": "insufficient",
+    "something went wrong": "generic",
+    "generation failed": "generic",
+    "failed to generate": "generic",
+    "error generating": "generic",
+    "unable to generate": "generic",
+    "rất tiếc": "generic",
+    "đã xảy ra lỗi": "generic",
+}
+# One alternation over every pattern, so a text is scanned once instead of once per
+# pattern. Longest first, so "rất tiếc, đã xảy ra lỗi" wins over plain "rất tiếc".
+_KNOWN_ERROR_RE = re.compile(
+    "|".join(re.escape(p) for p in sorted(_KNOWN_ERROR_PATTERNS, key=len, reverse=True)),
+    re.IGNORECASE,
+)
+
+# Strategy 1 messages that come from the Google account popup, which can be closed
+_GOOGLE_POPUP_RE = re.compile(r"Rất tiếc|Unfortunately, an error occurred")
+
+# [pattern, category] pairs for the in-page body scan
+_BODY_ERROR_PATTERNS = [list(item) for item in _KNOWN_ERROR_PATTERNS.items()]
+
+# Error strategy 4: categories of the known error patterns in the body text. Runs in
+# the page so the (possibly large) body text never has to be sent back.
+_JS_BODY_ERROR_SCAN = """
+    (patterns) => {
+        const text = (document.body ? document.body.textContent : '').toLowerCase();
+        const categories = new Set();
+        for (const [pattern, category] of patterns) {
+            if (!categories.has(category) && text.includes(pattern)) categories.add(category);
+        }
+        return Array.from(categories);
+    }
+"""
+
+# Buttons that dismiss the Google account error popup
+_CLOSE_POPUP_SELECTORS = (
+    'button:has-text("Đóng")',
+    'button:has-text("Close")',
+    '[aria-label*="Close"]',
+    '[aria-label*="Đóng"]',
+    'button[class*="close"]',
+    'button[class*="Close"]',
+)
+
+_CLOSE_POPUP_UNION = ", ".join(_CLOSE_POPUP_SELECTORS)
+
+# Elements carrying the full error text once strategy 4 found its category in the body.
+# :text() is the selector-list form of text=, so each group is matched as one union.
+_GOOGLE_ERROR_SELECTORS = (
+    ':text("Rất tiếc, đã xảy ra lỗi!")',
+    ':text("Unfortunately, an error occurred!")',
+    '[role="dialog"]:has-text("Rất tiếc")',
+    '[role="alertdialog"]:has-text("Rất tiếc")',
+)
+_CREDIT_ERROR_SELECTORS = (
+    ':text("Không tải được số tín dụng của bạn")',
+    ':text("Could not load your credits")',
+    '[role="alert"]:has-text("tín dụng")',
+)
+_INSUFFICIENT_CREDIT_SELECTORS = (
+    ':text("You need more AI credits")',
+    ':text("Cần thêm tín dụng AI")',
+)
+_GOOGLE_ERROR_UNION = ", ".join(_GOOGLE_ERROR_SELECTORS)
+_CREDIT_ERROR_UNION = ", ".join(_CREDIT_ERROR_SELECTORS)
+_INSUFFICIENT_CREDIT_UNION = ", ".join(_INSUFFICIENT_CREDIT_SELECTORS)
+
+# Detected error texts that are too generic to count as a failure
+_GENERIC_ERROR_TEXTS = frozenset({"flow", "error", "failed", "loading", "insufficient ai credits"})
+
+# Locator fallbacks for _JS_COMPLETION_PROBE, in the order the probe checks them
+_VIDEO_SELECTORS = ("video", "video[src]", "iframe[src*='video']")
+_VIDEO_URL_ATTRS = ("src", "data-src", "data-url", "poster")
+_DOWNLOAD_SELECTORS = (
+    'button:has-text("Download")',
+    'button:has-text("Tải xuống")',  # Vietnamese "Download"
+    'a[download]',
+    '[aria-label*="download" i]',
+    '[class*="download" i]',
+)
+_PREVIEW_SELECTORS = ('[class*="preview" i]', '[class*="thumbnail" i]', 'img[alt*="video" i]')
+_ERROR_MESSAGE_LOCATORS = tuple(f"text={message}" for message in _SPECIFIC_ERROR_MESSAGES)
+_ERROR_DIALOG_LOCATORS = tuple(
+    f'{selector}:has-text("{needle}")' for selector, needle in _ERROR_DIALOG_CHECKS
+)
+
+# Everything wait_for_completion checks on one poll, in one pass. Argument is
+# [error messages, dialog checks, dialog keywords, configured error selector or null,
+# whether to run the error checks, fingerprint of the last clean error scan or null].
+# Text matching mirrors Playwright's text=/has-text (case-insensitive substring) and
+# the length filters the Python side used to apply.
+_JS_COMPLETION_PROBE = """
+    ([errorMessages, dialogChecks, dialogKeywords, configuredSelector, checkErrors, lastFingerprint]) => {
+        const isVisible = el => !!el && el.getClientRects().length > 0
+            && getComputedStyle(el).visibility !== 'hidden';
+        const result = {
+            videos: 0, video_url: null, video_pending: false, download: null, preview: false,
+            error_message: null, error_dialog: null, configured_error: null
+        };
+
+        // Video: src (or poster) of a visible video that has content
+        const videos = document.getElementsByTagName('video');
+        for (const video of videos) {
+            if (!video.offsetParent) continue; // Skip hidden videos
+            result.videos++;
+            const src = video.src || video.currentSrc || '';
+            // readyState >= 2 means it has loaded metadata
+            if (video.readyState >= 2 || video.duration > 0 || src) {
+                const url = src || video.poster || '';
+                if (url) {
+                    result.video_url = url;
+                    return result;
+                }
+                result.video_pending = true;
+            }
+        }
+
+        // Download button or link
+        const downloads = document.querySelectorAll(
+            'button, a, [aria-label*="download" i], [class*="download" i]'
+        );
+        for (const el of downloads) {
+            if (!isVisible(el)) continue;
+            const text = (el.textContent || '').toLowerCase();
+            const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
+            const className = (el.getAttribute('class') || '').toLowerCase();
+            if (el.hasAttribute('download') || text.includes('download') || text.includes('tải xuống')
+                    || ariaLabel.includes('download') || className.includes('download')) {
+                result.download = (el.textContent || '').trim();
+                return result;
+            }
+        }
+
+        // Video preview/thumbnail
+        const previews = document.querySelectorAll(
+            '[class*="preview" i], [class*="thumbnail" i], img[alt*="video" i]'
+        );
+        for (const el of previews) {
+            if (!isVisible(el)) continue;
+            const alt = (el.getAttribute('alt') || '').toLowerCase();
+            if (el.getAttribute('src') || alt.includes('video')) {
+                result.preview = true;
+                break;
+            }
+        }
+
+        if (!checkErrors) return result;
+
+        // Cheap page fingerprint; the error checks are skipped while it matches the
+        // fingerprint of the last scan that found nothing. Dialogs and toasts are often
+        // already in the DOM and only shown via class/style/hidden, so their visible
+        // count is part of it.
+        const body = document.body;
+        let visibleDialogs = 0;
+        const dialogSelector = ['[role="dialog"]', '[role="alertdialog"]', '[role="alert"]']
+            .concat(dialogChecks.map(([selector]) => selector)).join(', ');
+        for (const el of document.querySelectorAll(dialogSelector)) {
+            if (isVisible(el)) visibleDialogs++;
+        }
+        result.fingerprint = body
+            ? body.getElementsByTagName('*').length + '|' + body.textContent.length + '|' + visibleDialogs
+            : '';
+        if (result.fingerprint === lastFingerprint) {
+            result.unchanged = true;
+            return result;
+        }
+
+        // Strategy 1: smallest visible element holding a specific error message
+        const bodyText = (document.body ? document.body.innerText : '').toLowerCase();
+        const messages = errorMessages.map(m => m.toLowerCase()).filter(m => bodyText.includes(m));
+        if (messages.length) {
+            const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+            for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+                const text = node.textContent.toLowerCase();
+                if (!messages.some(m => text.includes(m))) continue;
+                const el = node.parentElement;
+                const full = (el && el.textContent || '').trim();
+                if (isVisible(el) && full.length > 10) {
+                    result.error_message = full;
+                    return result;
+                }
+            }
+        }
+
+        // Strategy 2: error dialogs/toasts
+        for (const [selector, needle] of dialogChecks) {
+            for (const el of document.querySelectorAll(selector)) {
+                const text = (el.textContent || '').trim();
+                const lower = text.toLowerCase();
+                if (isVisible(el) && lower.includes(needle.toLowerCase()) && text.length > 15
+                        && dialogKeywords.some(k => lower.includes(k))) {
+                    result.error_dialog = text;
+                    return result;
+                }
+            }
+        }
+
+        // Strategy 3: configured error selector (may be Playwright-only syntax)
+        if (configuredSelector) {
+            try {
+                const el = document.querySelector(configuredSelector);
+                const text = (el && el.textContent || '').trim();
+                if (isVisible(el) && text.length > 10) result.configured_error = text;
+            } catch (e) {}
+        }
+        return result;
+    }
+"""
+
+# The error-check arguments of _JS_COMPLETION_PROBE, converted to JSON-ready lists once
+_PROBE_ERROR_ARGS = (
+    list(_SPECIFIC_ERROR_MESSAGES),
+    [list(pair) for pair in _ERROR_DIALOG_CHECKS],
+    list(_ERROR_DIALOG_KEYWORDS),
+)
+
+# Cheap wake-up check for the gap between completion probes: a video src, a download
+# control or one of the error messages showing up. Argument is [error messages, last
+# signal seen]; returns {video} once a src is set, or {signal} for a download/error
+# signal that differs from the last one, so a signal the probe already rejected does
+# not wake the loop again.
+_JS_COMPLETION_SIGNAL = """
+    ([errorMessages, lastSignal]) => {
+        const video = document.getElementsByTagName('video')[0];
+        if (video && video.offsetParent !== null && (video.src || video.currentSrc)) {
+            return {video: video.src || video.currentSrc};
+        }
+        let signal = null;
+        if (document.querySelector('a[download], [aria-label*="download" i]')) {
+            signal = 'download';
+        } else {
+            const text = document.body ? document.body.textContent : '';
+            const message = errorMessages.find(m => text.includes(m));
+            if (message) signal = 'error:' + message;
+        }
+        return signal && signal !== lastSignal ? {signal} : false;
+    }
+"""
+
+# Ceiling (seconds) for the backed-off wait_for_completion poll interval
+_MAX_POLL_INTERVAL = 5.0
+
+# Help/icon/menu/settings buttons are NOT generate buttons; one case-insensitive scan
+_EXCLUDE_RE = re.compile(r"help|icon|menu|settings", re.IGNORECASE)
+
+# Fallback generate-button selectors, in priority order. All are plain CSS so the
+# whole list can be matched in-page in one pass; buttons whose text contains one of
+# _GEN_BUTTON_TEXTS rank ahead of any selector match.
+# Based on image 2, the generate button is a circular button with right-pointing arrow
+_GEN_BUTTON_TEXTS = ("Generate", "Create")
+_GEN_BUTTON_SELECTORS = (
+    # Arrow/icon-based selectors (circular button with arrow)
+    'button:has(svg[class*="arrow"])',
+    'button:has(svg[class*="Arrow"])',
+    'button:has(svg path[d*="arrow"])',
+    'button[class*="arrow"]',
+    'button[class*="Arrow"]',
+    # Circular button selectors
+    'button[class*="circle"]',
+    'button[class*="circular"]',
+    'button[class*="round"]',
+    # Aria labels
+    'button[aria-label*="Generate"]',
+    'button[aria-label*="Create"]',
+    'button[aria-label*="Submit"]',
+    'button[aria-label*="Send"]',
+    # Type and data attributes
+    'button[type="submit"]',
+    'button[data-testid*="generate"]',
+    'button[data-testid*="create"]',
+    'button[data-testid*="submit"]',
+    # Class-based selectors
+    'button.primary',
+    'button[class*="primary"]',
+    'button[class*="generate"]',
+    'button[class*="create"]',
+    'button[class*="submit"]',
+    # Look for buttons near the prompt input (usually at bottom right)
+    'textarea ~ button',
+    '[contenteditable] ~ button',
+    '[role="textbox"] ~ button',
+)
+_GEN_BUTTON_UNION = ", ".join(_GEN_BUTTON_SELECTORS)
+
+# True once React has committed the prompt and rendered an enabled generate button
+_JS_GEN_BUTTON_READY = """
+    (union) => Array.from(document.querySelectorAll(union))
+        .some(btn => btn.offsetParent !== null && !btn.disabled)
+"""
+
+# Every fallback candidate, text matches included, as one Playwright locator. Its
+# evaluate_all() results line up with locator.nth(), so the chosen one can be clicked.
+_GEN_BUTTON_LOCATOR = ", ".join(
+    [f'button:has-text("{text}")' for text in _GEN_BUTTON_TEXTS] + [_GEN_BUTTON_UNION]
+)
+
+# Maps the candidates to their rank, text, visibility, enabled state and size in one
+# evaluate. getBoundingClientRect runs inside a single map, so layout is computed once.
+_JS_GEN_BUTTON_CANDIDATES = """
+    (els, [selectors, texts]) => {
+        const lowerTexts = texts.map(t => t.toLowerCase());
+        return els.map((btn, i) => {
+            const text = (btn.textContent || '').trim();
+            const lower = text.toLowerCase();
+            let rank = lowerTexts.findIndex(t => lower.includes(t));
+            if (rank < 0) {
+                const selIdx = selectors.findIndex(sel => btn.matches(sel));
+                rank = texts.length + (selIdx < 0 ? selectors.length : selIdx);
+            }
+            const visible = btn.offsetParent !== null;
+            const enabled = !btn.disabled;
+            // Only buttons that can be clicked need layout for the size check
+            const rect = visible && enabled ? btn.getBoundingClientRect() : null;
+            return {
+                index: i,
+                rank: rank,
+                text: text.substring(0, 64),
+                visible: visible,
+                enabled: enabled,
+                width: rect ? rect.width : 0,
+                height: rect ? rect.height : 0
+            };
+        });
+    }
+"""
+
+
+# Video downloads stream in chunks of this size instead of buffering the whole file
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Tries per video URL before download_video gives up on it
+_DOWNLOAD_ATTEMPTS = 3
+# Content types that mean a video URL served a page or a thumbnail, not the video
+_NON_VIDEO_CONTENT_TYPES = ("text/", "image/", "application/json")
+
+# (event loop, client) shared by every download on that loop, so connections and TLS
+# sessions are reused across scenes; the Celery worker may replace a closed loop
+_http_client = None
+
+
+async def _get_http_client() -> httpx.AsyncClient:
+    """Shared httpx client for the running event loop, created on first use"""
+    global _http_client
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client[0] is not loop or _http_client[1].is_closed:
+        stale = _http_client
+        _http_client = (loop, httpx.AsyncClient(
+            timeout=60.0, follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        ))
+        # Release the replaced client's connection pool
+        if stale is not None and not stale[1].is_closed:
+            try:
+                await stale[1].aclose()
+            except Exception as e:
+                logger.debug(f"Could not close replaced HTTP client: {e}")
+    return _http_client[1]
+
+
+async def close_http_client() -> None:
+    """Close the shared download client (worker shutdown)"""
+    global _http_client
+    stale, _http_client = _http_client, None
+    if stale is not None and not stale[1].is_closed:
+        await stale[1].aclose()
+
 
 def get_screenshot_path(filename: str) -> str:
     """Get path for screenshot in images directory"""
@@ -21,11 +777,49 @@ def get_screenshot_path(filename: str) -> str:
     return str(images_dir / filename)
 
 
+def _debug_screenshots_enabled() -> bool:
+    """Failure screenshots are costly PNG encodes, so only take them when asked for"""
+    return settings.DEBUG_SCREENSHOTS or logger.isEnabledFor(logging.DEBUG)
+
+
+def _prompt_landed(value, prompt: str) -> bool:
+    """Check whether the text read back from the input looks like the injected prompt"""
+    return bool(value) and (prompt[:20] in str(value) or len(str(value)) > len(prompt) * 0.8)
+
+
+async def _settle(page: Page, js_expr: str, arg=None, timeout: int = 2000,
+                  polling="mutation") -> bool:
+    """Wait until js_expr is truthy in the page instead of sleeping a fixed time.
+
+    Polls on DOM mutations by default, which costs nothing while the page is idle.
+    Pass polling="raf" for conditions that change without a DOM mutation (focus,
+    an input's value property). Returns False on timeout so callers can carry on
+    exactly as they did after a sleep.
+    """
+    try:
+        await page.wait_for_function(js_expr, arg=arg, timeout=timeout, polling=polling)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
 class FlowController:
     """Controls interaction with Google Flow UI"""
     
     def __init__(self, browser_manager):
         self.browser_manager = browser_manager
+        # Configured generate-button selector that last worked; tried first on later generations
+        self._resolved_generate_selector: Optional[str] = None
+        # Prompt-input selector that last worked; tried first on later injections
+        self._last_prompt_selector: Optional[str] = None
+        # (page, locator, read_prompt) for the prompt input, dropped on navigation
+        self._prompt_input_cache = None
+        # Completion/download selectors from config; FLOW_SELECTORS is fixed at import
+        self._sel_video = FLOW_SELECTORS.get("videoElement", "video")
+        self._sel_download = FLOW_SELECTORS.get("downloadButton", "button")
+        error_selector = FLOW_SELECTORS.get("errorMessage", ".error")
+        # Only check if it's a specific error class, not generic ".error"
+        self._sel_error: Optional[str] = error_selector if error_selector != ".error" else None
     
     async def navigate_to_flow(self, page: Page) -> None:
         """Navigate to Flow project page and wait for UI to load"""
@@ -127,7 +921,7 @@ class FlowController:
                             screenshot_path = get_screenshot_path(f"flow_login_redirect_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
                             await page.screenshot(path=screenshot_path, full_page=True)
                             logger.warning(f"Login redirect screenshot saved to {screenshot_path}")
-                        except:
+                        except Exception:
                             pass
                         
                         # FIX: Handle login redirect properly
@@ -216,7 +1010,7 @@ class FlowController:
                                             cookies = await page.context.cookies()
                                             google_cookies = [c for c in cookies if "google.com" in c.get("domain", "")]
                                             logger.info(f"Session has {len(cookies)} cookies ({len(google_cookies)} Google cookies) after login")
-                                        except:
+                                        except Exception:
                                             pass
                                     else:
                                         logger.warning("Login status verification failed - but continuing anyway")
@@ -297,7 +1091,7 @@ class FlowController:
                         try:
                             if not page.is_closed():
                                 await page.reload(wait_until="domcontentloaded", timeout=30000)
-                        except:
+                        except Exception:
                             pass
                     else:
                         # Last attempt or different error - raise it
@@ -312,12 +1106,12 @@ class FlowController:
             try:
                 await page.wait_for_load_state("networkidle", timeout=30000)
                 logger.info("✓ Page network idle")
-            except:
+            except Exception:
                 # If networkidle times out, try domcontentloaded
                 try:
                     await page.wait_for_load_state("domcontentloaded", timeout=10000)
                     logger.info("✓ Page DOM content loaded")
-                except:
+                except Exception:
                     logger.warning("Page load timeout - continuing anyway")
                 # Give it a bit more time
                 await asyncio.sleep(2)
@@ -340,10 +1134,11 @@ class FlowController:
                         return hasReactRoot !== null;
                     }
                     """,
-                    timeout=15000
+                    timeout=15000,
+                    polling="mutation"
                 )
                 logger.info("✓ React app detected")
-            except:
+            except Exception:
                 logger.warning("React detection timeout - continuing anyway")
             
             # Step 3: CRITICAL FIX - Wait for credit information to load (or timeout gracefully)
@@ -411,7 +1206,7 @@ class FlowController:
                         count = await page.locator(indicator).count()
                         if count > 0:
                             gallery_count += count
-                    except:
+                    except Exception:
                         pass
                 
                 # Check for editor indicators (prompt input, textarea)
@@ -429,7 +1224,7 @@ class FlowController:
                         count = await page.locator(indicator).count()
                         if count > 0:
                             editor_count += count
-                    except:
+                    except Exception:
                         pass
                 
                 is_gallery_view = gallery_count > 0 and editor_count == 0
@@ -455,7 +1250,7 @@ class FlowController:
                     state="attached"
                 )
                 logger.info("Interactive elements detected")
-            except:
+            except Exception:
                 logger.warning("No interactive elements found yet - will try anyway")
             
             await asyncio.sleep(2)
@@ -477,7 +1272,7 @@ class FlowController:
                 page_text = ""
                 try:
                     page_text = await page.locator("body").text_content() or ""
-                except:
+                except Exception:
                     pass
                 
                 for error_indicator in error_indicators:
@@ -524,7 +1319,7 @@ class FlowController:
                         needs_login = True
                         logger.warning("Login required - user needs to manually log in")
                         break
-                except:
+                except Exception:
                     continue
             
             if needs_login:
@@ -567,16 +1362,17 @@ class FlowController:
                                 "[aria-label*='New']",
                                 "[aria-label*='Create']"
                             ]
-                            for btn_selector in create_buttons:
-                                if await page.locator(btn_selector).count() > 0:
-                                    logger.info(f"Found create button: {btn_selector}, clicking...")
-                                    await page.locator(btn_selector).first.click()
-                                    await asyncio.sleep(3)
-                                    break
+                            # One union query instead of a count() per selector; when
+                            # nothing matches (the common case) we skip straight past
+                            create_button = page.locator(", ".join(create_buttons)).first
+                            if await create_button.count() > 0:
+                                logger.info("Found create button, clicking...")
+                                await create_button.click()
+                                await asyncio.sleep(3)
                         except Exception as e:
                             logger.debug(f"Could not find/create project button: {e}")
                         break
-                except:
+                except Exception:
                     continue
             
             # Wait for main UI elements with multiple fallbacks
@@ -599,14 +1395,14 @@ class FlowController:
                     element_found = True
                     logger.info(f"Found element with selector: {selector}")
                     break
-                except:
+                except Exception:
                     # If attached fails, try visible as fallback
                     try:
                         await page.wait_for_selector(selector, timeout=5000, state="visible")
                         element_found = True
                         logger.info(f"Found visible element with selector: {selector}")
                         break
-                    except:
+                    except Exception:
                         continue
             
             # If no elements found, check if we're at least on the Flow page
@@ -623,7 +1419,7 @@ class FlowController:
                         if body > 0:
                             logger.info("Body element found - page is loaded, continuing")
                             element_found = True
-                    except:
+                    except Exception:
                         pass
                 
                 if not element_found:
@@ -636,7 +1432,7 @@ class FlowController:
                         page_title = await page.title()
                         page_url = page.url
                         logger.error(f"Page title: {page_title}, URL: {page_url}")
-                    except:
+                    except Exception:
                         pass
                     raise Exception("Could not find any page elements - page may not have loaded")
             
@@ -669,7 +1465,7 @@ class FlowController:
                                     await close_btn.click()
                                     await asyncio.sleep(1)
                                     logger.info("Closed Google account popup error")
-                            except:
+                            except Exception:
                                 pass
                             
                             # Take screenshot for debugging
@@ -740,7 +1536,7 @@ class FlowController:
                                                     if await close_btn.count() > 0 and await close_btn.is_visible():
                                                         await close_btn.click()
                                                         await asyncio.sleep(1)
-                                                except:
+                                                except Exception:
                                                     pass
                                                 
                                                 # Refresh the page to retry credit loading
@@ -778,7 +1574,7 @@ class FlowController:
                                                     await close_btn.click()
                                                     await asyncio.sleep(1)
                                                     logger.info("Closed credit loading error popup")
-                                            except:
+                                            except Exception:
                                                 pass
                                             
                                             # Take screenshot for debugging
@@ -813,7 +1609,7 @@ class FlowController:
                             if persistent_error > 0:
                                 logger.warning("Credit loading error detected in page body text (persistent)")
                                 logger.warning("Profile loaded but credit information may not be available")
-                    except:
+                    except Exception:
                         pass
             except Exception as credit_error_check_error:
                 logger.debug(f"Could not check for credit loading errors: {credit_error_check_error}")
@@ -838,7 +1634,7 @@ class FlowController:
                                 has_ultra = True
                                 logger.info(f"✓ ULTRA badge detected: {ultra_text[:50]}")
                                 break
-                    except:
+                    except Exception:
                         continue
                 
                 if not has_ultra:
@@ -866,7 +1662,7 @@ class FlowController:
                             await close_btn.click()
                             await asyncio.sleep(1)
                             break
-                    except:
+                    except Exception:
                         continue
             except Exception as e:
                 logger.debug(f"Could not dismiss error banners: {e}")
@@ -908,7 +1704,7 @@ class FlowController:
                     page_url = page.url if page else "unknown"
                     page_title = await page.title() if page else "unknown"
                     detailed_error = f"Failed to navigate to Flow: {error_type}: {error_msg} (URL: {page_url}, Title: {page_title})"
-                except:
+                except Exception:
                     pass
             
             logger.error(detailed_error, exc_info=True)
@@ -919,7 +1715,7 @@ class FlowController:
                 await page.screenshot(path=screenshot_path, full_page=True)
                 logger.error(f"Error screenshot saved to {screenshot_path}")
                 detailed_error += f" (Screenshot: {screenshot_path})"
-            except:
+            except Exception:
                 pass
             
             # Re-raise with detailed error message
@@ -954,7 +1750,7 @@ class FlowController:
                         has_input = True
                         logger.info(f"Found input with selector: {selector}")
                         break
-                except:
+                except Exception:
                     continue
             
             has_button = False
@@ -965,7 +1761,7 @@ class FlowController:
                         has_button = True
                         logger.info(f"Found button with selector: {selector}")
                         break
-                except:
+                except Exception:
                     continue
             
             # More lenient: just need an input OR button (not both)
@@ -986,6 +1782,8 @@ class FlowController:
                        editor without leftover prompts/state from previous runs.
         """
         logger.info(f"[ensure_new_project] Checking if we need to create a new project (force_new={force_new})...")
+        # One timestamp per call so all debug screenshots from this run share a suffix
+        screenshot_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # Wait a bit for page to settle
         await asyncio.sleep(2)
@@ -1009,7 +1807,7 @@ class FlowController:
                         if is_visible:
                             visible_inputs.append(selector)
                             in_editor = True
-                except:
+                except Exception:
                     continue
             
             if in_editor:
@@ -1048,7 +1846,7 @@ class FlowController:
                                     await asyncio.sleep(3)  # Wait for navigation
                                     navigated_to_gallery = True
                                     break
-                            except:
+                            except Exception:
                                 continue
                         
                         if not navigated_to_gallery:
@@ -1061,7 +1859,7 @@ class FlowController:
                     except Exception as nav_error:
                         logger.warning(f"Failed to navigate to gallery from editor: {nav_error}, will try to proceed anyway")
         except Exception as editor_check_error:
-            logger.debug(f"Error checking editor state: {editor_check_error}")
+            logger.debug("Error checking editor state: %s", editor_check_error)
         
         # FIX 2: Explicitly check for gallery view
         logger.info("Checking if we're on gallery/project grid view...")
@@ -1076,25 +1874,25 @@ class FlowController:
                 'img[alt*="project"]'
             ]
             
-            for indicator in gallery_indicators:
-                try:
-                    count = await page.locator(indicator).count()
-                    if count > 0:
-                        is_gallery = True
-                        logger.info(f"✓ Detected gallery view (found indicator: {indicator})")
-                        break
-                except:
-                    continue
+            # Combine all indicators with or_() so the browser resolves them in a
+            # single query instead of one round trip per selector
+            gallery_locator = page.locator(gallery_indicators[0])
+            for indicator in gallery_indicators[1:]:
+                gallery_locator = gallery_locator.or_(page.locator(indicator))
+            
+            if await gallery_locator.count() > 0:
+                is_gallery = True
+                logger.info("✓ Detected gallery view")
         except Exception as gallery_check_error:
-            logger.debug(f"Error checking gallery state: {gallery_check_error}")
+            logger.debug("Error checking gallery state: %s", gallery_check_error)
         
         if not is_gallery and not in_editor:
             logger.warning("Unknown page state - taking screenshot for debugging...")
             try:
-                screenshot_path = get_screenshot_path(f"unknown_page_state_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+                screenshot_path = get_screenshot_path(f"unknown_page_state_{screenshot_ts}.png")
                 await page.screenshot(path=screenshot_path, full_page=True)
                 logger.warning(f"Screenshot saved to {screenshot_path}")
-            except:
+            except Exception:
                 pass
         
         # FIX 3: Enhanced "New project" button detection
@@ -1131,7 +1929,7 @@ class FlowController:
         
         for selector in new_project_selectors:
             try:
-                logger.debug(f"Trying new project selector: {selector}")
+                logger.debug("Trying new project selector: %s", selector)
                 button = page.locator(selector).first
                 count = await button.count()
                 
@@ -1142,12 +1940,12 @@ class FlowController:
                     try:
                         is_visible = await button.is_visible()
                         is_enabled = await button.is_enabled()
-                    except:
+                    except Exception:
                         # Try alternative visibility check
                         try:
                             bounding_box = await button.bounding_box()
                             is_visible = bounding_box is not None
-                        except:
+                        except Exception:
                             pass
                     
                     if is_visible and is_enabled:
@@ -1156,12 +1954,12 @@ class FlowController:
                         try:
                             button_text = (await button.text_content() or "").strip()
                             aria_label = (await button.get_attribute("aria-label") or "").strip()
-                        except:
+                        except Exception:
                             pass
                         
                         # Additional check: make sure it's not just a close button or other UI element
                         if button_text and any(skip in button_text.lower() for skip in ['đóng', 'close', 'cancel', 'x']):
-                            logger.debug(f"Skipping button with text '{button_text}' (appears to be close/cancel)")
+                            logger.debug("Skipping button with text '%s' (appears to be close/cancel)", button_text)
                             continue
                         
                         logger.info(f"Found new project button: '{button_text or aria_label}' (selector: {selector})")
@@ -1172,32 +1970,39 @@ class FlowController:
                             await button.scroll_into_view_if_needed()
                             await asyncio.sleep(0.5)
                             
-                            # Try to get button position for debugging
-                            try:
-                                box = await button.bounding_box()
-                                if box:
-                                    logger.debug(f"Button position: x={box['x']:.0f}, y={box['y']:.0f}, width={box['width']:.0f}, height={box['height']:.0f}")
-                            except:
-                                pass
+                            # Try to get button position for debugging (skip the
+                            # extra round trip entirely when debug logging is off)
+                            if logger.isEnabledFor(logging.DEBUG):
+                                try:
+                                    box = await button.bounding_box()
+                                    if box:
+                                        logger.debug(
+                                            "Button position: x=%.0f, y=%.0f, width=%.0f, height=%.0f",
+                                            box['x'], box['y'], box['width'], box['height'],
+                                        )
+                                except Exception:
+                                    pass
                         except Exception as scroll_error:
-                            logger.debug(f"Scroll failed: {scroll_error}, trying JavaScript scroll...")
+                            logger.debug("Scroll failed: %s, trying JavaScript scroll...", scroll_error)
                             try:
                                 await button.evaluate("el => el.scrollIntoView({behavior: 'smooth', block: 'center'})")
                                 await asyncio.sleep(0.5)
-                            except:
+                            except Exception:
                                 pass
                         
                         # Click the button with retry logic
                         clicked = False
                         for click_attempt in range(3):
                             try:
-                                await button.click(timeout=5000)
+                                # Visibility/enabled state was verified and the button scrolled
+                                # into view above, so skip Playwright's actionability checks
+                                await button.click(timeout=5000, force=True, no_wait_after=True)
                                 clicked = True
                                 logger.info(f"✓ Clicked new project button (attempt {click_attempt + 1})")
                                 break
                             except Exception as click_error:
                                 if click_attempt < 2:
-                                    logger.debug(f"Click attempt {click_attempt + 1} failed: {click_error}, retrying...")
+                                    logger.debug("Click attempt %d failed: %s, retrying...", click_attempt + 1, click_error)
                                     await asyncio.sleep(0.5)
                                 else:
                                     # Last attempt: try JavaScript click
@@ -1206,7 +2011,7 @@ class FlowController:
                                         clicked = True
                                         logger.info("✓ Clicked new project button (via JavaScript)")
                                         break
-                                    except:
+                                    except Exception:
                                         raise click_error
                         
                         if not clicked:
@@ -1232,9 +2037,9 @@ class FlowController:
                                             logger.info(f"✓ Successfully navigated to editor view (found {input_selector})")
                                             await asyncio.sleep(2)  # Additional wait for UI to settle
                                             return
-                                        except:
-                                            logger.debug(f"Found {input_selector} but not interactive yet")
-                            except:
+                                        except Exception:
+                                            logger.debug("Found %s but not interactive yet", input_selector)
+                            except Exception:
                                 continue
                         
                         if not editor_found:
@@ -1248,117 +2053,34 @@ class FlowController:
                                         logger.info(f"✓ Editor found after additional wait ({input_selector})")
                                         await asyncio.sleep(2)
                                         return
-                                except:
+                                except Exception:
                                     continue
                             
                             # FIX 5: Take screenshot if editor still not found
                             logger.warning("Editor still not found after clicking new project - taking screenshot...")
                             try:
-                                screenshot_path = get_screenshot_path(f"new_project_clicked_no_editor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+                                screenshot_path = get_screenshot_path(f"new_project_clicked_no_editor_{screenshot_ts}.png")
                                 await page.screenshot(path=screenshot_path, full_page=True)
                                 logger.warning(f"Screenshot saved to {screenshot_path}")
-                            except:
+                            except Exception:
                                 pass
                             
                             logger.warning("Continuing anyway - editor may load later")
                             await asyncio.sleep(2)
                             return
             except Exception as e:
-                logger.debug(f"Selector '{selector}' failed: {e}")
+                logger.debug("Selector '%s' failed: %s", selector, e)
                 continue
         
-        # If no new project button found, try JavaScript-based search
-        logger.info("No new project button found with selectors - trying JavaScript search...")
-        try:
-            # Use JavaScript to find elements containing "Dự án mới" or "New project"
-            found_button = await page.evaluate("""
-                () => {
-                    const searchTexts = ['Dự án mới', 'New project', 'New Project', 'Tạo mới'];
-                    const allElements = document.querySelectorAll('button, a, [role="button"], [onclick]');
-                    
-                    for (const el of allElements) {
-                        const text = (el.textContent || el.innerText || '').trim();
-                        const ariaLabel = (el.getAttribute('aria-label') || '').trim();
-                        
-                        for (const searchText of searchTexts) {
-                            if (text.includes(searchText) || ariaLabel.includes(searchText)) {
-                                // Make sure it's not a close/cancel button
-                                if (!text.toLowerCase().includes('đóng') && 
-                                    !text.toLowerCase().includes('close') &&
-                                    !text.toLowerCase().includes('cancel')) {
-                                    return {
-                                        found: true,
-                                        tagName: el.tagName,
-                                        text: text.substring(0, 50),
-                                        id: el.id || '',
-                                        className: el.className || ''
-                                    };
-                                }
-                            }
-                        }
-                    }
-                    return {found: false};
-                }
-            """)
-            
-            if found_button.get('found'):
-                logger.info(f"JavaScript found potential new project button: {found_button.get('text')}")
-                # Try to click it using JavaScript directly
-                try:
-                    clicked = await page.evaluate("""
-                        () => {
-                            const searchTexts = ['Dự án mới', 'New project', 'New Project', 'Tạo mới'];
-                            const allElements = document.querySelectorAll('button, a, [role="button"], [onclick]');
-                            
-                            for (const el of allElements) {
-                                const text = (el.textContent || el.innerText || '').trim();
-                                const ariaLabel = (el.getAttribute('aria-label') || '').trim();
-                                
-                                for (const searchText of searchTexts) {
-                                    if (text.includes(searchText) || ariaLabel.includes(searchText)) {
-                                        if (!text.toLowerCase().includes('đóng') && 
-                                            !text.toLowerCase().includes('close') &&
-                                            !text.toLowerCase().includes('cancel')) {
-                                            // Scroll into view and click
-                                            el.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                            el.click();
-                                            return true;
-                                        }
-                                    }
-                                }
-                            }
-                            return false;
-                        }
-                    """)
-                    
-                    if clicked:
-                        logger.info("✓ Clicked new project button (found via JavaScript)")
-                        await asyncio.sleep(3)
-                        
-                        # Verify editor loaded
-                        for input_selector in ["textarea", "[contenteditable='true']", "[role='textbox']"]:
-                            try:
-                                input_elem = page.locator(input_selector).first
-                                if await input_elem.count() > 0:
-                                    logger.info("✓ Successfully navigated to editor view")
-                                    await asyncio.sleep(2)
-                                    return
-                            except:
-                                continue
-                except Exception as js_error:
-                    logger.debug(f"JavaScript click failed: {js_error}")
-        except Exception as js_search_error:
-            logger.debug(f"JavaScript search failed: {js_search_error}")
-        
         # FIX 5: Enhanced fallback with better error reporting
         logger.warning("No new project button found with standard selectors - trying enhanced search...")
         
         # Take screenshot for debugging
         try:
-            screenshot_path = get_screenshot_path(f"no_new_project_button_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+            screenshot_path = get_screenshot_path(f"no_new_project_button_{screenshot_ts}.png")
             await page.screenshot(path=screenshot_path, full_page=True)
             logger.warning(f"Debug screenshot saved to {screenshot_path}")
-        except:
+        except Exception:
             pass
         
         # Enhanced JavaScript search with more patterns
@@ -1444,12 +2166,12 @@ class FlowController:
                                         logger.info("✓ Successfully navigated to editor view")
                                         await asyncio.sleep(2)
                                         return
-                                except:
+                                except Exception:
                                     continue
                 except Exception as js_click_error:
-                    logger.debug(f"JavaScript-based click failed: {js_click_error}")
+                    logger.debug("JavaScript-based click failed: %s", js_click_error)
         except Exception as js_search_error:
-            logger.debug(f"Enhanced JavaScript search failed: {js_search_error}")
+            logger.debug("Enhanced JavaScript search failed: %s", js_search_error)
         
         # Final check: are we already in editor?
         logger.info("Final check: verifying if we're already in editor...")
@@ -1463,9 +2185,9 @@ class FlowController:
                         if is_visible:
                             logger.info(f"✓ Already in editor view (found {input_selector}) - no new project needed")
                             return
-                except:
+                except Exception:
                     continue
-        except:
+        except Exception:
             pass
         
         # FIX 5: Log detailed error with page state
@@ -1473,18 +2195,20 @@ class FlowController:
         logger.error("Current page state:")
         try:
             current_url = page.url
-            page_title = await page.title()
+            # These probes are independent - run them concurrently instead of serially
+            page_title, button_count, textarea_count, card_count = await asyncio.gather(
+                page.title(),
+                page.locator("button").count(),
+                page.locator("textarea").count(),
+                page.locator('[class*="card"]').count(),
+                return_exceptions=True,
+            )
             logger.error(f"  URL: {current_url}")
             logger.error(f"  Title: {page_title}")
-            
-            # Count various elements
-            button_count = await page.locator("button").count()
-            textarea_count = await page.locator("textarea").count()
-            card_count = await page.locator('[class*="card"]').count()
             logger.error(f"  Buttons found: {button_count}")
             logger.error(f"  Textareas found: {textarea_count}")
             logger.error(f"  Cards found: {card_count}")
-        except:
+        except Exception:
             pass
         
         # Don't fail completely - maybe the page will work anyway
@@ -1495,25 +2219,18 @@ class FlowController:
         """Inject prompt text into Flow input field"""
         logger.info(f"Attempting to inject prompt (length: {len(prompt)})")
         
-        # Wait longer for React to fully render (Flow is a complex React app)
+        # Wait for React to render an input (Flow is a complex React app) - returns as
+        # soon as one is attached instead of sleeping a fixed amount first
         logger.info("Waiting for React app to fully render...")
-        await asyncio.sleep(5)
-        
-        # Try to wait for React to finish rendering by checking for interactive elements
-        max_wait = 30  # Wait up to 30 seconds
-        for i in range(max_wait):
-            try:
-                # Check if any input elements exist
-                textarea_count = await page.locator("textarea").count()
-                contenteditable_count = await page.locator("[contenteditable]").count()
-                textbox_count = await page.locator("[role='textbox']").count()
-                
-                if textarea_count > 0 or contenteditable_count > 0 or textbox_count > 0:
-                    logger.info(f"Found interactive elements after {i+1} seconds")
-                    break
-            except:
-                pass
-            await asyncio.sleep(1)
+        try:
+            await page.wait_for_selector(
+                "textarea, [contenteditable], [role='textbox']",
+                state="attached",
+                timeout=35000
+            )
+            logger.info("Found interactive elements")
+        except PlaywrightTimeoutError:
+            logger.warning("No interactive elements appeared within 35 seconds, trying selectors anyway...")
         
         # First, try to find all possible input elements and log them
         try:
@@ -1528,7 +2245,7 @@ class FlowController:
                     is_visible = await ta.is_visible()
                     placeholder = await ta.get_attribute("placeholder")
                     logger.debug(f"Textarea {i}: visible={is_visible}, placeholder={placeholder}")
-                except:
+                except Exception:
                     pass
         except Exception as e:
             logger.debug(f"Error finding elements: {e}")
@@ -1549,6 +2266,12 @@ class FlowController:
             "input[type='search']"
         ]
         
+        # The same selector wins for the whole session, so try it before the sweep
+        if self._last_prompt_selector:
+            selectors = [self._last_prompt_selector] + [
+                s for s in selectors if s != self._last_prompt_selector
+            ]
+        
         for selector in selectors:
             try:
                 logger.debug(f"Trying selector: {selector}")
@@ -1561,63 +2284,11 @@ class FlowController:
                     
                     if not is_visible:
                         logger.debug("Element not visible, trying multiple strategies to make it visible...")
-                        
-                        # Strategy 1: Scroll into view
+                        # All reveal strategies run in-page in one evaluate call
                         try:
-                            await input_element.scroll_into_view_if_needed()
-                            await asyncio.sleep(0.5)
-                            is_visible = await input_element.is_visible()
-                        except:
-                            pass
-                        
-                        # Strategy 2: Try to click parent or container to reveal
-                        if not is_visible:
-                            try:
-                                # Look for parent containers that might need clicking
-                                parent = input_element.locator("..")
-                                if await parent.count() > 0:
-                                    await parent.first.click()
-                                    await asyncio.sleep(0.5)
-                                    is_visible = await input_element.is_visible()
-                            except:
-                                pass
-                        
-                        # Strategy 3: Try clicking common "New" or "Create" buttons
-                        if not is_visible:
-                            try:
-                                create_buttons = [
-                                    "button:has-text('New')",
-                                    "button:has-text('Create')",
-                                    "button:has-text('Start')",
-                                    "[aria-label*='New']",
-                                    "[aria-label*='Create']"
-                                ]
-                                for btn_sel in create_buttons:
-                                    if await page.locator(btn_sel).count() > 0:
-                                        await page.locator(btn_sel).first.click()
-                                        await asyncio.sleep(1)
-                                        is_visible = await input_element.is_visible()
-                                        if is_visible:
-                                            break
-                            except:
-                                pass
-                        
-                        # Strategy 4: Try to make visible via JavaScript
-                        if not is_visible:
-                            try:
-                                await input_element.evaluate("""
-                                    el => {
-                                        el.style.display = 'block';
-                                        el.style.visibility = 'visible';
-                                        el.style.opacity = '1';
-                                        el.removeAttribute('hidden');
-                                        el.removeAttribute('aria-hidden');
-                                    }
-                                """)
-                                await asyncio.sleep(0.5)
-                                is_visible = await input_element.is_visible()
-                            except:
-                                pass
+                            is_visible = await input_element.evaluate(_JS_REVEAL)
+                        except Exception as reveal_error:
+                            logger.debug(f"Reveal script failed: {reveal_error}")
                     
                     # Even if not visible, try to interact with it (some elements work when not "visible")
                     if not is_visible:
@@ -1626,127 +2297,121 @@ class FlowController:
                     # Click to focus
                     try:
                         await input_element.click(timeout=5000)
-                        await asyncio.sleep(0.5)
+                        # Proceed as soon as the element (or a child) has focus
+                        await _settle(
+                            page,
+                            _JS_HAS_FOCUS,
+                            arg=await input_element.element_handle(),
+                            timeout=1000,
+                            polling="raf"
+                        )
                     except Exception as e:
                         logger.debug(f"Click failed, trying focus: {e}")
                         try:
                             await input_element.focus()
-                            await asyncio.sleep(0.3)
-                        except:
+                            await asyncio.sleep(0)  # Yield to the event loop only
+                        except Exception:
                             pass
                     
-                    # Clear existing text (try multiple methods)
+                    # Clear existing text in one evaluate; the same setter handles inputs
+                    # (via the native value setter) and contenteditables (via textContent)
                     try:
-                        await input_element.fill("")
-                    except:
-                        try:
-                            await input_element.evaluate("el => el.value = ''")
-                        except:
-                            try:
-                                await input_element.evaluate("el => el.innerText = ''")
-                            except:
-                                pass
+                        await input_element.evaluate(_JS_SET_AND_VERIFY, "")
+                    except Exception as clear_error:
+                        logger.debug(f"Could not clear existing text: {clear_error}")
                     
                     # Fill prompt directly (faster and more reliable than typing character-by-character)
-                    # Use fill() first for speed, fallback to type() only if fill() doesn't work
+                    value = None
                     try:
-                        # Try fill() first - it's much faster and more reliable
                         await input_element.fill(prompt)
                         logger.debug("Used fill() method for prompt injection")
+                        # Wait for the value to land instead of a fixed delay
+                        await _settle(
+                            page,
+                            _JS_HAS_VALUE,
+                            arg=await input_element.element_handle(),
+                            timeout=1000,
+                            polling="raf"
+                        )
+                        value = await input_element.evaluate(_JS_READ_VALUE)
                     except Exception as fill_error:
-                        logger.debug(f"fill() failed: {fill_error}, trying type()...")
-                        # Fallback to type() if fill() doesn't work (for React controlled inputs)
-                        try:
-                            await input_element.type(prompt, delay=10)  # Reduced delay from 50ms to 10ms
-                            logger.debug("Used type() method for prompt injection")
-                        except Exception as type_error:
-                            logger.debug(f"type() failed: {type_error}, trying JavaScript...")
-                            # Fallback to JavaScript direct value setting
-                            try:
-                                await input_element.evaluate(f"el => el.value = {repr(prompt)}")
-                                # Trigger input event for React
-                                await input_element.evaluate("el => el.dispatchEvent(new Event('input', { bubbles: true }))")
-                                logger.debug("Used JavaScript value assignment")
-                            except Exception as js_error:
-                                logger.debug(f"JavaScript value failed: {js_error}, trying innerText...")
-                                try:
-                                    await input_element.evaluate(f"el => el.innerText = {repr(prompt)}")
-                                    await input_element.evaluate("el => el.dispatchEvent(new Event('input', { bubbles: true }))")
-                                    logger.debug("Used JavaScript innerText assignment")
-                                except Exception as inner_error:
-                                    logger.error(f"All text input methods failed: fill={fill_error}, type={type_error}, js={js_error}, inner={inner_error}")
-                                    raise Exception("All text input methods failed")
+                        logger.debug(f"fill() failed: {fill_error}, trying JavaScript...")
                     
-                    await asyncio.sleep(0.5)
+                    if not _prompt_landed(value, prompt):
+                        # Set the value, dispatch input/change and read it back in one evaluate
+                        try:
+                            value = await input_element.evaluate(_JS_SET_AND_VERIFY, prompt)
+                            logger.debug("Used JavaScript value assignment")
+                        except Exception as js_error:
+                            logger.debug(f"JavaScript value failed: {js_error}, trying type()...")
                     
-                    # Verify text was set (try multiple methods)
-                    value = None
-                    try:
-                        value = await input_element.input_value()
-                    except:
+                    if not _prompt_landed(value, prompt):
+                        # Last resort for React controlled inputs that reject direct assignment
                         try:
-                            value = await input_element.evaluate("el => el.value")
-                        except:
-                            try:
-                                value = await input_element.text_content()
-                            except:
-                                try:
-                                    value = await input_element.evaluate("el => el.innerText")
-                                except:
-                                    pass
+                            await input_element.fill("")
+                            await input_element.type(prompt, delay=10)
+                            value = await input_element.evaluate(_JS_READ_VALUE)
+                            logger.debug("Used type() method for prompt injection")
+                        except Exception as type_error:
+                            logger.debug(f"type() failed: {type_error}")
                     
-                    if value and (prompt[:20] in str(value) or len(str(value)) > len(prompt) * 0.8):
+                    if _prompt_landed(value, prompt):
                         logger.info(f"✓ Prompt injected successfully (verified: {len(str(value))} chars)")
-                        # Wait longer to ensure React has processed the input
-                        await asyncio.sleep(1.5)
+                        self._last_prompt_selector = selector
+                        # Wait for React to enable the generate button rather than a fixed
+                        # delay; the timeout matches the old sleep so the worst case is unchanged
+                        await _settle(page, _JS_GEN_BUTTON_READY, arg=_GEN_BUTTON_UNION, timeout=1500)
                         return
                     else:
                         logger.warning(f"Prompt verification failed. Expected ~{len(prompt)} chars, got: {len(str(value)) if value else 0}")
                         logger.debug(f"Value preview: {str(value)[:50] if value else 'None'}")
-                        # Try one more time with fill
-                        try:
-                            await input_element.fill(prompt)
-                            await asyncio.sleep(1)
-                            # Verify again
-                            if is_textarea:
-                                value = await input_element.input_value()
-                            else:
-                                value = await input_element.text_content()
-                            if value and len(str(value)) > len(prompt) * 0.8:
-                                logger.info(f"✓ Prompt re-injected successfully (verified: {len(str(value))} chars)")
-                                await asyncio.sleep(1.5)
-                                return
-                        except:
-                            pass
             except Exception as e:
                 logger.debug(f"Selector {selector} failed: {e}")
                 continue
         
         # Check for iframes - Flow might load content in iframe
         try:
-            iframes = await page.locator("iframe").all()
+            iframes = await page.query_selector_all("iframe")
             if iframes:
                 logger.info(f"Found {len(iframes)} iframe(s), checking for input elements inside...")
-                for i, iframe in enumerate(iframes):
+                
+                async def inspect_iframe(iframe):
+                    iframe_content = await iframe.content_frame()
+                    if not iframe_content:
+                        return None
+                    return await asyncio.gather(
+                        iframe_content.locator("textarea").all(),
+                        iframe_content.locator("[contenteditable]").all(),
+                    )
+                
+                # Inspect all iframes concurrently - time is the slowest iframe, not the sum
+                results = await asyncio.gather(
+                    *(inspect_iframe(iframe) for iframe in iframes),
+                    return_exceptions=True
+                )
+                for i, result in enumerate(results):
+                    if isinstance(result, Exception):
+                        logger.debug(f"Could not access iframe {i}: {result}")
+                        continue
+                    if not result:
+                        continue
+                    iframe_textareas, iframe_contenteditables = result
+                    if not (iframe_textareas or iframe_contenteditables):
+                        continue
                     try:
-                        iframe_content = await iframe.content_frame()
-                        if iframe_content:
-                            iframe_textareas = await iframe_content.locator("textarea").all()
-                            iframe_contenteditables = await iframe_content.locator("[contenteditable]").all()
-                            if iframe_textareas or iframe_contenteditables:
-                                logger.info(f"Found input elements in iframe {i}, switching context...")
-                                # Try to interact with iframe content
-                                target = iframe_textareas[0] if iframe_textareas else iframe_contenteditables[0]
-                                await target.click()
-                                await target.fill(prompt)
-                                # Verify
-                                value = await target.input_value() if iframe_textareas else await target.text_content()
-                                if value and (prompt[:20] in str(value) or len(str(value)) > len(prompt) * 0.8):
-                                    logger.info(f"✓ Prompt injected successfully in iframe (verified: {len(str(value))} chars)")
-                                    await asyncio.sleep(0.5)
-                                    return
+                        logger.info(f"Found input elements in iframe {i}, switching context...")
+                        # Try to interact with iframe content
+                        target = iframe_textareas[0] if iframe_textareas else iframe_contenteditables[0]
+                        await target.click()
+                        await target.fill(prompt)
+                        # Verify
+                        value = await target.input_value() if iframe_textareas else await target.text_content()
+                        if _prompt_landed(value, prompt):
+                            logger.info(f"✓ Prompt injected successfully in iframe (verified: {len(str(value))} chars)")
+                            await asyncio.sleep(0.5)
+                            return
                     except Exception as e:
-                        logger.debug(f"Could not access iframe {i}: {e}")
+                        logger.debug(f"Could not use iframe {i}: {e}")
                         continue
         except Exception as e:
             logger.debug(f"Error checking iframes: {e}")
@@ -1756,96 +2421,19 @@ class FlowController:
             logger.warning("Trying JavaScript-based element detection...")
             
             # Use JavaScript to find and interact with input elements
-            prompt_escaped = prompt.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-            
-            result = await page.evaluate("""
-                () => {
-                    // Count visible input elements
-                    let count = 0;
-                    
-                    // Textareas
-                    document.querySelectorAll('textarea').forEach(el => {
-                        if (el.offsetParent !== null) count++;
-                    });
-                    
-                    // Contenteditables
-                    document.querySelectorAll('[contenteditable]').forEach(el => {
-                        if (el.offsetParent !== null) count++;
-                    });
-                    
-                    // Text inputs
-                    document.querySelectorAll('input[type="text"]').forEach(el => {
-                        if (el.offsetParent !== null) count++;
-                    });
-                    
-                    return {found: count > 0, count: count};
-                }
-            """)
+            result = await page.evaluate(_JS_COUNT_VISIBLE_INPUTS)
             
             if result.get('found'):
                 logger.info(f"JavaScript found {result.get('count')} visible input elements")
                 
                 # Try to set value using JavaScript
-                set_result = await page.evaluate(f"""
-                    () => {{
-                        const prompt = "{prompt_escaped}";
-                        let success = false;
-                        
-                        // Try textareas first
-                        document.querySelectorAll('textarea').forEach(el => {{
-                            if (el.offsetParent !== null && !success) {{
-                                try {{
-                                    el.focus();
-                                    el.value = prompt;
-                                    el.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                                    el.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                                    success = true;
-                                }} catch(e) {{
-                                    console.log('Textarea error:', e);
-                                }}
-                            }}
-                        }});
-                        
-                        // Try contenteditables if textarea didn't work
-                        if (!success) {{
-                            document.querySelectorAll('[contenteditable]').forEach(el => {{
-                                if (el.offsetParent !== null && !success) {{
-                                    try {{
-                                        el.focus();
-                                        el.innerText = prompt;
-                                        el.textContent = prompt;
-                                        el.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                                        success = true;
-                                    }} catch(e) {{
-                                        console.log('Contenteditable error:', e);
-                                    }}
-                                }}
-                            }});
-                        }}
-                        
-                        return success;
-                    }}
-                """)
+                set_result = await page.evaluate(_JS_SET_VISIBLE_PROMPT, prompt)
                 
                 if set_result:
                     logger.info("✓ JavaScript-based prompt injection worked!")
-                    await asyncio.sleep(1)
                     
-                    # Verify it worked
-                    verify = await page.evaluate("""
-                        () => {
-                            let found = false;
-                            document.querySelectorAll('textarea, [contenteditable]').forEach(el => {
-                                if (el.offsetParent !== null) {
-                                    const val = el.value || el.innerText || el.textContent || '';
-                                    if (val.length > 10) {
-                                        found = true;
-                                    }
-                                }
-                            });
-                            return found;
-                        }
-                    """)
+                    # Verify it worked - waits only until the value is observable
+                    verify = await _settle(page, _JS_VISIBLE_PROMPT_SET, polling="raf")
                     
                     if verify:
                         logger.info("✓ Verified: Prompt was set successfully")
@@ -1855,133 +2443,67 @@ class FlowController:
         except Exception as e:
             logger.error(f"JavaScript fallback failed: {e}")
         
-        # Try Playwright fallback one more time with longer waits
+        # Try Playwright fallback one more time on every visible input
         try:
             logger.warning("Final fallback: waiting longer and trying all elements...")
-            await asyncio.sleep(3)
-            
-            # Try textareas first
-            all_textareas = await page.locator("textarea").all()
-            for ta in all_textareas:
-                try:
-                    if await ta.is_visible():
-                        logger.info("Found visible textarea, using as final fallback")
-                        await ta.scroll_into_view_if_needed()
-                        await asyncio.sleep(1)
-                        await ta.click()
-                        await asyncio.sleep(0.5)
-                        await ta.fill(prompt)
-                        await asyncio.sleep(1)
-                        
-                        # Verify
-                        value = await ta.input_value()
-                        if prompt[:20] in str(value) or len(str(value)) > 10:
-                            logger.info("✓ Final fallback textarea worked!")
-                            return
-                except:
-                    continue
-            
-            # Try contenteditables
-            all_contenteditables = await page.locator("[contenteditable]").all()
-            for ce in all_contenteditables:
-                try:
-                    if await ce.is_visible():
-                        logger.info("Found visible contenteditable, using as final fallback")
-                        await ce.scroll_into_view_if_needed()
-                        await asyncio.sleep(1)
-                        await ce.click()
-                        await asyncio.sleep(0.5)
-                        await ce.fill(prompt)
-                        await asyncio.sleep(1)
-                        logger.info("✓ Final fallback contenteditable worked!")
+            # Wait up to 3 seconds for any visible input instead of a fixed sleep
+            await _settle(page, _JS_ANY_VISIBLE_INPUT, timeout=3000)
+            
+            # Look up the visible candidates of each kind concurrently, then try them in
+            # priority order (textareas first) so the prompt lands in one input only
+            visible = await asyncio.gather(*(
+                page.evaluate(_JS_VISIBLE_INDICES, kind) for kind in _FALLBACK_INPUT_KINDS
+            ))
+            for kind, indices in zip(_FALLBACK_INPUT_KINDS, visible):
+                for idx in indices:
+                    logger.info(f"Found visible {kind}, using as final fallback")
+                    if await self._try_set_prompt(page.locator(kind).nth(idx), prompt):
+                        logger.info(f"✓ Final fallback {kind} worked!")
                         return
-                except:
-                    continue
         except Exception as e:
             logger.error(f"Final fallback also failed: {e}")
         
-        # Final attempt: Wait longer and try one more time with all elements
-        logger.warning("Final fallback: waiting longer and trying all elements...")
-        await asyncio.sleep(3)
-        
-        # Get all possible input elements
-        all_inputs = []
-        try:
-            textareas = await page.locator("textarea").all()
-            all_inputs.extend([("textarea", ta) for ta in textareas])
-        except:
-            pass
+        # Take screenshot for debugging (viewport only - full_page is the expensive part)
+        screenshot_path = None
+        if _debug_screenshots_enabled():
+            try:
+                screenshot_path = get_screenshot_path(f"flow_inject_prompt_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+                await page.screenshot(path=screenshot_path)
+                logger.error(f"Screenshot saved to {screenshot_path}")
+            except Exception:
+                screenshot_path = None
         
+        # Get page info for debugging
         try:
-            contenteditables = await page.locator("[contenteditable]").all()
-            all_inputs.extend([("contenteditable", ce) for ce in contenteditables])
-        except:
+            page_title = await page.title()
+            page_url = page.url
+            # Truncate in the page so only the logged preview crosses the wire
+            body_text = await page.evaluate("() => (document.body?.innerText || '').slice(0, 200)")
+            logger.error(f"Page title: {page_title}")
+            logger.error(f"Page URL: {page_url}")
+            logger.error(f"Body text preview: {body_text or 'None'}...")
+        except Exception:
             pass
         
+        error_msg = "Could not find or interact with prompt input element after all attempts."
+        if screenshot_path:
+            error_msg += f" Check screenshot: {screenshot_path}"
+        raise Exception(error_msg)
+    
+    async def _try_set_prompt(self, element, prompt: str) -> bool:
+        """Focus a fallback input and set the prompt, returning whether it landed"""
         try:
-            text_inputs = await page.locator("input[type='text']").all()
-            all_inputs.extend([("input", ti) for ti in text_inputs])
-        except:
-            pass
-        
-        # Try each one with JavaScript
-        for input_type, element in all_inputs:
-            try:
-                logger.info(f"Trying final fallback with {input_type} element...")
-                result = await element.evaluate(f"""
-                    (prompt) => {{
-                        const el = arguments[0];
-                        try {{
-                            el.focus();
-                            if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {{
-                                el.value = prompt;
-                            }} else {{
-                                el.textContent = prompt;
-                                el.innerText = prompt;
-                            }}
-                            el.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                            el.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                            return {{success: true, value: el.value || el.textContent}};
-                        }} catch(e) {{
-                            return {{success: false, error: e.message}};
-                        }}
-                    }}
-                """, prompt)
-                
-                if result.get('success'):
-                    value = result.get('value', '')
-                    if value and (prompt[:20] in str(value) or len(str(value)) > len(prompt) * 0.8):
-                        logger.info(f"✓ Prompt injected successfully via final fallback (verified: {len(str(value))} chars)")
-                        await asyncio.sleep(1)
-                        return
-            except Exception as e:
-                logger.debug(f"Final fallback attempt failed for {input_type}: {e}")
-                continue
-        
-        # Take screenshot for debugging
-        screenshot_path = None
-        try:
-            screenshot_path = get_screenshot_path(f"flow_inject_prompt_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            await page.screenshot(path=screenshot_path, full_page=True)
-            logger.error(f"Screenshot saved to {screenshot_path}")
-        except:
-            pass
-        
-        # Get page info for debugging
-        try:
-            page_title = await page.title()
-            page_url = page.url
-            body_text = await page.locator("body").text_content()
-            logger.error(f"Page title: {page_title}")
-            logger.error(f"Page URL: {page_url}")
-            logger.error(f"Body text preview: {body_text[:200] if body_text else 'None'}...")
-        except:
-            pass
-        
-        error_msg = "Could not find or interact with prompt input element after all attempts."
-        if screenshot_path:
-            error_msg += f" Check screenshot: {screenshot_path}"
-        raise Exception(error_msg)
+            # click() already waits for the element to be stable after scrolling
+            await element.scroll_into_view_if_needed()
+            await element.click()
+            await element.fill(prompt)
+            value = await element.evaluate(_JS_READ_VALUE)
+            if not _prompt_landed(value, prompt):
+                value = await element.evaluate(_JS_SET_AND_VERIFY, prompt)
+            return _prompt_landed(value, prompt)
+        except Exception as e:
+            logger.debug(f"Setting prompt on fallback element failed: {e}")
+            return False
     
     async def trigger_generation(self, page: Page) -> bool:
         """Click the generate button to start video generation.
@@ -1993,52 +2515,19 @@ class FlowController:
         config_selector = FLOW_SELECTORS.get("generateButton", "")
         selectors = []
         
+        # Try the selector that worked last time first so steady-state generations
+        # skip discovery entirely
+        if self._resolved_generate_selector:
+            selectors.append(self._resolved_generate_selector)
+        
         # Split comma-separated selectors
         if config_selector:
-            selectors.extend([s.strip() for s in config_selector.split(',')])
-        
-        # Add fallback selectors (ordered by specificity)
-        # Based on image 2, the generate button is a circular button with right-pointing arrow
-        selectors.extend([
-            # Text-based selectors
-            'button:has-text("Generate")',
-            'button:has-text("Create")',
-            # Arrow/icon-based selectors (circular button with arrow)
-            'button:has(svg[class*="arrow"])',
-            'button:has(svg[class*="Arrow"])',
-            'button:has(svg path[d*="arrow"])',
-            'button[class*="arrow"]',
-            'button[class*="Arrow"]',
-            # Circular button selectors
-            'button[class*="circle"]',
-            'button[class*="circular"]',
-            'button[class*="round"]',
-            # Aria labels
-            'button[aria-label*="Generate"]',
-            'button[aria-label*="Create"]',
-            'button[aria-label*="Submit"]',
-            'button[aria-label*="Send"]',
-            # Type and data attributes
-            'button[type="submit"]',
-            'button[data-testid*="generate"]',
-            'button[data-testid*="create"]',
-            'button[data-testid*="submit"]',
-            # Class-based selectors
-            'button.primary',
-            'button[class*="primary"]',
-            'button[class*="generate"]',
-            'button[class*="create"]',
-            'button[class*="submit"]',
-            # Look for buttons near the prompt input (usually at bottom right)
-            'textarea ~ button',
-            '[contenteditable] ~ button',
-            '[role="textbox"] ~ button',
-        ])
+            selectors.extend([
+                s.strip() for s in config_selector.split(',')
+                if s.strip() != self._resolved_generate_selector
+            ])
         
-        # Exclude help/icon buttons - these are NOT generate buttons
-        exclude_texts = ['help', 'Help', 'HELP', 'icon', 'Icon', 'menu', 'Menu', 'settings', 'Settings']
-        
-        logger.info(f"Trying {len(selectors)} button selectors...")
+        logger.info(f"Trying {len(selectors)} configured button selectors...")
         
         # FIRST: Try to find and click the generate button (more reliable than Enter key)
         for i, selector in enumerate(selectors):
@@ -2061,11 +2550,11 @@ class FlowController:
                         button_text = ""
                         try:
                             button_text = (await button.text_content() or "").strip()
-                        except:
+                        except Exception:
                             pass
                         
                         # Skip help/icon/menu buttons
-                        if any(exclude in button_text for exclude in exclude_texts):
+                        if _EXCLUDE_RE.search(button_text):
                             logger.debug(f"Skipping button with text '{button_text}' (matches exclude list)")
                             continue
                         
@@ -2075,93 +2564,82 @@ class FlowController:
                             if box and (box['width'] < 30 or box['height'] < 30):
                                 logger.debug(f"Skipping small button (likely icon): {box['width']}x{box['height']}")
                                 continue
-                        except:
+                        except Exception:
                             pass
                         
-                        logger.info(f"Found generate button: '{button_text}' (selector: {selector})")
-                        
-                        # CRITICAL: Verify prompt is in textarea before clicking
-                        try:
-                            textarea = page.locator('textarea, [contenteditable]').first
-                            if await textarea.count() > 0:
-                                is_textarea = await textarea.get_attribute("tagName") == "TEXTAREA"
-                                if is_textarea:
-                                    prompt_value = await textarea.input_value()
-                                else:
-                                    prompt_value = await textarea.text_content()
-                                
-                                if not prompt_value or len(prompt_value.strip()) < 5:
-                                    logger.warning(f"⚠️ Textarea appears empty before clicking generate button!")
-                                    logger.warning("Re-injecting prompt before clicking button...")
-                                    # Get the original prompt from the page context if possible
-                                    # For now, we'll skip this button and try others
-                                    continue
-                                else:
-                                    logger.info(f"✓ Verified prompt in textarea: {len(prompt_value)} chars")
-                        except Exception as prompt_check_error:
-                            logger.warning(f"Could not verify prompt in textarea: {prompt_check_error}")
-                        
-                        # Scroll button into view and click
-                        await button.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.3)
-                        await button.click(timeout=5000)
-                        logger.info("✓ Generate button clicked successfully")
-                        await asyncio.sleep(2)  # Wait longer for UI to respond
-                        
-                        # Verify prompt is still there after clicking (should be cleared if submission worked)
-                        try:
-                            if await textarea.count() > 0:
-                                if is_textarea:
-                                    prompt_after = await textarea.input_value()
-                                else:
-                                    prompt_after = await textarea.text_content()
-                                
-                                # If prompt is cleared, that's actually good - it means submission worked
-                                if not prompt_after or len(prompt_after.strip()) < 5:
-                                    logger.info("✓ Prompt cleared after button click - submission successful")
-                                else:
-                                    logger.info(f"Prompt still present after click ({len(prompt_after)} chars) - may need to wait")
-                        except:
-                            pass
-                        
-                        # Verify rendering started
-                        started = await self._wait_for_render_start(page)
-                        return bool(started)
+                        started = await self._click_generate_button(page, button, f"'{button_text}' (selector: {selector})")
+                        if started is not None:
+                            self._resolved_generate_selector = selector
+                            return started
                     else:
                         logger.debug(f"Button found but not visible/enabled: visible={is_visible}, enabled={is_enabled}")
             except Exception as e:
                 logger.debug(f"Selector '{selector}' failed: {e}")
                 continue
         
+        # Fallback selectors: rank every candidate button in one evaluate_all instead of
+        # issuing count/is_visible/is_enabled/text_content/bounding_box per selector
+        try:
+            candidates_locator = page.locator(_GEN_BUTTON_LOCATOR)
+            candidates = await candidates_locator.evaluate_all(
+                _JS_GEN_BUTTON_CANDIDATES,
+                [list(_GEN_BUTTON_SELECTORS), list(_GEN_BUTTON_TEXTS)]
+            )
+            logger.info(f"Found {len(candidates)} fallback generate button candidates")
+            
+            for candidate in sorted(candidates, key=lambda c: c["rank"]):
+                button_text = candidate["text"]
+                if not (candidate["visible"] and candidate["enabled"]):
+                    logger.debug(f"Button '{button_text}' not visible/enabled: visible={candidate['visible']}, enabled={candidate['enabled']}")
+                    continue
+                
+                # Skip help/icon/menu buttons
+                if _EXCLUDE_RE.search(button_text):
+                    logger.debug(f"Skipping button with text '{button_text}' (matches exclude list)")
+                    continue
+                
+                # Skip buttons that are too small (likely icons)
+                if candidate["width"] < 30 or candidate["height"] < 30:
+                    logger.debug(f"Skipping small button (likely icon): {candidate['width']}x{candidate['height']}")
+                    continue
+                
+                try:
+                    button = candidates_locator.nth(candidate["index"])
+                    started = await self._click_generate_button(page, button, f"'{button_text}' (fallback rank: {candidate['rank']})")
+                    # Not remembered for next time: the fallback selectors are generic enough
+                    # that their first match may be a different button on a later generation
+                    if started is not None:
+                        return started
+                except Exception as e:
+                    logger.debug(f"Fallback button '{button_text}' failed: {e}")
+                    continue
+        except Exception as e:
+            logger.debug(f"Fallback button scan failed: {e}")
+        
         # FALLBACK: Try Enter key only if button click didn't work
         # Note: Enter key is less reliable - it can clear the prompt without submitting
         logger.info("Button click didn't work, trying Enter key as fallback...")
         try:
-            textarea = page.locator('textarea, [contenteditable]').first
-            if await textarea.count() > 0:
+            textarea, read_prompt = await self._prompt_input(page)
+            if textarea is not None:
                 # Verify prompt is still in textarea
-                is_textarea = await textarea.get_attribute("tagName") == "TEXTAREA"
-                if is_textarea:
-                    prompt_value = await textarea.input_value()
-                else:
-                    prompt_value = await textarea.text_content()
+                prompt_value = await read_prompt()
                 
                 if prompt_value and len(prompt_value.strip()) >= 5:
                     logger.info(f"✓ Prompt verified in textarea ({len(prompt_value)} chars), pressing Enter...")
                     await textarea.focus()
-                    await asyncio.sleep(0.5)  # Wait for focus
+                    # Wait for focus to land instead of a fixed 0.5 s
+                    await _settle(page, _JS_HAS_FOCUS, arg=await textarea.element_handle(), polling="raf")
                     
                     # Press Enter
                     await textarea.press("Enter")
                     logger.info("✓ Enter key pressed")
-                    await asyncio.sleep(2)  # Wait longer for UI to respond
+                    # Wait (up to 2 s) for the prompt to clear or a loading indicator
+                    await _settle(page, _JS_SUBMIT_ACKNOWLEDGED, arg=[prompt_value, _LOADING_UNION], polling="raf")
                     
                     # CRITICAL: Verify prompt is still there after Enter
                     # If prompt was cleared, Enter might have worked (or might have failed)
-                    if is_textarea:
-                        prompt_after = await textarea.input_value()
-                    else:
-                        prompt_after = await textarea.text_content()
+                    prompt_after = await read_prompt()
                     
                     logger.info(f"Prompt after Enter: {len(prompt_after) if prompt_after else 0} chars")
                     
@@ -2174,8 +2652,7 @@ class FlowController:
                         logger.warning(f"⚠️ Prompt still present after Enter ({len(prompt_after)} chars) - Enter may not have worked")
                         # Prompt is still there - Enter might not have worked
                         # But we'll proceed anyway and let wait_for_render_start handle it
-                        await self._wait_for_render_start(page)
-                        return
+                        return await self._wait_for_render_start(page)
                 else:
                     logger.warning(f"⚠️ Textarea is empty before pressing Enter! Prompt value: '{prompt_value[:50] if prompt_value else 'None'}'")
         except Exception as enter_error:
@@ -2184,197 +2661,68 @@ class FlowController:
         # JavaScript fallback: Try to find and click arrow button (circular button with right arrow)
         logger.info("Trying JavaScript fallback to find arrow/generate button...")
         try:
-            # First, get button info for logging
-            button_info = await page.evaluate("""
-                () => {
-                    const buttons = Array.from(document.querySelectorAll('button'));
-                    const textarea = document.querySelector('textarea, [contenteditable]');
-                    const results = [];
-                    
-                    for (const btn of buttons) {
-                        if (!btn.offsetParent) continue;
-                        const btnRect = btn.getBoundingClientRect();
-                        const textareaRect = textarea ? textarea.getBoundingClientRect() : null;
-                        
-                        // Check if button is near textarea
-                        let isNearTextarea = false;
-                        if (textareaRect) {
-                            isNearTextarea = btnRect.left > textareaRect.right - 100 && 
-                                           btnRect.top > textareaRect.top - 50 &&
-                                           btnRect.bottom < textareaRect.bottom + 50;
-                        }
-                        
-                        const svg = btn.querySelector('svg');
-                        const hasArrow = svg && svg.querySelectorAll('path').length > 0;
-                        const isCircular = Math.abs(btnRect.width - btnRect.height) < 10 && btnRect.width > 30;
-                        
-                        results.push({
-                            text: btn.textContent?.trim() || '',
-                            ariaLabel: btn.getAttribute('aria-label') || '',
-                            visible: btn.offsetParent !== null,
-                            enabled: !btn.disabled,
-                            isCircular: isCircular,
-                            isNearTextarea: isNearTextarea,
-                            hasArrow: hasArrow,
-                            position: {x: btnRect.x, y: btnRect.y, width: btnRect.width, height: btnRect.height}
-                        });
-                    }
-                    return results;
-                }
-            """)
+            # Describe and click in one traversal: every visible button is recorded
+            # for logging, and the scan stops at the first arrow/circular match
+            clicked = await page.evaluate(_JS_ARROW_BUTTON_CLICK)
             
-            logger.info(f"Found {len(button_info)} buttons. Analyzing for generate button...")
+            button_info = clicked.get('candidates', [])
+            logger.info(f"Checked {len(button_info)} visible buttons for the generate button")
             for i, btn_info in enumerate(button_info[:10]):  # Log first 10
                 logger.debug(f"Button {i+1}: text='{btn_info['text']}', aria-label='{btn_info['ariaLabel']}', "
                            f"circular={btn_info['isCircular']}, near_textarea={btn_info['isNearTextarea']}, "
                            f"has_arrow={btn_info['hasArrow']}, enabled={btn_info['enabled']}")
             
-            clicked = await page.evaluate(r"""
-                () => {
-                    // Find all buttons
-                    const buttons = Array.from(document.querySelectorAll('button'));
-                    
-                    // Look for buttons with arrow icons (usually the generate button)
-                    for (const btn of buttons) {
-                        if (!btn.offsetParent) continue; // Skip hidden buttons
-                        if (btn.disabled) continue;
-                        
-                        // Check for arrow icon in SVG
-                        const svg = btn.querySelector('svg');
-                        if (svg) {
-                            const paths = svg.querySelectorAll('path');
-                            for (const path of paths) {
-                                const d = path.getAttribute('d') || '';
-                                // Arrow paths typically have M and L commands pointing right
-                                if (d.includes('M') && (d.includes('L') || d.includes('l'))) {
-                                    // Check if it's a right-pointing arrow (common pattern)
-                                    const isRightArrow = d.match(/M[\d.]+ [\d.]+ L[\d.]+ [\d.]+/);
-                                    if (isRightArrow || d.length > 20) { // Arrow paths are usually longer
-                                        btn.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                        btn.click();
-                                        return {success: true, type: 'arrow_icon', buttonInfo: {
-                                            text: btn.textContent?.trim() || '',
-                                            ariaLabel: btn.getAttribute('aria-label') || '',
-                                            position: {x: btn.getBoundingClientRect().x, y: btn.getBoundingClientRect().y}
-                                        }};
-                                    }
-                                }
-                            }
-                        }
-                        
-                        // Also check for circular buttons near textarea (usually generate button)
-                        const textarea = document.querySelector('textarea, [contenteditable]');
-                        if (textarea) {
-                            const textareaRect = textarea.getBoundingClientRect();
-                            const btnRect = btn.getBoundingClientRect();
-                            
-                            // Check if button is to the right and near the textarea
-                            if (btnRect.left > textareaRect.right - 100 && 
-                                btnRect.top > textareaRect.top - 50 &&
-                                btnRect.bottom < textareaRect.bottom + 50) {
-                                // Check if it's circular (width ≈ height)
-                                const isCircular = Math.abs(btnRect.width - btnRect.height) < 10 && btnRect.width > 30;
-                                if (isCircular) {
-                                    btn.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                    btn.click();
-                                    return {success: true, type: 'circular_near_input', buttonInfo: {
-                                        text: btn.textContent?.trim() || '',
-                                        ariaLabel: btn.getAttribute('aria-label') || '',
-                                        position: {x: btnRect.x, y: btnRect.y, width: btnRect.width, height: btnRect.height}
-                                    }};
-                                }
-                            }
-                        }
-                    }
-                    
-                    return {success: false};
-                }
-            """)
-            
             if clicked.get('success'):
                 btn_info = clicked.get('buttonInfo', {})
                 logger.info(f"✓ Clicked generate button via JavaScript ({clicked.get('type')})")
                 logger.info(f"  Button details: text='{btn_info.get('text', '')}', aria-label='{btn_info.get('ariaLabel', '')}', "
                           f"position=({btn_info.get('position', {}).get('x', '?')}, {btn_info.get('position', {}).get('y', '?')})")
                 
-                # Verify prompt is in textarea before proceeding
-                try:
-                    textarea = page.locator('textarea, [contenteditable]').first
-                    if await textarea.count() > 0:
-                        prompt_value = await textarea.input_value() if await textarea.get_attribute("tagName") == "TEXTAREA" else await textarea.text_content()
-                        if not prompt_value or len(prompt_value.strip()) < 5:
-                            logger.warning(f"⚠️ Textarea appears empty after clicking generate button!")
-                        else:
-                            logger.info(f"✓ Verified prompt in textarea: {len(prompt_value)} chars")
-                except Exception as prompt_check_error:
-                    logger.warning(f"Could not verify prompt in textarea: {prompt_check_error}")
+                # Log what is left in the prompt input - diagnostic only, since
+                # _wait_for_render_start picks up the locked-input signal by itself
+                if logger.isEnabledFor(logging.DEBUG):
+                    try:
+                        textarea, read_prompt = await self._prompt_input(page)
+                        if textarea is not None:
+                            prompt_value = await read_prompt()
+                            logger.debug(f"Prompt input after click: {len(prompt_value) if prompt_value else 0} chars")
+                    except Exception as prompt_check_error:
+                        logger.debug(f"Could not read prompt input: {prompt_check_error}")
                 
-                await asyncio.sleep(1)  # Brief wait for UI to respond
-                await self._wait_for_render_start(page)
-                return
+                return await self._wait_for_render_start(page)
             else:
                 logger.debug("JavaScript fallback did not find generate button")
         except Exception as js_error:
             logger.debug(f"JavaScript fallback failed: {js_error}")
         
-        # Take screenshot for debugging
+        # Take screenshot for debugging (viewport JPEG - a full-page PNG takes seconds)
         screenshot_path = None
-        try:
-            screenshot_path = get_screenshot_path(f"flow_generate_button_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            await page.screenshot(path=screenshot_path, full_page=True)
-            logger.error(f"Screenshot saved to {screenshot_path}")
-        except:
-            pass
+        if _debug_screenshots_enabled():
+            try:
+                screenshot_path = get_screenshot_path(f"flow_generate_button_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
+                await page.screenshot(path=screenshot_path, type="jpeg", quality=60)
+                logger.error(f"Screenshot saved to {screenshot_path}")
+            except Exception:
+                screenshot_path = None
         
-        # Get all buttons on page for debugging
+        # Get all buttons on page for debugging - the first 20 buttons and every
+        # arrow-icon button are described in one evaluate
         try:
-            all_buttons = await page.locator("button").all()
+            debug_info = await page.evaluate(_JS_BUTTON_DEBUG_INFO)
             button_info = []
-            for btn in all_buttons[:20]:  # Check more buttons
-                try:
-                    text = await btn.text_content()
-                    aria_label = await btn.get_attribute("aria-label")
-                    is_vis = await btn.is_visible()
-                    is_en = await btn.is_enabled()
-                    # Get button position to identify bottom-right buttons
-                    box = await btn.bounding_box()
-                    pos_info = f"pos=({int(box['x'])},{int(box['y'])})" if box else "pos=unknown"
-                    btn_desc = f"'{text or aria_label or ''}' (visible={is_vis}, enabled={is_en}, {pos_info})"
-                    button_info.append(btn_desc)
-                except:
-                    pass
+            for btn in debug_info["buttons"]:
+                # Get button position to identify bottom-right buttons
+                pos_info = f"pos=({int(btn['x'])},{int(btn['y'])})" if btn["visible"] else "pos=unknown"
+                button_info.append(f"'{btn['text'] or btn['ariaLabel']}' (visible={btn['visible']}, enabled={btn['enabled']}, {pos_info})")
             logger.error(f"Available buttons on page: {', '.join(button_info)}")
             
-            # Also try to find buttons with arrow icons using JavaScript
-            try:
-                arrow_buttons = await page.evaluate("""
-                    () => {
-                        const buttons = Array.from(document.querySelectorAll('button'));
-                        const arrowButtons = buttons.filter(btn => {
-                            const svg = btn.querySelector('svg');
-                            if (!svg) return false;
-                            const paths = svg.querySelectorAll('path');
-                            for (const path of paths) {
-                                const d = path.getAttribute('d') || '';
-                                if (d.includes('arrow') || d.includes('M') && d.includes('L')) {
-                                    return true;
-                                }
-                            }
-                            return false;
-                        });
-                        return arrowButtons.map(btn => ({
-                            text: btn.textContent?.trim() || '',
-                            ariaLabel: btn.getAttribute('aria-label') || '',
-                            visible: btn.offsetParent !== null,
-                            enabled: !btn.disabled
-                        }));
-                    }
-                """)
-                if arrow_buttons:
-                    logger.info(f"Found {len(arrow_buttons)} buttons with arrow icons: {arrow_buttons}")
-            except:
-                pass
-        except:
+            arrow_buttons = [
+                {key: btn[key] for key in ("text", "ariaLabel", "visible", "enabled")}
+                for btn in debug_info["arrowButtons"]
+            ]
+            if arrow_buttons:
+                logger.info(f"Found {len(arrow_buttons)} buttons with arrow icons: {arrow_buttons}")
+        except Exception:
             pass
         
         error_msg = "Could not find or click generate button."
@@ -2382,140 +2730,129 @@ class FlowController:
             error_msg += f" Check screenshot: {screenshot_path}"
         raise Exception(error_msg)
     
-    async def _wait_for_render_start(self, page: Page, timeout: int = 15000) -> None:
-        """Wait for rendering UI to appear - verify generation actually started"""
-        start_time = asyncio.get_event_loop().time()
+    async def _prompt_input(self, page: Page):
+        """Return the prompt input locator and a coroutine function reading its text.
+
+        The tag is looked up once per page and cached until the page navigates, so the
+        reader is already bound to input_value() or text_content().
+        Returns (None, None) when the page has no prompt input.
+        """
+        cached = self._prompt_input_cache
+        if cached is not None and cached[0] is page:
+            return cached[1], cached[2]
         
-        logger.info("Verifying video generation started...")
+        state = await page.evaluate(_JS_PROMPT_STATE)
+        if state is None:
+            return None, None
         
-        # Take screenshot before checking
-        try:
-            screenshot_path = get_screenshot_path(f"before_render_start_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            await page.screenshot(path=screenshot_path, full_page=True)
-            logger.debug(f"Screenshot saved: {screenshot_path}")
-        except:
-            pass
+        textarea = page.locator('textarea, [contenteditable]').first
+        read_prompt = textarea.input_value if state["tag"] == "TEXTAREA" else textarea.text_content
+        self._prompt_input_cache = (page, textarea, read_prompt)
         
-        while (asyncio.get_event_loop().time() - start_time) * 1000 < timeout:
-            try:
-                # Check for loading indicators
-                loading_selectors = [
-                    '.loading',
-                    '[aria-busy="true"]',
-                    '.spinner',
-                    '[class*="loading"]',
-                    '[class*="Loading"]',
-                    '[class*="spinner"]',
-                    '[class*="Spinner"]',
-                    'svg[class*="spinner"]',
-                    'div[class*="progress"]',
-                ]
-                
-                has_loading = False
-                for selector in loading_selectors:
-                    try:
-                        count = await page.locator(selector).count()
-                        if count > 0:
-                            # Check if at least one is visible
-                            for i in range(min(count, 5)):
-                                elem = page.locator(selector).nth(i)
-                                if await elem.is_visible():
-                                    has_loading = True
-                                    logger.info(f"✓ Found loading indicator: {selector}")
-                                    break
-                            if has_loading:
-                                break
-                    except:
-                        continue
-                
-                # Check for render/video area
-                render_selectors = [
-                    '.render-area',
-                    '.video-preview',
-                    '[class*="render"]',
-                    '[class*="Render"]',
-                    '[class*="video-preview"]',
-                    '[class*="VideoPreview"]',
-                    'video',
-                    'canvas',
-                ]
-                
-                has_render_area = False
-                for selector in render_selectors:
-                    try:
-                        count = await page.locator(selector).count()
-                        if count > 0:
-                            for i in range(min(count, 5)):
-                                elem = page.locator(selector).nth(i)
-                                if await elem.is_visible():
-                                    has_render_area = True
-                                    logger.info(f"✓ Found render area: {selector}")
-                                    break
-                            if has_render_area:
-                                break
-                    except:
-                        continue
-                
-                # Check if textarea is disabled (indicates generation started)
-                try:
-                    textarea = page.locator('textarea, [contenteditable]').first
-                    if await textarea.count() > 0:
-                        is_disabled = await textarea.is_disabled()
-                        is_readonly = await textarea.get_attribute("readonly")
-                        if is_disabled or is_readonly:
-                            logger.info("✓ Textarea disabled/readonly - generation likely started")
-                            has_loading = True
-                except:
-                    pass
+        def forget(_frame):
+            self._prompt_input_cache = None
+        page.once("framenavigated", forget)
+        return textarea, read_prompt
+    
+    async def _click_generate_button(self, page: Page, button, description: str):
+        """Verify the prompt is present, click the generate button and wait for render start.
+
+        Returns:
+            bool if the button was clicked (whether rendering likely started), or None
+            when the prompt looks empty so the caller should try another button.
+        """
+        logger.info(f"Found generate button: {description}")
+        
+        # CRITICAL: Verify prompt is in textarea before clicking
+        prompt_value = ""
+        try:
+            # Tag and current value come back in one evaluate (None if there is no input)
+            state = await page.evaluate(_JS_PROMPT_STATE)
+            if state is not None:
+                prompt_value = state["value"]
                 
-                # Check for generation status text
-                try:
-                    status_texts = [
-                        "text=Generating",
-                        "text=Creating",
-                        "text=Processing",
-                        "text=Đang tạo",  # Vietnamese "Creating"
-                        "text=Đang xử lý",  # Vietnamese "Processing"
-                    ]
-                    for status_selector in status_texts:
-                        try:
-                            status_elem = page.locator(status_selector).first
-                            if await status_elem.count() > 0 and await status_elem.is_visible():
-                                status_text = await status_elem.text_content()
-                                logger.info(f"✓ Found generation status: {status_text}")
-                                has_loading = True
-                                break
-                        except:
-                            continue
-                except:
-                    pass
+                if not prompt_value or len(prompt_value.strip()) < 5:
+                    logger.warning(f"⚠️ Textarea appears empty before clicking generate button!")
+                    logger.warning("Re-injecting prompt before clicking button...")
+                    # Get the original prompt from the page context if possible
+                    # For now, we'll skip this button and try others
+                    return None
+                else:
+                    logger.info(f"✓ Verified prompt in textarea: {len(prompt_value)} chars")
+        except Exception as prompt_check_error:
+            logger.warning(f"Could not verify prompt in textarea: {prompt_check_error}")
+        
+        # Scroll button into view and click
+        await button.scroll_into_view_if_needed()
+        await asyncio.sleep(0)  # Yield only - click() waits for the button to be stable
+        await button.click(timeout=5000)
+        logger.info("✓ Generate button clicked successfully")
+        # Wait (up to 2 s) for the prompt to clear or a loading indicator
+        await _settle(page, _JS_SUBMIT_ACKNOWLEDGED, arg=[prompt_value, _LOADING_UNION], polling="raf")
+        
+        # Verify prompt is still there after clicking (should be cleared if submission worked)
+        try:
+            state = await page.evaluate(_JS_PROMPT_STATE)
+            if state is not None:
+                prompt_after = state["value"]
                 
-                if has_loading or has_render_area:
-                    logger.info("✓ Video generation started successfully")
-                    return
-            except Exception as e:
-                logger.debug(f"Error checking render start: {e}")
-            
-            await asyncio.sleep(0.5)
+                # If prompt is cleared, that's actually good - it means submission worked
+                if not prompt_after or len(prompt_after.strip()) < 5:
+                    logger.info("✓ Prompt cleared after button click - submission successful")
+                else:
+                    logger.info(f"Prompt still present after click ({len(prompt_after)} chars) - may need to wait")
+        except Exception:
+            pass
         
-        # Take screenshot after timeout to see what's on screen
+        # Verify rendering started
+        started = await self._wait_for_render_start(page)
+        return bool(started)
+    
+    async def _wait_for_render_start(self, page: Page, timeout: int = 15000) -> bool:
+        """Wait for rendering UI to appear - verify generation actually started
+
+        Returns True as soon as a start signal shows up, False if none did within timeout.
+        """
+        logger.info("Verifying video generation started...")
+        
+        # One in-page predicate covers every signal, so the wait costs a single round
+        # trip instead of ~25 count()/is_visible() calls every 500 ms. Every signal is a
+        # DOM change, so it is only re-checked when the DOM mutates - zero work while idle.
         try:
-            screenshot_path = get_screenshot_path(f"render_start_timeout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            await page.screenshot(path=screenshot_path, full_page=True)
-            logger.warning(f"Render start timeout - screenshot saved: {screenshot_path}")
-            
-            # Check if prompt is still in textarea (might not have been sent)
+            handle = await page.wait_for_function(
+                _JS_RENDER_STARTED,
+                arg=[_LOADING_UNION, _RENDER_UNION, list(_RENDER_STATUS_TEXTS)],
+                timeout=timeout,
+                polling="mutation"
+            )
+            logger.info(f"✓ Found {await handle.json_value()}")
+            logger.info("✓ Video generation started successfully")
+            return True
+        except PlaywrightTimeoutError:
+            pass
+        except Exception as e:
+            logger.debug(f"Error checking render start: {e}")
+        
+        # Take screenshot after timeout to see what's on screen
+        if _debug_screenshots_enabled():
             try:
-                textarea = page.locator('textarea, [contenteditable]').first
-                if await textarea.count() > 0:
-                    prompt_text = await textarea.input_value() if await textarea.get_attribute("tagName") == "TEXTAREA" else await textarea.text_content()
-                    logger.warning(f"Textarea still contains: {prompt_text[:100] if prompt_text else 'empty'}")
-            except:
+                screenshot_path = get_screenshot_path(f"render_start_timeout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
+                await page.screenshot(path=screenshot_path, type="jpeg", quality=60)
+                logger.warning(f"Render start timeout - screenshot saved: {screenshot_path}")
+            except Exception:
                 pass
-        except:
+        
+        # Check if prompt is still in textarea (might not have been sent)
+        try:
+            textarea, read_prompt = await self._prompt_input(page)
+            if textarea is not None:
+                prompt_text = await read_prompt()
+                logger.warning(f"Textarea still contains: {prompt_text[:100] if prompt_text else 'empty'}")
+        except Exception:
             pass
         
         logger.warning("Render start timeout - continuing anyway (generation may have started but indicators not detected)")
+        return False
     
     async def wait_for_completion(
         self,
@@ -2528,496 +2865,381 @@ class FlowController:
         """
         start_time = asyncio.get_event_loop().time()
         poll_interval = POLLING_INTERVAL_MS / 1000
-        last_log_time = start_time
+        # Back off while nothing is happening; reset when the video starts to appear
+        # and once error detection starts, so the first error checks are not delayed
+        current_interval = poll_interval
+        error_detection_started = False
+        # Last download/error signal that woke the loop, so it does not wake it twice
+        last_signal = None
+        # Page fingerprint at the last error scan that found nothing
+        last_fingerprint = None
         
         logger.info(f"Waiting for video generation to complete (timeout: {timeout/1000:.0f} seconds)...")
         
-        while (asyncio.get_event_loop().time() - start_time) * 1000 < timeout:
-            try:
-                # CRITICAL FIX: Don't check for errors too early - wait for video generation to start
-                # If we're checking immediately after trigger_generation, skip error detection entirely
-                elapsed_ms = (asyncio.get_event_loop().time() - start_time) * 1000
-                skip_error_detection = elapsed_ms < 10000  # First 10 seconds - skip error detection completely
+        # Progress is logged from a side task, so the poll loop does no clock math for it
+        progress_task = asyncio.create_task(self._log_completion_progress(start_time, timeout))
+        try:
+            while (asyncio.get_event_loop().time() - start_time) * 1000 < timeout:
+                try:
+                    # CRITICAL FIX: Don't check for errors too early - wait for video generation to start
+                    # If we're checking immediately after trigger_generation, skip error detection entirely
+                    elapsed_ms = (asyncio.get_event_loop().time() - start_time) * 1000
+                    skip_error_detection = elapsed_ms < 10000  # First 10 seconds - skip error detection completely
                 
-                if skip_error_detection:
-                    logger.debug(f"Early check (elapsed: {elapsed_ms:.0f}ms) - skipping error detection, only checking for video")
+                    if skip_error_detection:
+                        logger.debug(f"Early check (elapsed: {elapsed_ms:.0f}ms) - skipping error detection, only checking for video")
+                    elif not error_detection_started:
+                        error_detection_started = True
+                        current_interval = poll_interval
                 
-                # Check for video element - try multiple selectors and methods
-                video_selectors = [
-                    "video",
-                    "video[src]",
-                    "[class*='video']",
-                    "[class*='Video']",
-                    "iframe[src*='video']",
-                ]
+                    # One evaluate answers every per-poll question: video, download button,
+                    # preview and (once past the early window) the error strategies 1-3
+                    try:
+                        probe = await page.evaluate(_JS_COMPLETION_PROBE, [
+                            *_PROBE_ERROR_ARGS,
+                            self._sel_error,
+                            not skip_error_detection,
+                            last_fingerprint,
+                        ])
+                    except Exception as probe_error:
+                        logger.debug(f"JavaScript completion probe failed: {probe_error}")
+                        probe = await self._probe_completion_fallback(page, not skip_error_detection)
                 
-                # First, try JavaScript-based detection (more reliable)
-                try:
-                    video_info = await page.evaluate("""
-                        () => {
-                            const videos = document.querySelectorAll('video');
-                            const results = [];
-                            
-                            for (const video of videos) {
-                                if (!video.offsetParent) continue; // Skip hidden videos
-                                
-                                const src = video.src || video.currentSrc || '';
-                                const readyState = video.readyState || 0;
-                                const duration = video.duration || 0;
-                                const paused = video.paused;
-                                
-                                // Check if video has content (readyState >= 2 means it has loaded metadata)
-                                if (readyState >= 2 || duration > 0 || src) {
-                                    results.push({
-                                        hasSrc: !!src,
-                                        src: src,
-                                        readyState: readyState,
-                                        duration: duration,
-                                        paused: paused,
-                                        visible: video.offsetParent !== null,
-                                        hasPoster: !!video.poster,
-                                        poster: video.poster || ''
-                                    });
-                                }
-                            }
-                            
-                            // Also check for video containers/players
-                            const videoContainers = document.querySelectorAll('[class*="video"], [class*="Video"], [class*="player"], [class*="Player"]');
-                            for (const container of videoContainers) {
-                                if (container.offsetParent && container.querySelector('video')) {
-                                    results.push({
-                                        hasContainer: true,
-                                        visible: true
-                                    });
-                                }
-                            }
-                            
-                            return results;
-                        }
-                    """)
-                    
-                    if video_info and len(video_info) > 0:
-                        logger.debug(f"JavaScript found {len(video_info)} video element(s)")
-                        for i, info in enumerate(video_info):
-                            logger.debug(f"Video {i+1}: src={bool(info.get('src'))}, readyState={info.get('readyState')}, duration={info.get('duration')}, visible={info.get('visible')}")
-                            
-                            # If video has src or is ready, consider it complete
-                            if info.get('src') or info.get('readyState', 0) >= 2 or info.get('duration', 0) > 0:
-                                video_src = info.get('src') or info.get('poster') or ''
-                                if video_src:
-                                    logger.info(f"Video generation completed (JavaScript detection: src={video_src[:50]}...)")
-                                    return {"status": "completed", "video_url": video_src}
-                                elif info.get('hasContainer') or info.get('visible'):
-                                    # Video element exists and is visible - might be loading, wait a bit more
-                                    logger.info("Video element detected but no src yet - waiting for video to load...")
-                                    await asyncio.sleep(2)
-                                    # Re-check after waiting
-                                    video_src = await page.evaluate("""
-                                        () => {
-                                            const video = document.querySelector('video');
-                                            if (video && video.offsetParent) {
-                                                return video.src || video.currentSrc || '';
-                                            }
-                                            return '';
-                                        }
-                                    """)
-                                    if video_src:
-                                        logger.info(f"Video src loaded after wait: {video_src[:50]}...")
-                                        return {"status": "completed", "video_url": video_src}
-                except Exception as js_error:
-                    logger.debug(f"JavaScript video detection failed: {js_error}")
+                    if probe.get("videos"):
+                        logger.debug(f"JavaScript found {probe['videos']} video element(s)")
                 
-                # Fallback: Try Playwright selectors
-                for video_selector in video_selectors:
-                    try:
-                        video = page.locator(video_selector).first
-                        if await video.count() > 0:
-                            # Check if video is visible
-                            is_visible = await video.is_visible()
-                            if not is_visible:
-                                continue
-                            
-                            # Check if video has src attribute
-                            src = await video.get_attribute("src")
-                            if src and (src.startswith("http") or src.startswith("blob:") or src.startswith("data:")):
-                                logger.info(f"Video generation completed (found via selector: {video_selector})")
-                                return {"status": "completed", "video_url": src}
-                            
-                            # Check video readyState via JavaScript
-                            try:
-                                ready_state = await video.evaluate("el => el.readyState || 0")
-                                duration = await video.evaluate("el => el.duration || 0")
-                                if ready_state >= 2 or duration > 0:
-                                    # Video has loaded metadata or has duration
-                                    current_src = await video.evaluate("el => el.src || el.currentSrc || ''")
-                                    if current_src:
-                                        logger.info(f"Video generation completed (readyState={ready_state}, duration={duration})")
-                                        return {"status": "completed", "video_url": current_src}
-                                    else:
-                                        logger.info(f"Video element ready (readyState={ready_state}, duration={duration}) but no src - may be loading")
-                            except:
-                                pass
-                            
-                            # Try to get video URL from different attributes
-                            for attr in ["src", "data-src", "data-url", "poster", "currentSrc"]:
-                                try:
-                                    attr_value = await video.get_attribute(attr) if attr != "currentSrc" else await video.evaluate("el => el.currentSrc || ''")
-                                    if attr_value and (attr_value.startswith("http") or attr_value.startswith("blob:") or attr_value.startswith("data:")):
-                                        logger.info(f"Video generation completed (found URL in {attr} attribute)")
-                                        return {"status": "completed", "video_url": attr_value}
-                                except:
-                                    continue
-                    except:
-                        continue
+                    # If video has src or is ready, consider it complete
+                    if probe.get("video_url"):
+                        video_src = probe["video_url"]
+                        logger.info(f"Video generation completed (video detected: src={video_src[:50]}...)")
+                        return {"status": "completed", "video_url": video_src}
                 
-                # Check for download button - try multiple selectors
-                download_selectors = [
-                    'button:has-text("Download")',
-                    'button:has-text("Tải xuống")',  # Vietnamese "Download"
-                    'a[download]',
-                    '[aria-label*="Download"]',
-                    '[aria-label*="download"]',
-                    '[class*="download"]',
-                    '[class*="Download"]',
-                ]
+                    if probe.get("video_pending"):
+                        # Video element exists and is visible - might be loading, wait a bit more
+                        logger.info("Video element detected but no src yet - waiting for video to load...")
+                        current_interval = poll_interval
+                        # Returns the moment the src is set instead of after 2 s
+                        video_src = await self._wait_for_video_src(page, 2)
+                        if video_src:
+                            logger.info(f"Video src loaded after wait: {video_src[:50]}...")
+                            return {"status": "completed", "video_url": video_src}
                 
-                # Also check via JavaScript for download buttons
-                try:
-                    download_buttons = await page.evaluate("""
-                        () => {
-                            const buttons = Array.from(document.querySelectorAll('button, a'));
-                            const results = [];
-                            
-                            for (const btn of buttons) {
-                                if (!btn.offsetParent) continue;
-                                
-                                const text = (btn.textContent || '').toLowerCase();
-                                const ariaLabel = (btn.getAttribute('aria-label') || '').toLowerCase();
-                                const className = (btn.className || '').toLowerCase();
-                                const hasDownload = btn.hasAttribute('download') || 
-                                                   text.includes('download') || 
-                                                   text.includes('tải xuống') ||
-                                                   ariaLabel.includes('download') ||
-                                                   className.includes('download');
-                                
-                                if (hasDownload) {
-                                    results.push({
-                                        text: btn.textContent?.trim() || '',
-                                        visible: btn.offsetParent !== null,
-                                        hasDownloadAttr: btn.hasAttribute('download')
-                                    });
-                                }
-                            }
-                            
-                            return results;
-                        }
-                    """)
-                    
-                    if download_buttons and len(download_buttons) > 0:
-                        logger.info(f"Download button detected via JavaScript: {download_buttons[0].get('text', '')}")
+                    if probe.get("download") is not None:
+                        logger.info(f"Download button appeared - generation completed: {probe['download']}")
                         return {"status": "completed", "has_download": True}
-                except Exception as js_dl_error:
-                    logger.debug(f"JavaScript download button detection failed: {js_dl_error}")
                 
-                # Fallback: Try Playwright selectors
-                for download_selector in download_selectors:
-                    try:
-                        download_btn = page.locator(download_selector).first
-                        if await download_btn.count() > 0 and await download_btn.is_visible():
-                            logger.info(f"Download button appeared - generation completed (found via selector: {download_selector})")
-                            return {"status": "completed", "has_download": True}
-                    except:
-                        continue
+                    if probe.get("preview"):
+                        logger.info("Video preview detected - generation may be completed")
+                        # Don't return yet - wait up to 2 s for the actual video element,
+                        # returning as soon as its src is set
+                        video_src = await self._wait_for_video_src(page, 2)
+                        if video_src:
+                            logger.info("Video element found after preview detection")
+                            return {"status": "completed", "video_url": video_src}
                 
-                # Check for video preview/thumbnail that indicates completion
-                preview_selectors = [
-                    '[class*="preview"]',
-                    '[class*="Preview"]',
-                    '[class*="thumbnail"]',
-                    '[class*="Thumbnail"]',
-                    'img[alt*="video"]',
-                    'img[alt*="Video"]',
-                ]
-                
-                for preview_selector in preview_selectors:
-                    try:
-                        preview = page.locator(preview_selector).first
-                        if await preview.count() > 0 and await preview.is_visible():
-                            # Check if it's actually a video preview (has video-related attributes)
-                            src = await preview.get_attribute("src")
-                            alt = await preview.get_attribute("alt")
-                            if src or (alt and "video" in alt.lower()):
-                                logger.info(f"Video preview detected - generation may be completed (found via selector: {preview_selector})")
-                                # Don't return yet - wait a bit more to ensure video is ready
-                                await asyncio.sleep(2)
-                                # Re-check for actual video element
-                                video = page.locator("video").first
-                                if await video.count() > 0:
-                                    video_src = await video.get_attribute("src")
-                                    if video_src:
-                                        logger.info("Video element found after preview detection")
-                                        return {"status": "completed", "video_url": video_src}
-                    except:
+                    # FIX: Skip error detection in early stages to avoid false positives
+                    if skip_error_detection:
+                        # Skip all error detection - just continue polling
+                        video_src = await self._wait_for_video_src(page, current_interval)
+                        if video_src:
+                            logger.info(f"Video generation completed (video src appeared: {video_src[:50]}...)")
+                            return {"status": "completed", "video_url": video_src}
+                        current_interval = min(current_interval * 1.5, _MAX_POLL_INTERVAL)
                         continue
                 
-                # FIX: Skip error detection in early stages to avoid false positives
-                if skip_error_detection:
-                    # Skip all error detection - just continue polling
-                    await asyncio.sleep(poll_interval)
-                    continue
-                
-                # Check for errors - try multiple strategies
-                # FIX: Be more specific - only detect actual error messages, not generic UI elements
-                error_found = False
-                error_text = None
-                
-                # Strategy 1: Check for specific error messages (not just "Error" text)
-                # These are actual error messages that indicate failure
-                specific_error_messages = [
-                    "text=Something went wrong",
-                    "text=You need more AI credits",
-                    "text=Không tải được số tín dụng",  # Vietnamese "Could not load credits"
-                    "text=Rất tiếc, đã xảy ra lỗi!",  # Vietnamese "Unfortunately, an error occurred!"
-                    "text=Unfortunately, an error occurred!",
-                    "text=Generation failed",
-                    "text=Failed to generate",
-                    "text=Error generating video",
-                    "text=Unable to generate",
-                ]
+                    # Nothing in the page changed since the last error scan came up empty,
+                    # so strategies 1-4 would only repeat it
+                    if probe.get("unchanged"):
+                        logger.debug("Page unchanged since the last error scan - skipping error detection")
+                    else:
+                        # Check for errors - strategies 1-3 were answered by the probe above
+                        # FIX: Be more specific - only detect actual error messages, not generic UI elements
+                        error_found = False
+                        error_text = None
+                        body_scan_failed = False
                 
-                for error_selector in specific_error_messages:
-                    try:
-                        error_elem = page.locator(error_selector).first
-                        if await error_elem.count() > 0 and await error_elem.is_visible():
-                            error_text = await error_elem.text_content()
-                            if error_text and len(error_text.strip()) > 10:  # Must be substantial message
-                                error_found = True
-                                logger.warning(f"Specific error message found: {error_text[:100]}")
-                                
-                                # Try to close Google account error popup if it's that type of error
-                                if "Rất tiếc" in error_text or "Unfortunately, an error occurred" in error_text:
-                                    logger.info("Attempting to close Google account error popup...")
-                                    try:
-                                        close_selectors = [
-                                            'button:has-text("Đóng")',
-                                            'button:has-text("Close")',
-                                            '[aria-label*="Close"]',
-                                            '[aria-label*="Đóng"]',
-                                            'button[class*="close"]',
-                                            'button[class*="Close"]',
-                                        ]
-                                        for close_sel in close_selectors:
-                                            try:
-                                                close_btn = page.locator(close_sel).first
-                                                if await close_btn.count() > 0 and await close_btn.is_visible():
-                                                    await close_btn.click()
-                                                    await asyncio.sleep(1)
-                                                    logger.info("✓ Closed error popup")
-                                                    break
-                                            except:
-                                                continue
-                                    except Exception as close_error:
-                                        logger.debug(f"Could not close error popup: {close_error}")
-                                
-                                break
-                    except:
-                        continue
+                        # Strategy 1: Specific error messages (not just "Error" text)
+                        if probe.get("error_message"):
+                            error_text = probe["error_message"]
+                            error_found = True
+                            logger.warning(f"Specific error message found: {error_text[:100]}")
+                    
+                            # Try to close Google account error popup if it's that type of error
+                            if _GOOGLE_POPUP_RE.search(error_text):
+                                logger.info("Attempting to close Google account error popup...")
+                                try:
+                                    close_btn = page.locator(f"{_CLOSE_POPUP_UNION} >> visible=true").first
+                                    if await close_btn.is_visible():
+                                        await close_btn.click()
+                                        await asyncio.sleep(1)
+                                        logger.info("✓ Closed error popup")
+                                except Exception as close_error:
+                                    logger.debug(f"Could not close error popup: {close_error}")
                 
-                # Strategy 2: Check for error dialogs/toasts (more reliable than generic error elements)
-                if not error_found:
-                    error_dialog_selectors = [
-                        '[role="dialog"]:has-text("Rất tiếc")',  # Google account popup error
-                        '[role="alertdialog"]:has-text("Rất tiếc")',
-                        '[role="dialog"]:has-text("error")',
-                        '[role="alert"]:has-text("failed")',
-                        '[role="alert"]:has-text("error")',
-                        '[aria-live="assertive"]:has-text("error")',
-                        '[aria-live="assertive"]:has-text("failed")',
-                    ]
-                    for selector in error_dialog_selectors:
-                        try:
-                            error_elem = page.locator(selector).first
-                            if await error_elem.count() > 0 and await error_elem.is_visible():
-                                error_text = await error_elem.text_content()
-                                # Filter out false positives - must be substantial error message
-                                if error_text and len(error_text.strip()) > 15:
-                                    # Check if it's actually an error (not just UI text)
-                                    error_lower = error_text.lower()
-                                    if any(keyword in error_lower for keyword in ["error", "failed", "wrong", "lỗi", "tiếc"]):
-                                        error_found = True
-                                        logger.warning(f"Error dialog found: {error_text[:100]}")
-                                        break
-                        except:
-                            continue
+                        # Strategy 2: Error dialogs/toasts (more reliable than generic error elements)
+                        elif probe.get("error_dialog"):
+                            error_text = probe["error_dialog"]
+                            error_found = True
+                            logger.warning(f"Error dialog found: {error_text[:100]}")
                 
-                # Strategy 3: Check configured error selector (only if it's a specific error class)
-                if not error_found:
-                    try:
-                        error_selector = FLOW_SELECTORS.get("errorMessage", ".error")
-                        # Only check if it's a specific error class, not generic ".error"
-                        if error_selector != ".error":  # Skip generic error selector
-                            error = page.locator(error_selector).first
-                            if await error.count() > 0 and await error.is_visible():
-                                error_text = await error.text_content()
-                                if error_text and len(error_text.strip()) > 10:
-                                    error_found = True
-                                    logger.warning(f"Configured error selector found: {error_text[:100]}")
-                    except:
-                        pass
+                        # Strategy 3: Configured error selector (only if it's a specific error class)
+                        elif probe.get("configured_error"):
+                            error_text = probe["configured_error"]
+                            error_found = True
+                            logger.warning(f"Configured error selector found: {error_text[:100]}")
                 
-                # Strategy 4: Check page body for specific error patterns (last resort)
-                # Only check if we haven't found an error yet and we're looking for specific patterns
-                if not error_found:
-                    try:
-                        body_text = await page.locator("body").text_content() or ""
-                        body_lower = body_text.lower()
+                        # Strategy 4: Check page body for specific error patterns (last resort)
+                        # Only check if we haven't found an error yet and we're looking for specific patterns
+                        if not error_found:
+                            try:
+                                # Scanned in the page; only the matched categories cross the wire
+                                body_errors = set(await page.evaluate(_JS_BODY_ERROR_SCAN, _BODY_ERROR_PATTERNS))
                         
-                        # FIX: Only check for specific error patterns, not generic "error" text
-                        # Check for Google account popup errors (specific pattern)
-                        if "rất tiếc, đã xảy ra lỗi" in body_lower or "unfortunately, an error occurred" in body_lower:
-                            # Try to find the specific error message element
-                            google_error_selectors = [
-                                "text=Rất tiếc, đã xảy ra lỗi!",
-                                "text=Unfortunately, an error occurred!",
-                                '[role="dialog"]:has-text("Rất tiếc")',
-                                '[role="alertdialog"]:has-text("Rất tiếc")',
-                            ]
-                            for selector in google_error_selectors:
-                                try:
-                                    elem = page.locator(selector).first
-                                    if await elem.count() > 0 and await elem.is_visible():
-                                        error_text = await elem.text_content()
-                                        if error_text and len(error_text.strip()) > 10:
-                                            error_found = True
-                                            error_text = error_text.strip()
-                                            logger.error(f"Google account popup error detected: {error_text[:200]}")
-                                            break
-                                except:
-                                    continue
-                            
-                            if not error_found:
-                                error_text = "Google account error: Rất tiếc, đã xảy ra lỗi! (Unfortunately, an error occurred!)"
-                                error_found = True
+                                # FIX: Only check for specific error patterns, not generic "error" text
+                                # Check for Google account popup errors (specific pattern)
+                                if "google_popup" in body_errors:
+                                    # Try to find the specific error message element
+                                    error_text = await self._visible_error_text(page, _GOOGLE_ERROR_UNION)
+                                    if error_text:
+                                        error_found = True
+                                        logger.error(f"Google account popup error detected: {error_text[:200]}")
+                                    else:
+                                        error_text = "Google account error: Rất tiếc, đã xảy ra lỗi! (Unfortunately, an error occurred!)"
+                                        error_found = True
                         
-                        # Check for credit loading errors (specific pattern)
-                        elif not error_found and "không tải được số tín dụng" in body_lower:
-                            # Try to extract the specific error message
-                            credit_error_selectors = [
-                                "text=Không tải được số tín dụng của bạn",
-                                "text=Could not load your credits",
-                                '[role="alert"]:has-text("tín dụng")',
-                            ]
-                            for selector in credit_error_selectors:
-                                try:
-                                    elem = page.locator(selector).first
-                                    if await elem.count() > 0 and await elem.is_visible():
-                                        error_text = await elem.text_content()
-                                        if error_text and len(error_text.strip()) > 10:
-                                            error_found = True
-                                            break
-                                except:
-                                    continue
-                            
-                            if not error_found:
-                                error_text = "Credit loading error: Không tải được số tín dụng của bạn"
-                                error_found = True
+                                # Check for credit loading errors (specific pattern)
+                                elif not error_found and "credits" in body_errors:
+                                    # Try to extract the specific error message
+                                    error_text = await self._visible_error_text(page, _CREDIT_ERROR_UNION)
+                                    if error_text:
+                                        error_found = True
+                                    else:
+                                        error_text = "Credit loading error: Không tải được số tín dụng của bạn"
+                                        error_found = True
                         
-                        # Check for insufficient credits error (specific pattern)
-                        elif not error_found and ("you need more ai credits" in body_lower or "cần thêm tín dụng" in body_lower):
-                            credit_error_selectors = [
-                                "text=You need more AI credits",
-                                "text=Cần thêm tín dụng AI",
-                            ]
-                            for selector in credit_error_selectors:
-                                try:
-                                    elem = page.locator(selector).first
-                                    if await elem.count() > 0 and await elem.is_visible():
-                                        error_text = await elem.text_content()
-                                        if error_text and len(error_text.strip()) > 10:
-                                            error_found = True
-                                            break
-                                except:
-                                    continue
-                            
-                            if not error_found:
-                                error_text = "Insufficient AI credits"
-                                error_found = True
-                    except Exception as body_check_error:
-                        logger.debug(f"Error checking body text: {body_check_error}")
-                        pass
+                                # Check for insufficient credits error (specific pattern)
+                                elif not error_found and "insufficient" in body_errors:
+                                    error_text = await self._visible_error_text(page, _INSUFFICIENT_CREDIT_UNION)
+                                    if error_text:
+                                        error_found = True
+                                    else:
+                                        error_text = "Insufficient AI credits"
+                                        error_found = True
+                            except Exception as body_check_error:
+                                logger.debug(f"Error checking body text: {body_check_error}")
+                                body_scan_failed = True
                 
-                # FIX: Only return error if we found a substantial, specific error message
-                # Don't return error for generic UI elements or false positives
-                if error_found and error_text:
-                    error_text_clean = error_text.strip()
+                        # FIX: Only return error if we found a substantial, specific error message
+                        # Don't return error for generic UI elements or false positives
+                        if error_found and error_text:
+                            error_text_clean = error_text.strip()
+                            error_lower = error_text_clean.lower()
                     
-                    # Log what we found for debugging
-                    logger.debug(f"Error detection found: error_found={error_found}, error_text='{error_text_clean[:100]}'")
+                            # Log what we found for debugging
+                            logger.debug(f"Error detection found: error_found={error_found}, error_text='{error_text_clean[:100]}'")
                     
-                    # Filter out very short or generic error messages (likely false positives)
-                    if len(error_text_clean) < 10:
-                        logger.debug(f"Ignoring short/generic error text: '{error_text_clean}' (likely false positive)")
-                        error_found = False  # Don't treat as error
-                    elif error_text_clean.lower() in ["flow", "error", "failed", "loading", "insufficient ai credits"]:
-                        logger.debug(f"Ignoring generic error text: '{error_text_clean}' (likely false positive)")
-                        error_found = False  # Don't treat as error
-                    elif "error detected on flow page" in error_text_clean.lower():
-                        # This is the generic fallback message - don't treat as error
-                        logger.debug(f"Ignoring generic fallback error message: '{error_text_clean}' (likely false positive)")
-                        error_found = False  # Don't treat as error
-                    else:
-                        # Valid error message found - check if it's actually an error
-                        # Only return error if it's a known error pattern
-                        known_error_patterns = [
-                            "something went wrong",
-                            "generation failed",
-                            "failed to generate",
-                            "error generating",
-                            "unable to generate",
-                            "rất tiếc",
-                            "đã xảy ra lỗi",
-                            "unfortunately, an error occurred",
-                            "không tải được số tín dụng",
-                            "could not load your credits",
-                            "you need more ai credits",
-                            "cần thêm tín dụng"
-                        ]
-                        
-                        error_lower = error_text_clean.lower()
-                        is_known_error = any(pattern in error_lower for pattern in known_error_patterns)
+                            # Filter out very short or generic error messages (likely false positives)
+                            if len(error_text_clean) < 10:
+                                logger.debug(f"Ignoring short/generic error text: '{error_text_clean}' (likely false positive)")
+                                error_found = False  # Don't treat as error
+                            elif error_lower in _GENERIC_ERROR_TEXTS:
+                                logger.debug(f"Ignoring generic error text: '{error_text_clean}' (likely false positive)")
+                                error_found = False  # Don't treat as error
+                            elif "error detected on flow page" in error_lower:
+                                # This is the generic fallback message - don't treat as error
+                                logger.debug(f"Ignoring generic fallback error message: '{error_text_clean}' (likely false positive)")
+                                error_found = False  # Don't treat as error
+                            else:
+                                # Valid error message found - check if it's actually an error
+                                # Only return error if it's a known error pattern
+                                is_known_error = _KNOWN_ERROR_RE.search(error_text_clean) is not None
                         
-                        if is_known_error:
-                            # Valid error message found
-                            logger.error(f"Render error detected on page: {error_text_clean[:200]}")
-                            return {"status": "error", "error": error_text_clean[:500]}  # Limit length
-                        else:
-                            # Not a known error pattern - likely false positive
-                            logger.debug(f"Ignoring error text that doesn't match known patterns: '{error_text_clean[:100]}' (likely false positive)")
-                            error_found = False  # Don't treat as error
+                                if is_known_error:
+                                    # Valid error message found
+                                    logger.error(f"Render error detected on page: {error_text_clean[:200]}")
+                                    return {"status": "error", "error": error_text_clean[:500]}  # Limit length
+                                else:
+                                    # Not a known error pattern - likely false positive
+                                    logger.debug(f"Ignoring error text that doesn't match known patterns: '{error_text_clean[:100]}' (likely false positive)")
+                                    error_found = False  # Don't treat as error
                 
-                # If error_found but no text, it's likely a false positive - don't treat as error
-                # (We already filtered these out above, but just in case)
-                if error_found and not error_text:
-                    logger.debug("Error element found but no text - likely false positive, ignoring")
-                    error_found = False
+                        # If error_found but no text, it's likely a false positive - don't treat as error
+                        # (We already filtered these out above, but just in case)
+                        if error_found and not error_text:
+                            logger.debug("Error element found but no text - likely false positive, ignoring")
+                            error_found = False
+                        
+                        # Only remembered once the scan finished without an error, so a body
+                        # scan that raised is repeated on the next poll instead of skipped
+                        if not body_scan_failed:
+                            last_fingerprint = probe.get("fingerprint")
                 
-            except Exception as e:
-                logger.debug(f"Error checking completion: {e}")
-            
-            # Log progress every 30 seconds
-            current_time = asyncio.get_event_loop().time()
-            if current_time - last_log_time >= 30:
-                elapsed_seconds = (current_time - start_time)
-                remaining_seconds = (timeout / 1000) - elapsed_seconds
-                logger.info(f"Still waiting for video generation... (elapsed: {elapsed_seconds:.0f}s, remaining: {remaining_seconds:.0f}s)")
-                last_log_time = current_time
-            
-            await asyncio.sleep(poll_interval)
+                except Exception as e:
+                    logger.debug(f"Error checking completion: {e}")
+            
+                # Between probe rounds, wait in the page for something to happen instead of sleeping
+                signal = await self._wait_for_completion_signal(page, current_interval, last_signal)
+                if signal.get("video"):
+                    video_src = signal["video"]
+                    logger.info(f"Video generation completed (video src appeared: {video_src[:50]}...)")
+                    return {"status": "completed", "video_url": video_src}
+                if signal.get("signal"):
+                    last_signal = signal["signal"]
+                    logger.debug(f"Completion signal: {last_signal} - probing again")
+                else:
+                    current_interval = min(current_interval * 1.5, _MAX_POLL_INTERVAL)
+        finally:
+            progress_task.cancel()
         
         elapsed_seconds = (asyncio.get_event_loop().time() - start_time)
         logger.error(f"Render timeout exceeded after {elapsed_seconds:.0f} seconds")
         return {"status": "timeout", "error": f"Render timeout exceeded after {elapsed_seconds:.0f} seconds"}
     
+    @staticmethod
+    async def _log_completion_progress(start_time: float, timeout: int) -> None:
+        """Log wait_for_completion progress every 30 seconds until cancelled"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(30)
+            elapsed_seconds = loop.time() - start_time
+            remaining_seconds = (timeout / 1000) - elapsed_seconds
+            logger.info(f"Still waiting for video generation... (elapsed: {elapsed_seconds:.0f}s, remaining: {remaining_seconds:.0f}s)")
+    
+    async def _visible_error_text(self, page: Page, union: str) -> Optional[str]:
+        """Stripped text of the first visible element matching union, if over 10 chars"""
+        try:
+            elem = page.locator(f"{union} >> visible=true").first
+            if await elem.is_visible():
+                error_text = (await elem.text_content(timeout=500) or "").strip()
+                if len(error_text) > 10:
+                    return error_text
+        except PlaywrightError:
+            pass
+        return None
+    
+    async def _probe_completion_fallback(self, page: Page, check_errors: bool) -> dict:
+        """Playwright-locator version of _JS_COMPLETION_PROBE, used when the evaluate fails"""
+        probe = {}
+        error_selector = self._sel_error if check_errors else None
+        selectors = _VIDEO_SELECTORS + _DOWNLOAD_SELECTORS + _PREVIEW_SELECTORS
+        if check_errors:
+            selectors += _ERROR_MESSAGE_LOCATORS + _ERROR_DIALOG_LOCATORS
+            if error_selector:
+                selectors += (error_selector,)
+        
+        # The visibility checks are independent, so they run concurrently; only the
+        # elements that turn out visible are read from below, in the probe's order
+        results = await asyncio.gather(
+            *(page.locator(selector).first.is_visible() for selector in selectors),
+            return_exceptions=True,
+        )
+        visible = {selector for selector, result in zip(selectors, results) if result is True}
+        
+        def visible_first(selector):
+            return page.locator(selector).first if selector in visible else None
+        
+        for video_selector in _VIDEO_SELECTORS:
+            video = visible_first(video_selector)
+            if video is None:
+                continue
+            for attr in _VIDEO_URL_ATTRS:
+                try:
+                    attr_value = await video.get_attribute(attr, timeout=500)
+                except PlaywrightError:
+                    continue
+                if attr_value and attr_value.startswith(("http", "blob:", "data:")):
+                    probe["video_url"] = attr_value
+                    return probe
+            probe["video_pending"] = True
+        
+        for download_selector in _DOWNLOAD_SELECTORS:
+            download_btn = visible_first(download_selector)
+            if download_btn is not None:
+                probe["download"] = download_selector
+                return probe
+        
+        for preview_selector in _PREVIEW_SELECTORS:
+            preview = visible_first(preview_selector)
+            if preview is not None:
+                try:
+                    src = await preview.get_attribute("src", timeout=500)
+                    alt = await preview.get_attribute("alt", timeout=500)
+                except PlaywrightError:
+                    continue
+                if src or (alt and "video" in alt.lower()):
+                    probe["preview"] = True
+                    break
+        
+        if not check_errors:
+            return probe
+        
+        for message_locator in _ERROR_MESSAGE_LOCATORS:
+            error_elem = visible_first(message_locator)
+            if error_elem is not None:
+                error_text = await error_elem.text_content(timeout=500)
+                if error_text and len(error_text.strip()) > 10:
+                    probe["error_message"] = error_text
+                    return probe
+        
+        for dialog_locator in _ERROR_DIALOG_LOCATORS:
+            error_elem = visible_first(dialog_locator)
+            if error_elem is not None:
+                error_text = await error_elem.text_content(timeout=500)
+                if (
+                    error_text
+                    and len(error_text.strip()) > 15
+                    and any(keyword in error_text.lower() for keyword in _ERROR_DIALOG_KEYWORDS)
+                ):
+                    probe["error_dialog"] = error_text
+                    return probe
+        
+        if error_selector:
+            error = visible_first(error_selector)
+            if error is not None:
+                error_text = await error.text_content(timeout=500)
+                if error_text and len(error_text.strip()) > 10:
+                    probe["configured_error"] = error_text
+        return probe
+    
+    async def _wait_for_completion_signal(
+        self, page: Page, seconds: float, last_signal: Optional[str] = None
+    ) -> dict:
+        """Wait up to `seconds` for _JS_COMPLETION_SIGNAL; returns its result or {} on timeout.
+
+        Like _wait_for_video_src this only re-checks on DOM mutations, so a download button
+        or error dialog is picked up as soon as it renders rather than on the next poll.
+        """
+        try:
+            handle = await page.wait_for_function(
+                _JS_COMPLETION_SIGNAL, arg=[_PROBE_ERROR_ARGS[0], last_signal],
+                timeout=seconds * 1000, polling="mutation"
+            )
+            return await handle.json_value()
+        except PlaywrightTimeoutError:
+            return {}
+        except Exception as e:
+            logger.debug(f"Completion signal wait failed: {e}")
+            await asyncio.sleep(seconds)
+            return {}
+    
+    async def _wait_for_video_src(self, page: Page, seconds: float) -> Optional[str]:
+        """Wait up to `seconds` for a visible video to get a src, returning it (or None).
+
+        The predicate re-runs on DOM mutations only, so this costs no round trips while
+        the page is idle and returns as soon as the src is set.
+        """
+        try:
+            handle = await page.wait_for_function(
+                _JS_VIDEO_SRC_READY, timeout=seconds * 1000, polling="mutation"
+            )
+            return await handle.json_value()
+        except PlaywrightTimeoutError:
+            return None
+        except Exception as e:
+            logger.debug(f"Video src wait failed: {e}")
+            await asyncio.sleep(seconds)
+            return None
+    
     async def download_video(
         self,
         page: Page,
@@ -3026,34 +3248,29 @@ class FlowController:
     ) -> str:
         """Download video from Flow UI"""
         try:
-            # Ensure output directory exists
-            Path(output_path).mkdir(parents=True, exist_ok=True)
+            # Ensure output directory exists; every path below writes and returns this file
+            output_dir = Path(output_path).absolute()
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_file = output_dir / f"scene_{scene_id}.mp4"
             
             # First, try to get video URL directly from video element (faster and more reliable)
-            video = page.locator(FLOW_SELECTORS.get("videoElement", "video")).first
+            video = page.locator(self._sel_video).first
             if await video.count() > 0:
-                video_src = await video.get_attribute("src")
+                video_src = await video.get_attribute("src", timeout=500)
                 if video_src and video_src.startswith("http"):
                     logger.info(f"Found video URL: {video_src}")
                     # Download from URL directly
-                    import httpx
-                    async with httpx.AsyncClient(timeout=60.0) as client:
-                        response = await client.get(video_src)
-                        response.raise_for_status()
-                        
-                        output_file = Path(output_path) / f"scene_{scene_id}.mp4"
-                        with open(output_file, "wb") as f:
-                            f.write(response.content)
-                        
-                        logger.info(f"Video downloaded to {output_file}")
-                        return str(output_file.absolute())
+                    try:
+                        return await self._fetch_video_to_file(video_src, output_file)
+                    except ValueError as not_video:
+                        logger.warning(f"Video URL did not serve a video: {not_video}")
             
             # Fallback: Try download button with download event
             logger.info("Video URL not found, trying download button...")
             try:
                 async with page.expect_download(timeout=10000) as download_info:
-                    download_btn = page.locator(FLOW_SELECTORS.get("downloadButton", "button")).first
-                    if await download_btn.count() > 0 and await download_btn.is_visible():
+                    download_btn = page.locator(self._sel_download).first
+                    if await download_btn.is_visible():
                         await download_btn.click()
                     else:
                         # Try to find any download link
@@ -3064,31 +3281,58 @@ class FlowController:
                             raise Exception("No download button found")
                 
                 download = await download_info.value
-                output_file = Path(output_path) / f"scene_{scene_id}.mp4"
                 await download.save_as(output_file)
                 logger.info(f"Video downloaded to {output_file}")
-                return str(output_file.absolute())
+                return str(output_file)
             except Exception as download_error:
                 logger.warning(f"Download button method failed: {download_error}")
                 # If download button fails, try to get video URL again (might have appeared)
-                video = page.locator(FLOW_SELECTORS.get("videoElement", "video")).first
+                video = page.locator(self._sel_video).first
                 if await video.count() > 0:
-                    video_src = await video.get_attribute("src")
+                    video_src = await video.get_attribute("src", timeout=500)
                     if video_src and video_src.startswith("http"):
                         logger.info(f"Retrying with video URL: {video_src}")
-                        import httpx
-                        async with httpx.AsyncClient(timeout=60.0) as client:
-                            response = await client.get(video_src)
-                            response.raise_for_status()
-                            
-                            output_file = Path(output_path) / f"scene_{scene_id}.mp4"
-                            with open(output_file, "wb") as f:
-                                f.write(response.content)
-                            
-                            logger.info(f"Video downloaded to {output_file}")
-                            return str(output_file.absolute())
+                        return await self._fetch_video_to_file(video_src, output_file)
                 
                 raise download_error
         except Exception as e:
             logger.error(f"Failed to download video: {e}")
             raise
+    
+    async def _fetch_video_to_file(self, url: str, output_file: Path) -> str:
+        """Stream a video URL to output_file (an absolute path), retrying transport and HTTP errors.
+
+        The body goes to a .part file that replaces output_file only once it is complete,
+        so a failed download never leaves a truncated video or clobbers an earlier one.
+        Returns output_file as a string. Raises ValueError when the URL does not serve a video.
+        """
+        part_file = output_file.with_suffix(".mp4.part")
+        try:
+            for attempt in range(_DOWNLOAD_ATTEMPTS):
+                try:
+                    client = await _get_http_client()
+                    async with client.stream("GET", url) as response:
+                        response.raise_for_status()
+                        # Headers arrive before the body, so a stale src that serves a page or
+                        # an image is rejected without reading it
+                        content_type = response.headers.get("content-type", "")
+                        if content_type.startswith(_NON_VIDEO_CONTENT_TYPES):
+                            raise ValueError(f"Not a video (content-type: {content_type})")
+                        with open(part_file, "wb") as f:
+                            async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                                f.write(chunk)
+                    break
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    if attempt == _DOWNLOAD_ATTEMPTS - 1:
+                        raise
+                    logger.warning(f"Video download attempt {attempt + 1} failed: {e} - retrying")
+                    # Don't keep a half-written body on disk through the backoff
+                    part_file.unlink(missing_ok=True)
+                    await asyncio.sleep(2 ** attempt)
+            os.replace(part_file, output_file)
+        finally:
+            # Gone after a successful replace; otherwise whatever a failed attempt left
+            part_file.unlink(missing_ok=True)
+        
+        logger.info(f"Video downloaded to {output_file}")
+        return str(output_file)
@@ -4,18 +4,31 @@ Guided Login Service - Manages guided login flow with browser tabs
 
 import logging
 import asyncio
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from playwright.async_api import Page, BrowserContext
 from app.services.browser_manager import BrowserManager
-from app.services.cookie_extractor import CookieExtractor
+from app.services.cookie_extractor import CookieExtractor, FLOW_URL_RE
 from app.services.flow_controller import FlowController
 from app.services.profile_manager import ProfileManager
-from app.core.database import SessionLocal
 from app.config import config_manager, settings
 
 logger = logging.getLogger(__name__)
 
+# Seconds a Gmail "Sign in" probe stays valid for the same tab URL
+_GMAIL_STATUS_TTL = 1.5
+
+# Seconds a full check_login_status() result is reused (UI polls and confirm overlap)
+_LOGIN_STATUS_TTL = 1.0
+
+# Long-lived browser contexts grow in memory until closed; relaunch the profile's
+# browser after this many tab navigations or this long without opening a tab
+_RECYCLE_AFTER_NAVIGATIONS = 50
+_RECYCLE_AFTER_IDLE_SECONDS = 30 * 60
+
+_GMAIL_LOGIN_URL = "https://accounts.google.com/signin/v2/identifier?continue=https%3A%2F%2Fmail.google.com%2Fmail&flowName=GlifWebSignIn&flowEntry=ServiceLogin"
+
 
 class GuidedLoginService:
     """Manages guided login flow with step-by-step instructions"""
@@ -25,9 +38,34 @@ class GuidedLoginService:
         self.browser_managers: Dict[str, BrowserManager] = {}
         self.browser_contexts: Dict[str, BrowserContext] = {}
         self.pages: Dict[str, Dict[str, Page]] = {}  # {profile_id: {"gmail": page, "flow": page}}
+        self._extractors: Dict[str, CookieExtractor] = {}
+        self._gmail_status_cache: Dict[str, Tuple[float, str, bool]] = {}  # {profile_id: (checked_at, url, logged_in)}
+        self._login_status_cache: Dict[str, Tuple[float, Dict]] = {}  # {profile_id: (checked_at, result)}
+        self._nav_counts: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+        self._context_locks: Dict[str, asyncio.Lock] = {}
+    
+    def _lock(self, profile_id: str) -> asyncio.Lock:
+        """Per-profile lock guarding browser launch, recycle and reuse"""
+        return self._context_locks.setdefault(profile_id, asyncio.Lock())
     
     async def open_browser_with_profile(self, profile_id: str) -> Dict:
-        """Open browser with specific profile"""
+        """Open browser with specific profile (reusing it if already open)"""
+        # A double-clicked "open" must not launch a second browser and orphan the first
+        async with self._lock(profile_id):
+            if profile_id in self.browser_managers:
+                profile = self.profile_manager.get_profile(profile_id)
+                profile_name = profile.name if profile else profile_id
+                return {
+                    "success": True,
+                    "message": f"Browser already open with profile: {profile_name}",
+                    "profile_id": profile_id,
+                    "profile_name": profile_name
+                }
+            return await self._launch_profile_browser(profile_id)
+    
+    async def _launch_profile_browser(self, profile_id: str) -> Dict:
+        """Launch the profile's browser and register it; callers hold self._lock(profile_id)"""
         try:
             profile = self.profile_manager.get_profile(profile_id)
             if not profile:
@@ -41,6 +79,7 @@ class GuidedLoginService:
             self.browser_managers[profile_id] = browser_manager
             self.browser_contexts[profile_id] = browser_manager.context
             self.pages[profile_id] = {}
+            self._extractors[profile_id] = CookieExtractor(browser_manager)
             
             logger.info(f"Opened browser with profile: {profile.name}")
             
@@ -55,32 +94,65 @@ class GuidedLoginService:
             logger.error(f"Failed to open browser with profile: {e}")
             raise
     
+    async def _open_tab(self, context: BrowserContext, url: str, key: str):
+        """Open url in a new tab of context; returns (key, page)"""
+        page = await context.new_page()
+        
+        # Just navigate to URL and let user interact manually
+        # Don't wait for anything - just open and leave it alone
+        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        return key, page
+    
+    async def _login_context(self, profile_id: str, navigations: int = 1) -> BrowserContext:
+        """Browser context for profile about to open `navigations` tabs, opening or recycling the browser as needed"""
+        # Serialize per profile so two requests never launch or swap the same profile's browser at once
+        async with self._lock(profile_id):
+            if profile_id in self.browser_contexts:
+                await self._maybe_recycle_context(profile_id)
+            if profile_id not in self.browser_contexts:
+                await self._launch_profile_browser(profile_id)
+            self._nav_counts[profile_id] = self._nav_counts.get(profile_id, 0) + navigations
+            self._last_used[profile_id] = time.monotonic()
+            return self.browser_contexts[profile_id]
+    
+    async def _maybe_recycle_context(self, profile_id: str) -> None:
+        """Relaunch the profile's browser once it has been used or idle long enough to bloat"""
+        navigations = self._nav_counts.get(profile_id, 0)
+        idle = time.monotonic() - self._last_used.get(profile_id, time.monotonic())
+        if navigations < _RECYCLE_AFTER_NAVIGATIONS and idle < _RECYCLE_AFTER_IDLE_SECONDS:
+            return
+        
+        # Never pull Gmail or Flow out from under a user who is still logging in;
+        # recycling waits until every login tab has been closed
+        open_tabs = [key for key, page in self.pages.get(profile_id, {}).items() if not page.is_closed()]
+        if open_tabs:
+            logger.debug(f"Not recycling browser for profile {profile_id}: login tabs open ({', '.join(open_tabs)})")
+            return
+        
+        # Guided login always opens the persistent profile (never the state.json snapshot),
+        # so cookies and storage survive in the profile directory; closing it is the only
+        # way to release what the browser has accumulated
+        logger.info(
+            f"Recycling browser context for profile {profile_id} "
+            f"({navigations} navigations, idle {idle:.0f}s)"
+        )
+        await self.close_profile_browser(profile_id)
+    
     async def open_gmail_tab(self, profile_id: str) -> Dict:
         """Open Gmail login tab - just opens the URL, no automation"""
         try:
-            if profile_id not in self.browser_contexts:
-                await self.open_browser_with_profile(profile_id)
-            
-            context = self.browser_contexts[profile_id]
-            page = await context.new_page()
-            
-            gmail_url = "https://accounts.google.com/signin/v2/identifier?continue=https%3A%2F%2Fmail.google.com%2Fmail&flowName=GlifWebSignIn&flowEntry=ServiceLogin"
-            
-            # Just navigate to URL and let user interact manually
-            # Don't wait for anything - just open and leave it alone
-            await page.goto(gmail_url, wait_until="domcontentloaded", timeout=30000)
+            context = await self._login_context(profile_id)
+            _, page = await self._open_tab(context, _GMAIL_LOGIN_URL, "gmail")
             
             # Store page reference (but don't interact with it)
-            if profile_id not in self.pages:
-                self.pages[profile_id] = {}
-            self.pages[profile_id]["gmail"] = page
+            self.pages.setdefault(profile_id, {})["gmail"] = page
             
             logger.info(f"Opened Gmail tab for profile: {profile_id} - user can now log in manually")
             
             return {
                 "success": True,
                 "message": "Gmail login page opened. Please log in manually in the browser window.",
-                "url": gmail_url
+                "url": _GMAIL_LOGIN_URL
             }
             
         except Exception as e:
@@ -90,22 +162,12 @@ class GuidedLoginService:
     async def open_flow_tab(self, profile_id: str) -> Dict:
         """Open Flow login tab - just opens the URL, no automation"""
         try:
-            if profile_id not in self.browser_contexts:
-                await self.open_browser_with_profile(profile_id)
-            
-            context = self.browser_contexts[profile_id]
-            page = await context.new_page()
-            
+            context = await self._login_context(profile_id)
             flow_url = config_manager.get("flow.url", settings.FLOW_URL)
-            
-            # Just navigate to URL and let user interact manually
-            # Don't wait for anything - just open and leave it alone
-            await page.goto(flow_url, wait_until="domcontentloaded", timeout=30000)
+            _, page = await self._open_tab(context, flow_url, "flow")
             
             # Store page reference (but don't interact with it)
-            if profile_id not in self.pages:
-                self.pages[profile_id] = {}
-            self.pages[profile_id]["flow"] = page
+            self.pages.setdefault(profile_id, {})["flow"] = page
             
             logger.info(f"Opened Flow tab for profile: {profile_id} - user can now log in manually")
             
@@ -119,6 +181,100 @@ class GuidedLoginService:
             logger.error(f"Failed to open Flow tab: {e}")
             raise
     
+    async def open_login_tabs(self, profile_id: str) -> Dict:
+        """Open the Gmail and Flow login tabs at once, navigating both concurrently"""
+        try:
+            context = await self._login_context(profile_id, navigations=2)
+            flow_url = config_manager.get("flow.url", settings.FLOW_URL)
+            
+            results = await asyncio.gather(
+                self._open_tab(context, _GMAIL_LOGIN_URL, "gmail"),
+                self._open_tab(context, flow_url, "flow"),
+                return_exceptions=True
+            )
+            
+            # Keep whichever tab opened even if the other one failed
+            pages = self.pages.setdefault(profile_id, {})
+            errors = []
+            for result in results:
+                if isinstance(result, BaseException):
+                    errors.append(result)
+                else:
+                    key, page = result
+                    pages[key] = page
+            if errors:
+                raise errors[0]
+            
+            logger.info(f"Opened Gmail and Flow tabs for profile: {profile_id} - user can now log in manually")
+            
+            return {
+                "success": True,
+                "message": "Gmail and Flow pages opened. Please log in manually in the browser window.",
+                "urls": {"gmail": _GMAIL_LOGIN_URL, "flow": flow_url}
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to open login tabs: {e}")
+            raise
+    
+    async def _check_gmail(self, profile_id: str, page: Page) -> bool:
+        """Gmail login state from the tab's current URL and content, without navigating"""
+        try:
+            # Just check current state without navigating or interacting
+            current_url = page.url
+            # Simple check: if we're on mail.google.com and not on login page
+            if "mail.google.com" in current_url and "accounts.google.com" not in current_url:
+                return True
+            
+            # The UI polls faster than the page changes; reuse a fresh probe of the same URL
+            checked_at, cached_url, cached_status = self._gmail_status_cache.get(profile_id, (0.0, "", False))
+            if cached_url == current_url and time.monotonic() - checked_at < _GMAIL_STATUS_TTL:
+                return cached_status
+            
+            # Check if login button exists (means not logged in)
+            try:
+                login_count = await page.locator('text=Sign in').count()
+            except Exception:
+                # If we can't check, assume not logged in
+                return False
+            logged_in = login_count == 0
+            self._gmail_status_cache[profile_id] = (time.monotonic(), current_url, logged_in)
+            return logged_in
+        except Exception as e:
+            logger.warning(f"Could not check Gmail login: {e}")
+            return False
+    
+    async def _check_flow(self, page: Page, cookie_extractor: CookieExtractor) -> bool:
+        """Flow login state from the tab's current state, without navigating"""
+        try:
+            # Check if page is still open
+            if page.is_closed():
+                logger.warning("Flow page is closed, cannot check login status")
+                return False
+            
+            # Use CookieExtractor's verify_login_status for consistent checking
+            try:
+                flow_logged_in = await cookie_extractor.verify_login_status(page)
+                logger.info(f"Flow login status: {flow_logged_in}")
+                return flow_logged_in
+            except Exception as check_error:
+                logger.error(f"Error checking Flow login status: {check_error}", exc_info=True)
+                # If we can't check but we're on the flow page, assume logged in
+                # (user might have logged in manually)
+                try:
+                    current_url = page.url
+                    # Use same flexible Flow URL pattern
+                    is_flow_url = bool(FLOW_URL_RE.search(current_url)) and "accounts.google.com" not in current_url
+                    if is_flow_url:
+                        logger.info("Assuming Flow is logged in (on Flow page but check failed)")
+                        return True
+                    return False
+                except Exception:
+                    return False
+        except Exception as e:
+            logger.error(f"Could not check Flow login: {e}", exc_info=True)
+            return False
+    
     async def check_login_status(self, profile_id: str) -> Dict:
         """Check login status for both Gmail and Flow - non-intrusive check only"""
         try:
@@ -131,68 +287,29 @@ class GuidedLoginService:
             if profile_id not in self.pages:
                 return result
             
+            # The dialog polls this while the user logs in, so it counts as activity
+            self._last_used[profile_id] = time.monotonic()
+            
+            cached = self._login_status_cache.get(profile_id)
+            if cached and time.monotonic() - cached[0] < _LOGIN_STATUS_TTL:
+                return dict(cached[1])
+            
             pages = self.pages[profile_id]
-            cookie_extractor = CookieExtractor(self.browser_managers[profile_id])
+            cookie_extractor = self._extractors[profile_id]
             
-            # Check Gmail - just check current URL and page content, don't navigate
+            # The two tabs are independent, so check them concurrently
+            checks = {}
             if "gmail" in pages:
-                try:
-                    page = pages["gmail"]
-                    # Just check current state without navigating or interacting
-                    current_url = page.url
-                    # Simple check: if we're on mail.google.com and not on login page
-                    if "mail.google.com" in current_url and "accounts.google.com" not in current_url:
-                        result["gmail_logged_in"] = True
-                    else:
-                        # Check if login button exists (means not logged in)
-                        try:
-                            login_count = await page.locator('text=Sign in').count()
-                            result["gmail_logged_in"] = login_count == 0
-                        except:
-                            # If we can't check, assume not logged in
-                            result["gmail_logged_in"] = False
-                except Exception as e:
-                    logger.warning(f"Could not check Gmail login: {e}")
-            
-            # Check Flow - just check current URL and page content, don't navigate
+                checks["gmail_logged_in"] = self._check_gmail(profile_id, pages["gmail"])
             if "flow" in pages:
-                try:
-                    page = pages["flow"]
-                    
-                    # Check if page is still open
-                    if page.is_closed():
-                        logger.warning("Flow page is closed, cannot check login status")
-                        result["flow_logged_in"] = False
-                    else:
-                        # Use CookieExtractor's verify_login_status for consistent checking
-                        try:
-                            result["flow_logged_in"] = await cookie_extractor.verify_login_status(page)
-                            logger.info(f"Flow login status: {result['flow_logged_in']}")
-                        except Exception as check_error:
-                            logger.error(f"Error checking Flow login status: {check_error}", exc_info=True)
-                            # If we can't check but we're on the flow page, assume logged in
-                            # (user might have logged in manually)
-                            try:
-                                current_url = page.url
-                                # Use same flexible Flow URL pattern
-                                is_flow_url = (
-                                    ("labs.google.com" in current_url or "labs.google" in current_url) and 
-                                    ("/fx/" in current_url and "/tools/flow" in current_url) and
-                                    "accounts.google.com" not in current_url
-                                )
-                                if is_flow_url:
-                                    result["flow_logged_in"] = True
-                                    logger.info("Assuming Flow is logged in (on Flow page but check failed)")
-                                else:
-                                    result["flow_logged_in"] = False
-                            except:
-                                result["flow_logged_in"] = False
-                except Exception as e:
-                    logger.error(f"Could not check Flow login: {e}", exc_info=True)
-                    result["flow_logged_in"] = False
+                checks["flow_logged_in"] = self._check_flow(pages["flow"], cookie_extractor)
+            statuses = await asyncio.gather(*checks.values(), return_exceptions=True)
+            for key, status in zip(checks, statuses):
+                result[key] = status is True
             
             result["both_logged_in"] = result["gmail_logged_in"] and result["flow_logged_in"]
             
+            self._login_status_cache[profile_id] = (time.monotonic(), dict(result))
             return result
             
         except Exception as e:
@@ -211,10 +328,13 @@ class GuidedLoginService:
                 raise ValueError(f"No browser context found for profile {profile_id}")
             
             context = self.browser_contexts[profile_id]
-            cookie_extractor = CookieExtractor(self.browser_managers[profile_id])
+            cookie_extractor = self._extractors[profile_id]
             
-            # Extract all cookies from context
-            cookies = await cookie_extractor.extract_cookies_from_context(context)
+            # Extract all cookies from context while verifying login status on the tabs
+            cookies, login_status = await asyncio.gather(
+                cookie_extractor.extract_cookies_from_context(context),
+                self.check_login_status(profile_id)
+            )
             
             if not cookies:
                 return {
@@ -223,9 +343,6 @@ class GuidedLoginService:
                     "cookies_count": 0
                 }
             
-            # Verify login status
-            login_status = await self.check_login_status(profile_id)
-            
             if not login_status["both_logged_in"]:
                 return {
                     "success": False,
@@ -240,20 +357,22 @@ class GuidedLoginService:
             
             logger.info(f"Login confirmed for profile {profile_id}. Cookies saved to profile.")
             
+            # Also keep a storage_state() snapshot so later launches can skip the full profile
+            try:
+                await self.profile_manager.save_state(profile_id, context)
+            except Exception as e:
+                logger.warning(f"Failed to save storage state: {e}")
+            
             # Update profile metadata
-            profile = self.profile_manager.get_profile(profile_id)
-            if profile:
-                db = SessionLocal()
-                try:
-                    profile.profile_metadata = profile.profile_metadata or {}
-                    profile.profile_metadata["cookies_saved"] = True
-                    profile.profile_metadata["cookies_count"] = len(cookies)
-                    profile.profile_metadata["last_login_check"] = asyncio.get_event_loop().time()
-                    db.commit()
-                except Exception as e:
-                    logger.warning(f"Failed to update profile metadata: {e}")
-                finally:
-                    db.close()
+            try:
+                self.profile_manager.touch_metadata(
+                    profile_id,
+                    cookies_saved=True,
+                    cookies_count=len(cookies),
+                    last_login_check=time.time()
+                )
+            except Exception as e:
+                logger.warning(f"Failed to update profile metadata: {e}")
             
             return {
                 "success": True,
@@ -269,15 +388,28 @@ class GuidedLoginService:
     async def close_profile_browser(self, profile_id: str) -> None:
         """Close browser for specific profile"""
         try:
-            if profile_id in self.browser_managers:
-                await self.browser_managers[profile_id].close()
-                del self.browser_managers[profile_id]
+            browser_manager = self.browser_managers.pop(profile_id, None)
+            context = self.browser_contexts.pop(profile_id, None)
+            pages = self.pages.pop(profile_id, {})
+            
+            # Close every tab at once, then the context, so its memory is released
+            # before the browser manager tears the rest down
+            if context:
+                open_pages = {page for page in [*pages.values(), *context.pages] if not page.is_closed()}
+                await asyncio.gather(*(page.close() for page in open_pages), return_exceptions=True)
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Context already closed for profile {profile_id}: {e}")
             
-            if profile_id in self.browser_contexts:
-                del self.browser_contexts[profile_id]
+            if browser_manager:
+                await browser_manager.close()
             
-            if profile_id in self.pages:
-                del self.pages[profile_id]
+            self._extractors.pop(profile_id, None)
+            self._gmail_status_cache.pop(profile_id, None)
+            self._login_status_cache.pop(profile_id, None)
+            self._nav_counts.pop(profile_id, None)
+            self._last_used.pop(profile_id, None)
             
             logger.info(f"Closed browser for profile: {profile_id}")
             
@@ -2,10 +2,14 @@
 Centralized Logging Service - Captures and stores all application logs
 """
 
+import atexit
 import logging
 import json
+import os
+import queue
 import sys
 import asyncio
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
@@ -14,25 +18,38 @@ from threading import Lock
 
 logger = logging.getLogger(__name__)
 
+# Most log lines the writer thread joins into one file write
+_MAX_WRITE_BATCH = 256
 
-class LogService:
-    """Centralized logging service that stores logs in memory and file"""
-    
-    _instance = None
-    _lock = Lock()
-    
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+# Queued by flush() to make the writer thread write what it has and exit
+_STOP = None
+
+_utcnow = datetime.utcnow
+
+
+def _level_number(name: str, default: int = logging.INFO) -> int:
+    """Numeric logging level for a level name, or default when the name is unknown"""
+    level = logging.getLevelName(name.upper())
+    return level if isinstance(level, int) else default
+
+# orjson serializes several times faster when installed; the file format is the same
+try:
+    import orjson
+
+    def _dumps(entry: Dict) -> str:
+        return orjson.dumps(entry).decode()
+except ImportError:
+    def _dumps(entry: Dict) -> str:
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class _LogService:
+    """Centralized logging service that stores logs in memory and file.
+
+    Created exactly once, as the module-level ``log_service`` below.
+    """
     
     def __init__(self):
-        if self._initialized:
-            return
-        
         self.logs_dir = Path("logs")
         self.logs_dir.mkdir(exist_ok=True)
         
@@ -40,13 +57,19 @@ class LogService:
         self.log_buffer: deque = deque(maxlen=1000)
         self.buffer_lock = Lock()
         
-        # Log file
+        # Log file, kept open and written by a background thread in batches.
+        # Records below LOG_FILE_MIN_LEVEL stay in the memory buffer only.
+        self.file_min_level = _level_number(os.getenv("LOG_FILE_MIN_LEVEL", "INFO"))
         self.log_file = self.logs_dir / "veoflow_app.log"
+        self._write_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._file_lock = Lock()
+        self._log_fh = open(self.log_file, "a", encoding="utf-8", buffering=1 << 16)
+        self._writer = threading.Thread(target=self._drain_writes, name="log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
         
         # Setup custom handler
         self.setup_handler()
-        
-        self._initialized = True
     
     def setup_handler(self):
         """Setup custom logging handler"""
@@ -65,7 +88,7 @@ class LogService:
     def add_log(self, level: str, logger_name: str, message: str, extra: Optional[Dict] = None):
         """Add a log entry"""
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _utcnow().isoformat(),
             "level": level,
             "logger": logger_name,
             "message": message,
@@ -76,14 +99,51 @@ class LogService:
         with self.buffer_lock:
             self.log_buffer.append(log_entry)
         
-        # Write to file
+        # Queue for the writer thread instead of opening the file per record
+        if _level_number(level, default=self.file_min_level) >= self.file_min_level:
+            self._write_queue.put(_dumps(log_entry) + "\n")
+    
+    def _drain_writes(self):
+        """Writer thread: block for a line, then write it with whatever else is queued"""
+        while True:
+            line = self._write_queue.get()
+            if line is _STOP:
+                return
+            batch = [line]
+            stopping = False
+            while len(batch) < _MAX_WRITE_BATCH:
+                try:
+                    line = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if line is _STOP:
+                    stopping = True
+                    break
+                batch.append(line)
+            self._write_lines(batch)
+            if stopping:
+                return
+    
+    def _write_lines(self, lines: List[str]):
+        """Write and flush a batch of serialized log lines"""
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            with self._file_lock:
+                self._log_fh.write("".join(lines))
+                self._log_fh.flush()
         except Exception as e:
             # Fallback to stderr if file write fails
             print(f"Failed to write log: {e}", file=sys.stderr)
     
+    def flush(self, timeout: float = 5.0):
+        """Stop the writer thread once it has written every queued line (runs at exit)
+
+        Lines queued after this are no longer written to the file.
+        """
+        if not self._writer.is_alive():
+            return
+        self._write_queue.put(_STOP)
+        self._writer.join(timeout)
+    
     def get_logs(
         self,
         level: Optional[str] = None,
@@ -91,21 +151,29 @@ class LogService:
         limit: int = 100,
         since: Optional[datetime] = None
     ) -> List[Dict]:
-        """Get logs from buffer"""
-        with self.buffer_lock:
-            logs = list(self.log_buffer)
+        """Get logs from buffer, most recent first"""
+        level = level.upper() if level else None
+        logger_name = logger_name.lower() if logger_name else None
+        since_iso = since.isoformat() if since else None
         
-        # Filter
-        if level:
-            logs = [log for log in logs if log["level"] == level.upper()]
-        if logger_name:
-            logs = [log for log in logs if logger_name.lower() in log["logger"].lower()]
-        if since:
-            since_iso = since.isoformat()
-            logs = [log for log in logs if log["timestamp"] >= since_iso]
-        
-        # Return most recent first, limit
-        return list(reversed(logs[-limit:]))
+        # Walk newest to oldest and stop at `limit` matches instead of filtering it all
+        logs = []
+        if limit <= 0:
+            return logs
+        # Hold the lock only for the (C-level) copy so writers aren't stalled by filtering
+        with self.buffer_lock:
+            snapshot = self.log_buffer.copy()
+        for log in reversed(snapshot):
+            if level and log["level"] != level:
+                continue
+            if logger_name and logger_name not in log["logger"].lower():
+                continue
+            if since_iso and log["timestamp"] < since_iso:
+                continue
+            logs.append(log)
+            if len(logs) >= limit:
+                break
+        return logs
     
     def get_recent_logs(self, limit: int = 100) -> List[Dict]:
         """Get most recent logs"""
@@ -124,7 +192,7 @@ class LogService:
 class LogHandler(logging.Handler):
     """Custom logging handler that sends logs to LogService"""
     
-    def __init__(self, log_service: LogService):
+    def __init__(self, log_service: _LogService):
         super().__init__()
         self.log_service = log_service
     
@@ -152,6 +220,6 @@ class LogHandler(logging.Handler):
             pass
 
 
-# Global instance
-log_service = LogService()
+# Global instance, the only one: import this rather than constructing the class
+log_service = _LogService()
 
@@ -3,9 +3,13 @@ Profile Manager Service - Manages Chrome profiles
 """
 
 import logging
+import time
 import uuid
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from app.models.profile import Profile
 from app.core.database import SessionLocal
@@ -13,143 +17,191 @@ from app.config import config_manager, settings
 
 logger = logging.getLogger(__name__)
 
+# Seconds a profile lookup is served from the in-process cache
+_PROFILE_CACHE_TTL = 2.0
+
+# Playwright storage_state() snapshot kept inside each profile directory
+STORAGE_STATE_FILE = "state.json"
+
 
 class ProfileManager:
     """Manages Chrome profile creation, deletion, and selection"""
     
+    # Lookup results shared by every instance: {key: (loaded_at, result)}. Cleared on
+    # create/delete/set_active, so only changes made elsewhere can be up to the TTL old.
+    _cache: Dict[str, Tuple[float, object]] = {}
+    
     def __init__(self):
         self.profiles_dir = Path(config_manager.get("profiles.directory", "./profiles"))
         self.profiles_dir.mkdir(parents=True, exist_ok=True)
     
+    def _cached(self, key: str, load: Callable[[], object]):
+        """Return the cached result for key, calling load() when missing or expired"""
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and now - entry[0] < _PROFILE_CACHE_TTL:
+            return entry[1]
+        result = load()
+        self._cache[key] = (now, result)
+        return result
+    
+    @classmethod
+    def _invalidate_cache(cls) -> None:
+        """Drop all cached lookups after a profile changes"""
+        cls._cache.clear()
+    
+    @staticmethod
+    @contextmanager
+    def _session() -> Iterator[Session]:
+        """Short-lived session: rolled back if the block raises, always closed"""
+        db = SessionLocal()
+        try:
+            yield db
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
     def create_profile(self, name: str) -> Profile:
         """Create a new Chrome profile"""
-        db = SessionLocal()
         try:
-            # Check if name already exists
-            existing = db.query(Profile).filter(Profile.name == name).first()
-            if existing:
-                raise ValueError(f"Profile with name '{name}' already exists")
-            
-            # Generate profile ID and path
-            profile_id = str(uuid.uuid4())
-            profile_path = self.profiles_dir / f"profile-{profile_id}"
-            profile_path.mkdir(parents=True, exist_ok=True)
-            
-            # Create Default subdirectory for Chrome
-            default_dir = profile_path / "Default"
-            default_dir.mkdir(exist_ok=True)
-            
-            # Create profile in database
-            profile = Profile(
-                id=profile_id,
-                name=name,
-                profile_path=str(profile_path.absolute()),
-                is_active=False,
-                metadata={}
-            )
-            
-            db.add(profile)
-            db.commit()
-            db.refresh(profile)
+            with self._session() as db:
+                # Check if name already exists
+                existing = db.execute(select(Profile.id).where(Profile.name == name)).first()
+                if existing:
+                    raise ValueError(f"Profile with name '{name}' already exists")
+                
+                # Generate profile ID and path
+                profile_id = uuid.uuid4().hex
+                profile_path = (self.profiles_dir / f"profile-{profile_id}").resolve()
+                
+                # Create the profile directory together with Chrome's Default subdirectory
+                default_dir = profile_path / "Default"
+                default_dir.mkdir(parents=True, exist_ok=True)
+                
+                # Create profile in database
+                profile = Profile(
+                    id=profile_id,
+                    name=name,
+                    profile_path=str(profile_path),
+                    is_active=False,
+                    metadata={}
+                )
+                
+                db.add(profile)
+                db.commit()
+                db.refresh(profile)
+                self._invalidate_cache()
             
             logger.info(f"Created profile: {name} at {profile_path}")
             return profile
             
         except Exception as e:
-            db.rollback()
             logger.error(f"Failed to create profile: {e}")
             raise
-        finally:
-            db.close()
     
     def list_profiles(self) -> List[Profile]:
         """List all profiles"""
-        db = SessionLocal()
-        try:
-            profiles = db.query(Profile).order_by(Profile.created_at.desc()).all()
-            return profiles
-        finally:
-            db.close()
+        return self._cached("list", lambda: self._select_all(
+            select(Profile).order_by(Profile.created_at.desc())
+        ))
+    
+    def list_profiles_summary(self) -> List[Tuple[str, str, bool, datetime]]:
+        """(id, name, is_active, created_at) rows for every profile, newest first.
+
+        A plain Core select: no ORM instances are built, for list views that
+        don't need paths or metadata.
+        """
+        def load():
+            with self._session() as db:
+                return [tuple(row) for row in db.execute(
+                    select(Profile.id, Profile.name, Profile.is_active, Profile.created_at)
+                    .order_by(Profile.created_at.desc())
+                )]
+        return self._cached("summary", load)
     
     def get_profile(self, profile_id: str) -> Optional[Profile]:
         """Get profile by ID"""
-        db = SessionLocal()
-        try:
-            return db.query(Profile).filter(Profile.id == profile_id).first()
-        finally:
-            db.close()
+        return self._cached(f"id:{profile_id}", lambda: self._get_by_id(profile_id))
     
     def get_profile_by_name(self, name: str) -> Optional[Profile]:
         """Get profile by name"""
-        db = SessionLocal()
-        try:
-            return db.query(Profile).filter(Profile.name == name).first()
-        finally:
-            db.close()
+        return self._cached(f"name:{name}", lambda: self._select_first(
+            select(Profile).where(Profile.name == name)
+        ))
+    
+    def _get_by_id(self, profile_id: str) -> Optional[Profile]:
+        """Primary-key lookup through Session.get"""
+        with self._session() as db:
+            return db.get(Profile, profile_id)
+    
+    def _select_first(self, statement) -> Optional[Profile]:
+        """First Profile matched by a select()"""
+        with self._session() as db:
+            return db.execute(statement).scalars().first()
+    
+    def _select_all(self, statement) -> List[Profile]:
+        """All Profiles matched by a select()"""
+        with self._session() as db:
+            return db.execute(statement).scalars().all()
     
     def delete_profile(self, profile_id: str) -> bool:
         """Delete profile and its directory"""
-        db = SessionLocal()
         try:
-            profile = db.query(Profile).filter(Profile.id == profile_id).first()
-            if not profile:
-                raise ValueError(f"Profile {profile_id} not found")
-            
-            # Delete directory
-            profile_path = Path(profile.profile_path)
-            if profile_path.exists():
-                import shutil
-                shutil.rmtree(profile_path)
-                logger.info(f"Deleted profile directory: {profile_path}")
-            
-            # Delete from database
-            db.delete(profile)
-            db.commit()
+            with self._session() as db:
+                profile = db.get(Profile, profile_id)
+                if not profile:
+                    raise ValueError(f"Profile {profile_id} not found")
+                profile_name = profile.name
+                
+                # Delete directory
+                profile_path = Path(profile.profile_path)
+                if profile_path.exists():
+                    import shutil
+                    shutil.rmtree(profile_path)
+                    logger.info(f"Deleted profile directory: {profile_path}")
+                
+                # Delete from database
+                db.delete(profile)
+                db.commit()
+                self._invalidate_cache()
             
-            logger.info(f"Deleted profile: {profile.name}")
+            logger.info(f"Deleted profile: {profile_name}")
             return True
             
         except Exception as e:
-            db.rollback()
             logger.error(f"Failed to delete profile: {e}")
             raise
-        finally:
-            db.close()
     
     def set_active_profile(self, profile_id: str) -> None:
         """Set profile as active (only one can be active)"""
-        db = SessionLocal()
         try:
-            # Deactivate all profiles
-            db.query(Profile).update({"is_active": False})
-            
-            # Activate specified profile
-            profile = db.query(Profile).filter(Profile.id == profile_id).first()
-            if not profile:
-                raise ValueError(f"Profile {profile_id} not found")
-            
-            profile.is_active = True
-            db.commit()
+            with self._session() as db, db.begin():
+                # Deactivate all profiles and activate the specified one in one transaction
+                profile = db.get(Profile, profile_id)
+                if not profile:
+                    raise ValueError(f"Profile {profile_id} not found")
+                profile_name = profile.name
+                
+                db.execute(update(Profile).values(is_active=False))
+                profile.is_active = True
+            self._invalidate_cache()
             
             # Update config
             config_manager.set("profiles.activeProfileId", profile_id)
             
-            logger.info(f"Set active profile: {profile.name}")
+            logger.info(f"Set active profile: {profile_name}")
             
         except Exception as e:
-            db.rollback()
             logger.error(f"Failed to set active profile: {e}")
             raise
-        finally:
-            db.close()
     
     def get_active_profile(self) -> Optional[Profile]:
         """Get the currently active profile"""
-        db = SessionLocal()
-        try:
-            return db.query(Profile).filter(Profile.is_active == True).first()
-        finally:
-            db.close()
+        return self._cached("active", lambda: self._select_first(
+            select(Profile).where(Profile.is_active == True)
+        ))
     
     def get_profile_path(self, profile_id: str) -> Path:
         """Get profile directory path"""
@@ -158,6 +210,26 @@ class ProfileManager:
             raise ValueError(f"Profile {profile_id} not found")
         return Path(profile.profile_path)
     
+    def touch_metadata(self, profile_id: str, **fields) -> None:
+        """Merge fields into a profile's metadata with one UPDATE"""
+        with self._session() as db:
+            metadata = dict(db.execute(
+                select(Profile.profile_metadata).where(Profile.id == profile_id)
+            ).scalar() or {})
+            metadata.update(fields)
+            db.execute(
+                update(Profile).where(Profile.id == profile_id).values(profile_metadata=metadata)
+            )
+            db.commit()
+        self._invalidate_cache()
+    
+    async def save_state(self, profile_id: str, context) -> Path:
+        """Snapshot the context's cookies and local storage to the profile's state file"""
+        state_file = self.get_profile_path(profile_id) / STORAGE_STATE_FILE
+        await context.storage_state(path=str(state_file))
+        logger.info(f"Saved browser storage state for profile {profile_id}: {state_file}")
+        return state_file
+    
     def get_active_profile_path(self) -> Optional[Path]:
         """Get active profile path, or default if none"""
         active = self.get_active_profile()
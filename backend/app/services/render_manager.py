@@ -5,17 +5,46 @@ Render Manager Service - Orchestrates scene rendering workflow
 import logging
 import os
 import asyncio
-import fcntl  # For file-based profile locking on Unix-like systems
+import random
+import time
+import traceback
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from shutil import copytree
+from typing import Dict, Any, Optional, List, Tuple
+from shutil import copytree, rmtree
 from app.services.browser_manager import BrowserManager
-from app.services.flow_controller import FlowController
+from app.services.flow_controller import FlowController, close_http_client
 from app.services.character_manager import CharacterManager
+from app.services.profile_manager import ProfileManager
+from app.models.project import Project
+from app.core.database import SessionLocal
 from app.config import config_manager, settings, DOWNLOADS_PATH
+from playwright.async_api import Page, BrowserContext
 
 logger = logging.getLogger(__name__)
 
+# One browser per worker, shared by every RenderManager created for it so consecutive
+# scenes reuse the launched Chromium instead of starting a new one each time.
+# Closed by RenderManager.close()/shutdown() (wired to Celery worker shutdown).
+_shared_browsers: Dict[str, BrowserManager] = {}
+_browser_locks: Dict[str, asyncio.Lock] = {}
+
+# Worker profile directories already validated: {worker_id: (validated_at, active_profile_id, path)}
+_validated_profiles: Dict[str, Tuple[float, str, Path]] = {}
+_PROFILE_VALIDATION_TTL = 60.0
+
+# Scenes render_scenes() keeps generating at once, unless the project's render
+# settings give "concurrent_generations"
+_DEFAULT_CONCURRENT_GENERATIONS = 3
+
+
+def concurrent_generations(render_settings: Optional[Dict[str, Any]]) -> int:
+    """How many scenes render_scenes() generates at once under render_settings"""
+    return max(1, int((render_settings or {}).get("concurrent_generations", _DEFAULT_CONCURRENT_GENERATIONS)))
+
+
+class _LoginRequired(Exception):
+    """Flow asked for a login while opening the render page"""
+
 
 class RenderManager:
     """Manages the complete scene rendering workflow"""
@@ -25,11 +54,12 @@ class RenderManager:
         if not worker_id:
             worker_id = os.getenv("CELERY_WORKER_NAME", f"worker_{os.getpid()}")
         self.worker_id = worker_id
-        self.browser_manager = BrowserManager(worker_id=worker_id)
+        if worker_id not in _shared_browsers:
+            _shared_browsers[worker_id] = BrowserManager(worker_id=worker_id)
+        self.browser_manager = _shared_browsers[worker_id]
         self.flow_controller = FlowController(self.browser_manager)
         self.character_manager = CharacterManager()
         # Ensure we use ProfileManager to get the active profile
-        from app.services.profile_manager import ProfileManager
         self.profile_manager = ProfileManager()
     
     async def render_scene(
@@ -55,17 +85,130 @@ class RenderManager:
                 "error": str (if failed)
             }
         """
-        # Get scene context for logging at the start
-        scene_id_str = scene.get("id", "unknown")
-        scene_number = scene.get("number", "?")
-        scene_prompt_preview = scene.get("prompt", "")[:50] if scene.get("prompt") else "None"
+        results = await self.render_scenes([scene], project_id, characters, render_settings)
+        return results[0]
+    
+    async def render_scenes(
+        self,
+        scenes: List[Dict[str, Any]],
+        project_id: str,
+        characters: Optional[List[Dict[str, Any]]] = None,
+        render_settings: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Render several scenes of a project in one browser session
+        
+        The profile, browser, page and Flow navigation are set up once and the page
+        is reused: each scene gets a fresh Flow project on it, then prompt ->
+        generate -> wait -> download as in render_scene. Up to
+        render_settings["concurrent_generations"] scenes (default 3) are generated
+        at once, each in its own tab, and each downloads as soon as it completes.
         
-        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ===== RENDER SCENE STARTED =====")
-        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Prompt preview: {scene_prompt_preview}...")
-        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Project ID: {project_id}")
+        Returns:
+            One result dict per scene, in order (see render_scene)
+        """
+        if not scenes:
+            return []
+        
+        label = f"[Scenes {', '.join(str(scene.get('number', '?')) for scene in scenes)}]"
+        for scene in scenes:
+            scene_id_str = scene.get("id", "unknown")
+            scene_number = scene.get("number", "?")
+            scene_prompt_preview = scene.get("prompt", "")[:50] if scene.get("prompt") else "None"
+            
+            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ===== RENDER SCENE STARTED =====")
+            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Prompt preview: {scene_prompt_preview}...")
+            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Project ID: {project_id}")
         
         page = None
-        lock_file = None  # File handle used for profile locking (may remain None)
+        browser_failed = False
+        scene_context = None  # Context the scenes' pages live in (see BrowserManager.new_context)
+        results: List[Dict[str, Any]] = []
+        try:
+            try:
+                page, scene_context = await self._open_flow_page(label)
+            except _LoginRequired:
+                # The worker's copy of the profile holds a stale session; re-copy the
+                # active profile next time in case the user has logged in again since
+                await self._discard_worker_profile()
+                return [{
+                    "success": False,
+                    "error": "Login required. Please log in to Google Flow manually in the browser window, then try again. Or use setup_chrome_profile.sh to copy your logged-in profile.",
+                    "scene_id": scene.get("id", ""),
+                    "requires_login": True
+                } for scene in scenes]
+            
+            # Get render settings from project if not provided
+            if not render_settings:
+                render_settings = self._load_render_settings(project_id)
+            
+            # Flow generates several videos in parallel, so keep up to `window` scenes in
+            # flight - each in its own tab - instead of waiting out one before submitting the next
+            window = concurrent_generations(render_settings)
+            # FlowController caches per-page state, so every tab in flight gets its own
+            flow_controllers = [self.flow_controller] + [
+                FlowController(self.browser_manager) for _ in range(window - 1)
+            ]
+            for start in range(0, len(scenes), window):
+                batch = scenes[start:start + window]
+                extra_pages = []
+                try:
+                    try:
+                        # A failed scene can take the page down with it; reopen on Flow for the next
+                        if page.is_closed():
+                            logger.warning(f"{label} Page closed between scenes, reopening Flow...")
+                            page = await scene_context.new_page()
+                            await self.flow_controller.navigate_to_flow(page)
+                        for _ in batch[1:]:
+                            extra_page = await scene_context.new_page()
+                            extra_pages.append(extra_page)
+                            await flow_controllers[len(extra_pages)].navigate_to_flow(extra_page)
+                    except Exception as e:
+                        browser_failed = True
+                        results.extend(self._error_result(e, scene) for scene in batch)
+                        continue
+                    
+                    outcomes = await asyncio.gather(*(
+                        self._render_scene_guarded(
+                            scene_page, flow_controller, scene, project_id, characters, render_settings
+                        )
+                        for scene_page, flow_controller, scene in zip([page] + extra_pages, flow_controllers, batch)
+                    ))
+                    for result, raised in outcomes:
+                        results.append(result)
+                        browser_failed = browser_failed or raised
+                finally:
+                    for extra_page in extra_pages:
+                        await self._close_scene_page(extra_page, None)
+            return results
+            
+        except Exception as e:
+            browser_failed = True
+            # Setup failed: every scene not rendered yet fails with the same error
+            return results + [self._error_result(e, scene) for scene in scenes[len(results):]]
+        finally:
+            # Always close the page and the scenes' own context (never the shared
+            # persistent one); the browser stays up for the next scene
+            await self._close_scene_page(page, scene_context)
+            # ...unless a scene blew up, in which case relaunch it fresh next time. This
+            # runs only once every scene has finished, never under a tab still in flight
+            if browser_failed:
+                _validated_profiles.pop(self.worker_id, None)
+                try:
+                    await self.browser_manager.close()
+                except Exception:
+                    pass
+    
+    async def _open_flow_page(self, label: str) -> Tuple[Page, BrowserContext]:
+        """
+        Prepare the worker profile and browser, open a page and navigate it to Flow.
+        
+        Returns (page, context) - the context is the one pages for this job should be
+        opened in (see BrowserManager.new_context). Raises _LoginRequired when Flow
+        asks for a login; on any failure the page and an owned context are closed.
+        """
+        page = None
+        scene_context = None
         try:
             # Ensure we're using the active profile (the one where user logged in)
             active_profile = self.profile_manager.get_active_profile()
@@ -75,49 +218,26 @@ class RenderManager:
             logger.info(f"Using active profile for rendering: {active_profile.name} ({active_profile.id})")
             logger.info(f"Profile path: {active_profile.profile_path}")
 
-            # Validate base active profile path exists
-            from pathlib import Path
-            base_profile_path = Path(active_profile.profile_path)
-            if not base_profile_path.exists():
-                raise Exception(f"Profile path does not exist: {base_profile_path}. Please check the profile configuration.")
-
-            # Create a worker-specific profile directory cloned from the active profile
-            # This allows parallel workers without sharing the same Chrome user-data-dir
-            worker_profiles_root = self.profile_manager.profiles_dir / "worker_profiles"
-            worker_profiles_root.mkdir(parents=True, exist_ok=True)
-            worker_profile_path = worker_profiles_root / f"{active_profile.id}_worker_{self.worker_id}"
-
-            if not worker_profile_path.exists():
-                logger.info(f"Creating worker-specific profile by copying active profile to: {worker_profile_path}")
-                try:
-                    copytree(base_profile_path, worker_profile_path, dirs_exist_ok=True)
-                except TypeError:
-                    # For older Python without dirs_exist_ok, ignore if already copied partially
-                    try:
-                        copytree(base_profile_path, worker_profile_path)
-                    except FileExistsError:
-                        logger.info(f"Worker profile already exists: {worker_profile_path}")
-                except Exception as copy_error:
-                    logger.warning(f"Could not clone active profile for worker: {copy_error}")
-                    # Fallback to using base profile directly (may limit parallelism)
-                    worker_profile_path = base_profile_path
-
-            profile_path = worker_profile_path
+            # The clone/validation is filesystem work that only needs redoing when the
+            # active profile changes, or periodically in case the directory was removed
+            cached = _validated_profiles.get(self.worker_id)
+            if cached and cached[1] == active_profile.id and time.monotonic() - cached[0] < _PROFILE_VALIDATION_TTL:
+                profile_path = cached[2]
+            else:
+                profile_path = self._prepare_worker_profile(active_profile)
+                _validated_profiles[self.worker_id] = (time.monotonic(), active_profile.id, profile_path)
             logger.info(f"Using worker-specific profile path: {profile_path}")
 
-            # Ensure Default directory exists in worker profile
-            default_dir = profile_path / "Default"
-            if not default_dir.exists():
-                logger.warning(f"Default directory does not exist in worker profile, creating it: {default_dir}")
-                try:
-                    default_dir.mkdir(parents=True, exist_ok=True)
-                except Exception as default_error:
-                    raise Exception(f"Cannot create Default directory in worker profile: {default_error}")
-
-            # Initialize browser with the worker-specific profile path
+            # Initialize browser with the worker-specific profile path (no-op when the
+            # shared browser is already running on it)
             logger.info("Initializing browser manager with worker-specific profile path...")
             try:
-                await self.browser_manager.initialize_with_profile_path(profile_path)
+                async with _browser_locks.setdefault(self.worker_id, asyncio.Lock()):
+                    if (self.browser_manager._initialized
+                            and self.browser_manager.profile_path != Path(profile_path).resolve()):
+                        logger.info("Active profile changed - restarting the shared browser")
+                        await self.browser_manager.close()
+                    await self.browser_manager.initialize_with_profile_path(profile_path, use_storage_state=True)
                 logger.info("✓ Browser manager initialized with worker-specific profile")
             except Exception as init_error:
                 error_type = type(init_error).__name__
@@ -132,63 +252,71 @@ class RenderManager:
                 try:
                     logger.info(f"Creating new page (attempt {page_attempt + 1}/{max_page_retries})...")
                     
-                    # Verify browser is still initialized
-                    if not self.browser_manager._initialized:
-                        logger.warning("Browser manager not initialized, re-initializing...")
-                        await self.browser_manager.initialize_with_profile_path(profile_path)
+                    try:
+                        page, scene_context = await self.browser_manager.ensure_ready_and_new_page(
+                            profile_path, scene_context
+                        )
+                    except Exception as fast_error:
+                        # Fall back to probing each piece so the failure is logged precisely
+                        logger.debug(f"Fast page creation failed ({fast_error}), checking browser state...")
+                        # Verify browser is still initialized
+                        if not self.browser_manager._initialized:
+                            logger.warning("Browser manager not initialized, re-initializing...")
+                            await self.browser_manager.initialize_with_profile_path(
+                                profile_path, use_storage_state=True
+                            )
+                            scene_context = None
                     
-                    # Check context is alive
-                    if not self.browser_manager.context:
-                        logger.error("Browser context is None - cannot create page")
-                        raise Exception("Browser context is None")
+                        # Check context is alive
+                        if not self.browser_manager.context:
+                            logger.error("Browser context is None - cannot create page")
+                            raise Exception("Browser context is None")
                     
-                    # For persistent contexts, browser might be None - check context instead
-                    if self.browser_manager.browser:
-                        if not self.browser_manager.browser.is_connected():
-                            logger.error("Browser is not connected - cannot create page")
-                            raise Exception("Browser is not connected")
-                    else:
-                        # Browser is None (common for persistent contexts) - verify context works
-                        logger.debug("Browser object is None (normal for persistent contexts), verifying context...")
-                        try:
-                            # Try to get pages count as a test
-                            pages = self.browser_manager.context.pages
-                            logger.debug(f"Context has {len(pages)} existing pages")
-                        except Exception as context_test_error:
-                            logger.error(f"Context verification failed: {context_test_error}")
-                            raise Exception(f"Context is not usable: {context_test_error}")
+                        # For persistent contexts, browser might be None - check context instead
+                        if self.browser_manager.browser:
+                            if not self.browser_manager.browser.is_connected():
+                                logger.error("Browser is not connected - cannot create page")
+                                raise Exception("Browser is not connected")
+                        else:
+                            # Browser is None (common for persistent contexts) - verify context works
+                            logger.debug("Browser object is None (normal for persistent contexts), verifying context...")
+                            try:
+                                # Try to get pages count as a test
+                                pages = self.browser_manager.context.pages
+                                logger.debug(f"Context has {len(pages)} existing pages")
+                            except Exception as context_test_error:
+                                logger.error(f"Context verification failed: {context_test_error}")
+                                raise Exception(f"Context is not usable: {context_test_error}")
                     
-                    page = await self.browser_manager.new_page()
-                    logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Page created successfully")
+                        if scene_context is None:
+                            scene_context = await self.browser_manager.new_context()
+                        page = await scene_context.new_page()
+                    logger.info(f"{label} Page created successfully")
                     
                     # Verify page is not immediately closed
                     if page.is_closed():
-                        logger.warning(f"[Scene {scene_number} ID: {scene_id_str}] Page was immediately closed after creation")
+                        logger.warning(f"{label} Page was immediately closed after creation")
                         if page_attempt < max_page_retries - 1:
-                            await asyncio.sleep(2)  # Wait longer before retry
+                            await asyncio.sleep(self._backoff(page_attempt))
                             continue
                         else:
-                            raise Exception(f"[Scene {scene_number} ID: {scene_id_str}] Page keeps getting closed immediately after creation")
+                            raise Exception(f"{label} Page keeps getting closed immediately after creation")
                     
                     break  # Success
                 except Exception as page_error:
                     error_str = str(page_error)
                     if page_attempt < max_page_retries - 1:
-                        logger.warning(f"[Scene {scene_number} ID: {scene_id_str}] Page creation attempt {page_attempt + 1}/{max_page_retries} failed: {error_str}, retrying...")
-                        await asyncio.sleep(3)  # Wait longer before retry
+                        logger.warning(f"{label} Page creation attempt {page_attempt + 1}/{max_page_retries} failed: {error_str}, retrying...")
+                        await asyncio.sleep(self._backoff(page_attempt))
                     else:
-                        logger.error(f"[Scene {scene_number} ID: {scene_id_str}] Failed to create page after {max_page_retries} attempts: {error_str}")
-                        raise Exception(f"[Scene {scene_number} ID: {scene_id_str}] Cannot create page: {error_str}")
+                        logger.error(f"{label} Failed to create page after {max_page_retries} attempts: {error_str}")
+                        raise Exception(f"{label} Cannot create page: {error_str}")
             
             if not page:
                 raise Exception("Failed to create page after all retries")
             
-            # Get scene context for logging
-            scene_id_str = scene.get("id", "unknown")
-            scene_number = scene.get("number", "?")
-            
             # Navigate to Flow with retry logic for closed pages
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Navigating to Flow...")
+            logger.info(f"{label} Navigating to Flow...")
             nav_retries = 5  # Increased retries for page closure issues
             for nav_attempt in range(nav_retries):
                 try:
@@ -200,12 +328,12 @@ class RenderManager:
                                 await page.close()
                             except:
                                 pass
-                            page = await self.browser_manager.new_page()
-                            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Page recreated, waiting before retry...")
-                            await asyncio.sleep(2)  # Wait a bit longer for page to stabilize
+                            page = await scene_context.new_page()
+                            logger.info(f"{label} Page recreated, waiting before retry...")
+                            await asyncio.sleep(self._backoff(nav_attempt))
                             continue
                         else:
-                            raise Exception(f"[Scene {scene_number} ID: {scene_id_str}] Page closed and cannot be recreated after all retries")
+                            raise Exception(f"{label} Page closed and cannot be recreated after all retries")
                     
                     # Navigate to Flow
                     await self.flow_controller.navigate_to_flow(page)
@@ -224,17 +352,17 @@ class RenderManager:
                                     await page.close()
                             except:
                                 pass
-                            await asyncio.sleep(2)
+                            await asyncio.sleep(self._backoff(nav_attempt))
                             # Recreate page
                             try:
-                                page = await self.browser_manager.new_page()
+                                page = await scene_context.new_page()
                                 logger.info("✓ Page recreated for navigation retry")
                                 await asyncio.sleep(1)  # Wait for page to stabilize
                                 continue  # Retry navigation
                             except Exception as recreate_error:
                                 logger.error(f"Failed to recreate page: {recreate_error}")
                                 if nav_attempt < nav_retries - 1:
-                                    await asyncio.sleep(3)  # Wait longer before retrying
+                                    await asyncio.sleep(self._backoff(nav_attempt))
                                     continue
                                 else:
                                     raise Exception(f"Cannot recreate page after {nav_retries} attempts: {recreate_error}")
@@ -251,17 +379,17 @@ class RenderManager:
                                     await page.close()
                             except:
                                 pass
-                            await asyncio.sleep(2)
+                            await asyncio.sleep(self._backoff(nav_attempt))
                             # Recreate page
                             try:
-                                page = await self.browser_manager.new_page()
+                                page = await scene_context.new_page()
                                 logger.info("✓ Page recreated for TargetClosedError retry")
                                 await asyncio.sleep(1)  # Wait for page to stabilize
                                 continue  # Retry navigation
                             except Exception as recreate_error:
                                 logger.error(f"Failed to recreate page: {recreate_error}")
                                 if nav_attempt < nav_retries - 1:
-                                    await asyncio.sleep(3)  # Wait longer before retrying
+                                    await asyncio.sleep(self._backoff(nav_attempt))
                                     continue
                                 else:
                                     raise Exception(f"Cannot recreate page after {nav_retries} attempts: {recreate_error}")
@@ -271,23 +399,18 @@ class RenderManager:
                     
                     # Check if it's a login issue
                     elif "login" in error_str or "sign in" in error_str:
-                        return {
-                            "success": False,
-                            "error": "Login required. Please log in to Google Flow manually in the browser window, then try again. Or use setup_chrome_profile.sh to copy your logged-in profile.",
-                            "scene_id": scene.get("id", ""),
-                            "requires_login": True
-                        }
+                        raise _LoginRequired(str(nav_error))
                     else:
                         # Other errors - check if we should retry
                         if nav_attempt < nav_retries - 1:
                             logger.warning(f"Navigation failed (attempt {nav_attempt + 1}/{nav_retries}): {nav_error}")
                             logger.warning("Retrying navigation...")
-                            await asyncio.sleep(2)
+                            await asyncio.sleep(self._backoff(nav_attempt))
                             # Check if page is still alive, recreate if needed
                             if page.is_closed():
                                 logger.warning("Page closed after error, recreating...")
                                 try:
-                                    page = await self.browser_manager.new_page()
+                                    page = await scene_context.new_page()
                                     logger.info("✓ Page recreated after error")
                                     await asyncio.sleep(1)
                                 except Exception as recreate_error:
@@ -298,191 +421,289 @@ class RenderManager:
                             logger.error(f"Navigation failed after {nav_retries} attempts: {nav_error}")
                             raise
             
-            # Ensure we're in a new project/editor view. For automated scene rendering,
-            # we force creation of a fresh project so each scene has a clean editor.
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Ensuring we're in editor view (force_new=True for automated scene render)...")
-            await self.flow_controller.ensure_new_project(page, force_new=True)
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ✓ Editor view ready for prompt injection")
-            
-            # Get render settings from project if not provided
-            if not render_settings:
-                from app.models.project import Project
-                from app.core.database import SessionLocal
-                temp_db = SessionLocal()
-                try:
-                    project = temp_db.query(Project).filter(Project.id == project_id).first()
-                    if project:
-                        render_settings = project.get_render_settings()
-                        logger.info(f"Loaded render settings from project: {render_settings}")
-                    else:
-                        render_settings = {"aspect_ratio": "16:9", "videos_per_scene": 2, "model": "veo3.1-fast"}
-                        logger.info("Project not found, using default render settings")
-                finally:
-                    temp_db.close()
-            
-            # Configure render settings (if method exists)
-            if render_settings and hasattr(self.flow_controller, 'configure_render_settings'):
-                logger.info(f"Configuring render settings: {render_settings}")
-                try:
-                    await self.flow_controller.configure_render_settings(
-                        page,
-                        aspect_ratio=render_settings.get("aspect_ratio", "16:9"),
-                        videos_per_scene=render_settings.get("videos_per_scene", 2),
-                        model=render_settings.get("model", "veo3.1-fast")
-                    )
-                except AttributeError:
-                    logger.warning("configure_render_settings not available, skipping render settings configuration")
-            elif render_settings:
-                logger.warning("Render settings provided but configure_render_settings method not available")
-            
-            # Build prompt with character consistency
-            prompt = self._build_scene_prompt(scene, characters)
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Using prompt ({len(prompt)} chars): {prompt[:100]}...")
-            
-            # Inject prompt
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Injecting prompt into Flow editor...")
-            await self.flow_controller.inject_prompt(page, prompt)
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ✓ Prompt injected")
-            
-            # Wait a bit after injecting prompt to ensure it's fully set
-            await asyncio.sleep(1)
-            
-            # Verify prompt is still in textarea before triggering
+            return page, scene_context
+        except BaseException:
+            await self._close_scene_page(page, scene_context)
+            raise
+    
+    async def _close_scene_page(self, page: Optional[Page], scene_context: Optional[BrowserContext]) -> None:
+        """Close a job's page and its context, unless that is the shared persistent one"""
+        if page:
             try:
-                textarea = page.locator('textarea, [contenteditable]').first
-                if await textarea.count() > 0:
-                    is_textarea = await textarea.get_attribute("tagName") == "TEXTAREA"
-                    if is_textarea:
-                        prompt_check = await textarea.input_value()
-                    else:
-                        prompt_check = await textarea.text_content()
-                    
-                    if not prompt_check or len(prompt_check.strip()) < len(prompt.strip()) * 0.8:
-                        logger.warning(f"⚠️ Prompt appears incomplete before triggering: {len(prompt_check) if prompt_check else 0} chars (expected ~{len(prompt)} chars)")
-                        logger.info("Re-injecting prompt...")
-                        await self.flow_controller.inject_prompt(page, prompt)
-                        await asyncio.sleep(1)
-                    else:
-                        logger.info(f"✓ Prompt verified before triggering: {len(prompt_check)} chars")
-            except Exception as verify_error:
-                logger.warning(f"Could not verify prompt before triggering: {verify_error}")
-            
-            # Trigger generation
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Triggering video generation...")
-            started = await self.flow_controller.trigger_generation(page)
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Generation trigger result: {started}")
-            
+                await page.close()
+            except Exception:
+                pass
+        if scene_context is not None and scene_context is not self.browser_manager.context:
+            await self.browser_manager.save_storage_state(scene_context)
+            try:
+                await scene_context.close()
+            except Exception:
+                pass
+    
+    async def _render_on_page(
+        self,
+        page: Page,
+        flow_controller: FlowController,
+        scene: Dict[str, Any],
+        project_id: str,
+        characters: Optional[List[Dict[str, Any]]],
+        render_settings: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Render one scene on a page that is already on Flow; returns its result dict.
+        
+        flow_controller must drive no other page meanwhile - it caches the page's
+        prompt box and selectors between calls.
+        """
+        scene_id_str = scene.get("id", "unknown")
+        scene_number = scene.get("number", "?")
+        
+        # Ensure we're in a new project/editor view. For automated scene rendering,
+        # we force creation of a fresh project so each scene has a clean editor.
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Ensuring we're in editor view (force_new=True for automated scene render)...")
+        await flow_controller.ensure_new_project(page, force_new=True)
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ✓ Editor view ready for prompt injection")
+        
+        # Configure render settings (if method exists)
+        if render_settings and hasattr(flow_controller, 'configure_render_settings'):
+            logger.info(f"Configuring render settings: {render_settings}")
+            try:
+                await flow_controller.configure_render_settings(
+                    page,
+                    aspect_ratio=render_settings.get("aspect_ratio", "16:9"),
+                    videos_per_scene=render_settings.get("videos_per_scene", 2),
+                    model=render_settings.get("model", "veo3.1-fast")
+                )
+            except AttributeError:
+                logger.warning("configure_render_settings not available, skipping render settings configuration")
+        elif render_settings:
+            logger.warning("Render settings provided but configure_render_settings method not available")
+        
+        # Build prompt with character consistency
+        prompt = self._build_scene_prompt(scene, characters)
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Using prompt ({len(prompt)} chars): {prompt[:100]}...")
+        
+        # Inject prompt
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Injecting prompt into Flow editor...")
+        await flow_controller.inject_prompt(page, prompt)
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ✓ Prompt injected")
+        
+        # Wait a bit after injecting prompt to ensure it's fully set
+        await asyncio.sleep(1)
+        
+        # Verify prompt is still in textarea before triggering
+        try:
+            textarea = page.locator('textarea, [contenteditable]').first
+            if await textarea.count() > 0:
+                is_textarea = await textarea.get_attribute("tagName") == "TEXTAREA"
+                if is_textarea:
+                    prompt_check = await textarea.input_value()
+                else:
+                    prompt_check = await textarea.text_content()
+        
+                if not prompt_check or len(prompt_check.strip()) < len(prompt.strip()) * 0.8:
+                    logger.warning(f"⚠️ Prompt appears incomplete before triggering: {len(prompt_check) if prompt_check else 0} chars (expected ~{len(prompt)} chars)")
+                    logger.info("Re-injecting prompt...")
+                    await flow_controller.inject_prompt(page, prompt)
+                    await asyncio.sleep(1)
+                else:
+                    logger.info(f"✓ Prompt verified before triggering: {len(prompt_check)} chars")
+        except Exception as verify_error:
+            logger.warning(f"Could not verify prompt before triggering: {verify_error}")
+        
+        # Trigger generation
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Triggering video generation...")
+        started = await flow_controller.trigger_generation(page)
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Generation trigger result: {started}")
+        
+        if not started:
+            logger.warning("Generation did not start; re-injecting prompt and retrying once...")
+            await asyncio.sleep(1)
+            await flow_controller.inject_prompt(page, prompt)
+            await asyncio.sleep(1)
+            started = await flow_controller.trigger_generation(page)
             if not started:
-                logger.warning("Generation did not start; re-injecting prompt and retrying once...")
-                await asyncio.sleep(1)
-                await self.flow_controller.inject_prompt(page, prompt)
-                await asyncio.sleep(1)
-                started = await self.flow_controller.trigger_generation(page)
-                if not started:
-                    # Flow UI may still have started generation even if our
-                    # detection failed (UI changes frequently). Log a warning
-                    # but continue to wait_for_completion instead of failing.
-                    logger.warning(
-                        "Generation did not start after retry according to detectors; "
-                        "proceeding to wait_for_completion in case it actually started."
-                    )
-            
-            # Wait for completion
-            logger.info("Waiting for render completion...")
-            result = await self.flow_controller.wait_for_completion(page)
-            
-            if result["status"] != "completed":
-                error_msg = result.get("error", "Render failed")
-                logger.error(f"Render failed: {error_msg}")
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "scene_id": scene.get("id", "")
-                }
-            
-            # Download video
-            output_path = os.path.join(DOWNLOADS_PATH, project_id)
-            os.makedirs(output_path, exist_ok=True)
-            
-            scene_id = scene.get("id", "unknown")
-            logger.info(f"Downloading video for scene {scene_id}...")
-            video_path = await self.flow_controller.download_video(
-                page, output_path, scene_id
-            )
-            
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Scene rendered successfully: {video_path}")
-            logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ===== RENDER SCENE COMPLETED =====")
-            return {
-                "success": True,
-                "video_path": video_path,
-                "scene_id": scene_id_str
-            }
-            
-        except Exception as e:
-            error_msg = str(e)
-            error_type = type(e).__name__
-            
-            # Get full error details including traceback for debugging
-            import traceback
-            tb_str = traceback.format_exc()
-            
-            # If error is too short or just "Flow", try to get more context
-            if not error_msg or len(error_msg) < 10 or error_msg == "Flow":
-                # Try to extract more meaningful error from traceback
-                tb_lines = tb_str.split('\n')
-                for line in tb_lines:
-                    if 'Error' in line or 'Exception' in line or 'Failed' in line:
-                        if len(line) > len(error_msg):
-                            error_msg = line.strip()
-                            break
-                
-                # If still too short, use error type and first traceback line
-                if len(error_msg) < 10:
-                    error_msg = f"{error_type}: {error_msg}"
-                    if tb_lines and len(tb_lines) > 1:
-                        # Get the actual error line from traceback
-                        for line in tb_lines[-5:]:  # Check last 5 lines
-                            if line.strip() and not line.strip().startswith('File'):
-                                error_msg = f"{error_type}: {line.strip()}"
-                                break
-            
-            # Build full error message with context
-            error_full = f"{error_msg}"
-            if len(error_msg) < 50:  # If error is short, add more context
-                # Add first line of traceback for context
-                if tb_str:
-                    tb_first_line = tb_str.split('\n')[0] if tb_str.split('\n') else ""
-                    if tb_first_line and tb_first_line != error_msg:
-                        error_full = f"{error_msg} ({tb_first_line[:100]})"
-            
-            logger.error(f"[Scene {scene_number} ID: {scene_id_str}] Render error: {error_full}", exc_info=True)
-            
-            # Return error (limit to 1000 chars to avoid serialization issues)
+                # Flow UI may still have started generation even if our
+                # detection failed (UI changes frequently). Log a warning
+                # but continue to wait_for_completion instead of failing.
+                logger.warning(
+                    "Generation did not start after retry according to detectors; "
+                    "proceeding to wait_for_completion in case it actually started."
+                )
+        
+        # Wait for completion
+        logger.info("Waiting for render completion...")
+        result = await flow_controller.wait_for_completion(page)
+        
+        if result["status"] != "completed":
+            error_msg = result.get("error", "Render failed")
+            logger.error(f"Render failed: {error_msg}")
             return {
                 "success": False,
-                "error": error_full[:1000],
-                "scene_id": scene_id_str,
-                "error_type": error_type
+                "error": error_msg,
+                "scene_id": scene.get("id", "")
             }
+        
+        # Download video
+        output_path = os.path.join(DOWNLOADS_PATH, project_id)
+        os.makedirs(output_path, exist_ok=True)
+        
+        scene_id = scene.get("id", "unknown")
+        logger.info(f"Downloading video for scene {scene_id}...")
+        video_path = await flow_controller.download_video(
+            page, output_path, scene_id
+        )
+        
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] Scene rendered successfully: {video_path}")
+        logger.info(f"[Scene {scene_number} ID: {scene_id_str}] ===== RENDER SCENE COMPLETED =====")
+        return {
+            "success": True,
+            "video_path": video_path,
+            "scene_id": scene_id_str
+        }
+    
+    async def _render_scene_guarded(
+        self,
+        page: Page,
+        flow_controller: FlowController,
+        scene: Dict[str, Any],
+        project_id: str,
+        characters: Optional[List[Dict[str, Any]]],
+        render_settings: Optional[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """_render_on_page that never raises: (result, whether it raised)"""
+        try:
+            return await self._render_on_page(page, flow_controller, scene, project_id, characters, render_settings), False
+        except Exception as e:
+            return self._error_result(e, scene), True
+    
+    def _load_render_settings(self, project_id: str) -> Dict[str, Any]:
+        """Render settings stored on the project, or the defaults"""
+        temp_db = SessionLocal()
+        try:
+            project = temp_db.query(Project).filter(Project.id == project_id).first()
+            if project:
+                render_settings = project.get_render_settings()
+                logger.info(f"Loaded render settings from project: {render_settings}")
+            else:
+                render_settings = {"aspect_ratio": "16:9", "videos_per_scene": 2, "model": "veo3.1-fast"}
+                logger.info("Project not found, using default render settings")
         finally:
-            # Release profile lock
-            if lock_file:
-                try:
-                    fcntl.flock(lock_file, fcntl.LOCK_UN)
-                    lock_file.close()
-                except Exception:
-                    pass
-            # Always close page and cleanup browser
-            if page:
+            temp_db.close()
+        return render_settings
+    
+    def _error_result(self, e: Exception, scene: Dict[str, Any]) -> Dict[str, Any]:
+        """Failure result for scene from an exception (call from its except block)"""
+        scene_id_str = scene.get("id", "unknown")
+        scene_number = scene.get("number", "?")
+        error_msg = str(e)
+        error_type = type(e).__name__
+        
+        # Get full error details including traceback for debugging
+        tb_str = traceback.format_exc()
+        
+        # If error is too short or just "Flow", try to get more context
+        if not error_msg or len(error_msg) < 10 or error_msg == "Flow":
+            # Try to extract more meaningful error from traceback
+            tb_lines = tb_str.split('\n')
+            for line in tb_lines:
+                if 'Error' in line or 'Exception' in line or 'Failed' in line:
+                    if len(line) > len(error_msg):
+                        error_msg = line.strip()
+                        break
+        
+            # If still too short, use error type and first traceback line
+            if len(error_msg) < 10:
+                error_msg = f"{error_type}: {error_msg}"
+                if tb_lines and len(tb_lines) > 1:
+                    # Get the actual error line from traceback
+                    for line in tb_lines[-5:]:  # Check last 5 lines
+                        if line.strip() and not line.strip().startswith('File'):
+                            error_msg = f"{error_type}: {line.strip()}"
+                            break
+        
+        # Build full error message with context
+        error_full = f"{error_msg}"
+        if len(error_msg) < 50:  # If error is short, add more context
+            # Add first line of traceback for context
+            if tb_str:
+                tb_first_line = tb_str.split('\n')[0] if tb_str.split('\n') else ""
+                if tb_first_line and tb_first_line != error_msg:
+                    error_full = f"{error_msg} ({tb_first_line[:100]})"
+        
+        logger.error(f"[Scene {scene_number} ID: {scene_id_str}] Render error: {error_full}", exc_info=True)
+        
+        # Return error (limit to 1000 chars to avoid serialization issues)
+        return {
+            "success": False,
+            "error": error_full[:1000],
+            "scene_id": scene_id_str,
+            "error_type": error_type
+        }
+    
+    def _prepare_worker_profile(self, active_profile) -> Path:
+        """Validate the active profile and return this worker's (cloned) profile path"""
+        # Validate base active profile path exists
+        base_profile_path = Path(active_profile.profile_path)
+        if not base_profile_path.exists():
+            raise Exception(f"Profile path does not exist: {base_profile_path}. Please check the profile configuration.")
+
+        # Create a worker-specific profile directory cloned from the active profile
+        # This allows parallel workers without sharing the same Chrome user-data-dir
+        worker_profiles_root = self.profile_manager.profiles_dir / "worker_profiles"
+        worker_profiles_root.mkdir(parents=True, exist_ok=True)
+        worker_profile_path = worker_profiles_root / f"{active_profile.id}_worker_{self.worker_id}"
+
+        if not worker_profile_path.exists():
+            logger.info(f"Creating worker-specific profile by copying active profile to: {worker_profile_path}")
+            try:
+                copytree(base_profile_path, worker_profile_path, dirs_exist_ok=True)
+            except TypeError:
+                # For older Python without dirs_exist_ok, ignore if already copied partially
                 try:
-                    await page.close()
-                except:
-                    pass
-            # Close browser manager to free up resources
+                    copytree(base_profile_path, worker_profile_path)
+                except FileExistsError:
+                    logger.info(f"Worker profile already exists: {worker_profile_path}")
+            except Exception as copy_error:
+                logger.warning(f"Could not clone active profile for worker: {copy_error}")
+                # Fallback to using base profile directly (may limit parallelism)
+                worker_profile_path = base_profile_path
+
+        profile_path = worker_profile_path
+
+        # Ensure Default directory exists in worker profile
+        default_dir = profile_path / "Default"
+        if not default_dir.exists():
+            logger.warning(f"Default directory does not exist in worker profile, creating it: {default_dir}")
             try:
-                await self.browser_manager.close()
-            except:
-                pass
+                default_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as default_error:
+                raise Exception(f"Cannot create Default directory in worker profile: {default_error}")
+        
+        return profile_path
+    
+    async def _discard_worker_profile(self) -> None:
+        """Close the browser and delete this worker's profile copy so the next render re-copies it"""
+        cached = _validated_profiles.pop(self.worker_id, None)
+        try:
+            await self.browser_manager.close()
+        except Exception:
+            pass
+        
+        # Only ever delete a clone, never the base profile _prepare_worker_profile may fall back to
+        worker_profile_path = cached[2] if cached else None
+        if worker_profile_path and worker_profile_path.parent == self.profile_manager.profiles_dir / "worker_profiles":
+            logger.info(f"Removing stale worker profile: {worker_profile_path}")
+            rmtree(worker_profile_path, ignore_errors=True)
+    
+    @staticmethod
+    def _backoff(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt (0-based).
+
+        Random spread keeps several workers that failed together (browser crash,
+        Flow rate limit) from retrying in lockstep.
+        """
+        return random.uniform(0, min(cap, base * 2 ** attempt))
     
     def _build_scene_prompt(
         self,
@@ -501,6 +722,22 @@ class RenderManager:
         return base_prompt
     
     async def close(self):
-        """Cleanup browser resources"""
+        """Cleanup browser resources (closes this worker's shared browser)"""
+        _shared_browsers.pop(self.worker_id, None)
         await self.browser_manager.close()
+    
+    @staticmethod
+    async def shutdown():
+        """Close every shared browser and the download client in this process; called on worker shutdown"""
+        browsers = list(_shared_browsers.values())
+        _shared_browsers.clear()
+        for browser_manager in browsers:
+            try:
+                await browser_manager.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser for worker {browser_manager.worker_id}: {e}")
+        try:
+            await close_http_client()
+        except Exception as e:
+            logger.warning(f"Error closing download HTTP client: {e}")
 
@@ -3,8 +3,11 @@ Celery Worker for Render Tasks
 """
 
 import os
+import asyncio
 import logging
+from typing import List
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_shutdown
 from app.config import settings
 from app.services.render_manager import RenderManager
 from app.models.scene import Scene
@@ -13,6 +16,29 @@ from app.core.database import SessionLocal
 
 logger = logging.getLogger(__name__)
 
+# Event loop the render tasks of this worker process run on. It is kept (not closed)
+# between tasks because the shared render browser lives on it.
+_task_loop = None
+
+
+def _get_task_loop() -> asyncio.AbstractEventLoop:
+    """This process's render loop, created on first use.
+
+    Runs on uvloop when installed (the render coroutines are mostly Playwright IPC
+    waits). Only the worker's own loop is affected - importing this module from the
+    API process leaves its event loop policy alone.
+    """
+    global _task_loop
+    if _task_loop is None or _task_loop.is_closed():
+        try:
+            import uvloop
+            _task_loop = uvloop.new_event_loop()
+        except ImportError:
+            logger.debug("uvloop not installed - using the default asyncio event loop")
+            _task_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_task_loop)
+    return _task_loop
+
 # Initialize Celery app
 celery_app = Celery(
     "veoflow",
@@ -34,6 +60,13 @@ celery_app.conf.update(
 )
 
 
+def _render_worker_id(task) -> str:
+    """Worker ID for a render task: one per pool process, so each has its own profile and browser"""
+    worker_name = getattr(task.request, 'hostname', None) or os.getenv("CELERY_WORKER_NAME", f"worker_{os.getpid()}")
+    worker_id_base = worker_name.split('@')[0] if '@' in worker_name else worker_name
+    return f"{worker_id_base}_{os.getpid()}"
+
+
 @celery_app.task(bind=True, max_retries=3)
 def render_scene_task(self, scene_id: str, project_id: str):
     """
@@ -84,54 +117,35 @@ def render_scene_task(self, scene_id: str, project_id: str):
         # Create render manager and render
         # Get worker ID for unique browser profile
         # Celery provides worker name via self.request.hostname
-        # IMPORTANT: Use task ID to ensure each task gets a unique profile, even if worker_id is same
-        worker_name = getattr(self.request, 'hostname', None) or os.getenv("CELERY_WORKER_NAME", f"worker_{os.getpid()}")
-        worker_id_base = worker_name.split('@')[0] if '@' in worker_name else worker_name
-        # Use task ID as part of worker_id to ensure uniqueness per task
-        task_id_short = self.request.id[:8]  # First 8 chars of task ID
-        worker_id = f"{worker_id_base}_{task_id_short}"
-        logger.info(f"Creating RenderManager with worker_id: {worker_id} (base: {worker_id_base}, task: {self.request.id})")
+        # IMPORTANT: Use the process ID so each pool process gets its own profile (and its own
+        # shared browser, reused by every task that process runs)
+        worker_id = _render_worker_id(self)
+        logger.info(f"Creating RenderManager with worker_id: {worker_id} (task: {self.request.id})")
         render_manager = RenderManager(worker_id=worker_id)
         logger.info("RenderManager created")
         
         # Note: Celery tasks are synchronous, but render_manager uses async
         # We need to run async code in sync context
-        import asyncio
         
         # Get or create event loop for this task
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_closed():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        loop = _get_task_loop()
         
-        try:
-            # Get render settings from project
-            from app.models.project import Project
-            project = db.query(Project).filter(Project.id == project_id).first()
-            render_settings = None
-            if project:
-                render_settings = project.get_render_settings()
-                logger.info(f"Using render settings: {render_settings}")
-            
-            # Run async render with render settings
-            logger.info("Starting async render process...")
-            result = loop.run_until_complete(
-                render_manager.render_scene(scene_dict, project_id, characters_list, render_settings)
-            )
-            logger.info(f"Render completed: success={result.get('success')}, error={result.get('error', 'None')}")
-        finally:
-            # Cleanup render manager
-            logger.info("Cleaning up render manager...")
-            try:
-                loop.run_until_complete(render_manager.close())
-                logger.info("Render manager closed")
-            except Exception as cleanup_error:
-                logger.warning(f"Error during cleanup: {cleanup_error}")
-            # Don't close the loop - it might be reused by Celery
+        # Get render settings from project
+        from app.models.project import Project
+        project = db.query(Project).filter(Project.id == project_id).first()
+        render_settings = None
+        if project:
+            render_settings = project.get_render_settings()
+            logger.info(f"Using render settings: {render_settings}")
+        
+        # Run async render with render settings. The browser is left running for the
+        # next task on this process and closed on worker shutdown; don't close the
+        # loop either - the browser lives on it
+        logger.info("Starting async render process...")
+        result = loop.run_until_complete(
+            render_manager.render_scene(scene_dict, project_id, characters_list, render_settings)
+        )
+        logger.info(f"Render completed: success={result.get('success')}, error={result.get('error', 'None')}")
         
         # Update scene status
         # IMPORTANT: Re-query scene to ensure it's attached to the current session
@@ -187,6 +201,128 @@ def render_scene_task(self, scene_id: str, project_id: str):
         db.close()
 
 
+@celery_app.task(bind=True, max_retries=3)
+def render_scenes_task(self, scene_ids: List[str], project_id: str):
+    """
+    Celery task to render several scenes of a project in one browser session
+    
+    The scenes are generated concurrently (see RenderManager.render_scenes), so
+    callers should queue at most render_manager.concurrent_generations() per task
+    to stay within the task time limit.
+    
+    Args:
+        scene_ids: IDs of the scenes to render, in order
+        project_id: Project ID
+    
+    Returns:
+        One render result dictionary per scene found
+    """
+    logger.info(f"=== RENDER BATCH TASK STARTED ===")
+    logger.info(f"Task ID: {self.request.id}")
+    logger.info(f"Scene IDs: {scene_ids}")
+    logger.info(f"Project ID: {project_id}")
+    
+    db = SessionLocal()
+    
+    try:
+        scenes_by_id = {
+            scene.id: scene
+            for scene in db.query(Scene).filter(Scene.id.in_(scene_ids)).all()
+        }
+        scenes = [scenes_by_id[scene_id] for scene_id in scene_ids if scene_id in scenes_by_id]
+        missing = [scene_id for scene_id in scene_ids if scene_id not in scenes_by_id]
+        if missing:
+            logger.warning(f"Scenes not found in database, skipping: {missing}")
+        if not scenes:
+            raise ValueError(f"None of the scenes {scene_ids} were found")
+        
+        characters = db.query(CharacterDNA).filter(
+            CharacterDNA.project_id == project_id
+        ).all()
+        logger.info(f"Found {len(characters)} characters")
+        
+        scene_dicts = [scene.to_dict() for scene in scenes]
+        characters_list = [char.to_dict() for char in characters]
+        
+        for scene in scenes:
+            scene.status = "rendering"
+        db.commit()
+        
+        worker_id = _render_worker_id(self)
+        logger.info(f"Creating RenderManager with worker_id: {worker_id} (task: {self.request.id})")
+        render_manager = RenderManager(worker_id=worker_id)
+        loop = _get_task_loop()
+        
+        from app.models.project import Project
+        project = db.query(Project).filter(Project.id == project_id).first()
+        render_settings = project.get_render_settings() if project else None
+        logger.info(f"Using render settings: {render_settings}")
+        
+        results = loop.run_until_complete(
+            render_manager.render_scenes(scene_dicts, project_id, characters_list, render_settings)
+        )
+        
+        # Re-query: the scenes may have been detached during the async render
+        scenes_by_id = {
+            scene.id: scene
+            for scene in db.query(Scene).filter(Scene.id.in_([s["id"] for s in scene_dicts])).all()
+        }
+        try:
+            for scene_dict, result in zip(scene_dicts, results):
+                scene = scenes_by_id.get(scene_dict["id"])
+                if not scene:
+                    logger.error(f"Scene not found when trying to update status: {scene_dict['id']}")
+                    continue
+                if result.get("success"):
+                    scene.status = "completed"
+                    scene.video_path = result.get("video_path")
+                    logger.info(f"Scene {scene.id} marked as completed. Video path: {scene.video_path}")
+                else:
+                    scene.status = "failed"
+                    logger.error(f"Scene {scene.id} marked as failed. Error: {result.get('error', 'Unknown error')}")
+            db.commit()
+        except Exception as commit_error:
+            logger.error(f"Failed to update scene statuses: {commit_error}", exc_info=True)
+            try:
+                db.rollback()
+            except Exception:
+                pass
+        
+        logger.info("=== RENDER BATCH TASK COMPLETED ===")
+        
+        return results
+        
+    except Exception as exc:
+        logger.error(f"Render batch task failed: {exc}", exc_info=True)
+        
+        try:
+            for scene in db.query(Scene).filter(Scene.id.in_(scene_ids)).all():
+                scene.status = "failed"
+            db.commit()
+        except Exception:
+            pass
+        
+        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+    
+    finally:
+        db.close()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_render_browsers(**kwargs):
+    """Close the browsers kept open across render tasks when the worker stops"""
+    # The browsers belong to the loop the render tasks ran on; none means no task ran
+    loop = _task_loop
+    if loop is None or loop.is_closed() or loop.is_running():
+        return
+    try:
+        loop.run_until_complete(RenderManager.shutdown())
+        logger.info("Closed shared render browsers")
+    except Exception as e:
+        logger.warning(f"Error closing render browsers on shutdown: {e}")
+
+
 @celery_app.task
 def get_task_status(task_id: str):
     """Get status of a Celery task"""
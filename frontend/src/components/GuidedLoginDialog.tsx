@@ -42,13 +42,15 @@ export function GuidedLoginDialog({ profileId, profileName, onClose, onSuccess }
   // Removed auto-polling - user will manually check status when ready
   // This prevents any interference with manual login process
 
-  const handleOpenGmail = async () => {
+  // Opens the Gmail and Flow tabs in one request; the backend navigates both concurrently
+  const handleOpenLoginTabs = async () => {
     try {
       setOpeningGmail(true)
-      await api.setup.openGmail(profileId)
+      await api.setup.openLoginTabs(profileId)
       setGmailOpened(true)
+      setFlowOpened(true)
     } catch (error: any) {
-      alert(`Failed to open Gmail: ${error.message}`)
+      alert(`Failed to open login tabs: ${error.message}`)
     } finally {
       setOpeningGmail(false)
     }
@@ -129,8 +131,8 @@ export function GuidedLoginDialog({ profileId, profileName, onClose, onSuccess }
               <div className="p-4 bg-blue-50 dark:bg-blue-900/20 rounded-lg border border-blue-200 dark:border-blue-800">
                 <h3 className="font-semibold mb-2">Step 1: Login to Gmail</h3>
                 <ol className="list-decimal list-inside space-y-2 text-sm">
-                  <li>Click the "Open Gmail" button below</li>
-                  <li>A browser tab will open with the Gmail login page</li>
+                  <li>Click the "Open Gmail & Flow" button below</li>
+                  <li>Browser tabs will open with the Gmail login page and Google Flow</li>
                   <li><strong>Log in to your Google account manually</strong> in that browser tab</li>
                   <li>After logging in, click "Check Login Status" to verify</li>
                   <li><strong>Important:</strong> The browser will not interfere with your login - it's just a normal browser window</li>
@@ -146,19 +148,19 @@ export function GuidedLoginDialog({ profileId, profileName, onClose, onSuccess }
                 </div>
 
                 <Button
-                  onClick={handleOpenGmail}
+                  onClick={handleOpenLoginTabs}
                   disabled={openingGmail}
                   className="w-full"
                 >
                   {openingGmail ? (
                     <>
                       <Loader2 className="h-4 w-4 mr-2 animate-spin" />
-                      Opening Gmail...
+                      Opening Gmail & Flow...
                     </>
                   ) : (
                     <>
                       <ExternalLink className="h-4 w-4 mr-2" />
-                      Open Gmail
+                      Open Gmail & Flow
                     </>
                   )}
                 </Button>
@@ -211,8 +213,7 @@ export function GuidedLoginDialog({ profileId, profileName, onClose, onSuccess }
                 <h3 className="font-semibold mb-2">Step 2: Login to Google Flow</h3>
                 <ol className="list-decimal list-inside space-y-2 text-sm">
                   <li>Make sure you've completed Step 1 (Gmail login)</li>
-                  <li>Click the "Open Flow" button below</li>
-                  <li>A browser tab will open with the Google Flow page</li>
+                  <li>The Google Flow tab was opened together with Gmail in Step 1 (use "Open Flow" below to reopen it)</li>
                   <li><strong>Log in to Google Flow manually</strong> if prompted</li>
                   <li>After logging in, click "Check Login Status" to verify</li>
                   <li><strong>Important:</strong> The browser will not interfere with your login - it's just a normal browser window</li>
@@ -240,7 +241,7 @@ export function GuidedLoginDialog({ profileId, profileName, onClose, onSuccess }
                   ) : (
                     <>
                       <ExternalLink className="h-4 w-4 mr-2" />
-                      Open Flow
+                      {flowOpened ? 'Reopen Flow' : 'Open Flow'}
                     </>
                   )}
                 </Button>
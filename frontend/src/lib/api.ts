@@ -311,6 +311,14 @@ class ApiClient {
       }>(`/api/setup/profiles/${id}/open-flow`, {
         method: 'POST',
       }),
+    openLoginTabs: (id: string) =>
+      this.request<{
+        success: boolean;
+        message: string;
+        urls: { gmail: string; flow: string };
+      }>(`/api/setup/profiles/${id}/open-login-tabs`, {
+        method: 'POST',
+      }),
     getLoginStatus: (id: string) =>
       this.request<{
         success: boolean;